@@ -5,16 +5,26 @@ from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.staticfiles import StaticFiles
-from routers import dashboard, auth, public, products, support, users, master, vendor, share, orders, debug, password_reset, cart, billing
+from routers import dashboard, auth, public, products, support, users, master, vendor, share, orders, debug, password_reset, cart, billing, search, img, direct_uploads
 from contextlib import asynccontextmanager
 from notify import ws_manager
 from db import init_db, engine, get_session
-from sqlmodel import SQLModel, inspect, text, Session
+from services.search import ensure_search_index
+from services.static_export import STATIC_EXPORT, StaticExportMiddleware
+from services.compression import CompressionMiddleware
+from services.assets import AssetStaticFiles
+from services.upload_files import UploadFiles
+from services.upload_limit import UploadLimitMiddleware
+from services import image_pool, slug_cache, uploads
+from models import UploadManifest
+from templates_engine import JINJA_PRECOMPILE, precompile_templates
+from utils.fastjson import FastJSONResponse
+from sqlmodel import SQLModel, inspect, text, Session, select
 from pathlib import Path
-from fastapi.staticfiles import StaticFiles
 from config import SECRET_KEY, PASSWORD_RESET_TOKEN_MAX_AGE, APP_BASE_URL
 
-app = FastAPI()
+# orjson para todas las respuestas JSON (utils/fastjson.py)
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # --- Static & Uploads ---
 BASE_DIR = Path(__file__).resolve().parent
@@ -31,20 +41,22 @@ else:
 (UPLOADS_DIR / "vendors").mkdir(parents=True, exist_ok=True)   # logos
 (UPLOADS_DIR / "products").mkdir(parents=True, exist_ok=True)  # productos
 
-# 3) Estáticos propios
+# 3) Estáticos propios: rutas con huella (asset() en Jinja) inmutables y
+#    .br/.gz precomprimidos si existen (services/assets.py, services/compression.py)
 app.mount("/static", 
-    StaticFiles(directory=str(BASE_DIR / "static")), 
+    AssetStaticFiles(directory=str(BASE_DIR / "static")), 
     name="static")
 
-# 4) ÚNICO mount público para subir/servir imágenes
+# 4) ÚNICO mount público para subir/servir imágenes (nombres uuid/hash -> cache inmutable;
+#    ETag por contenido, 304/Range y sendfile: services/upload_files.py)
 app.mount(
     "/uploads", 
-    StaticFiles(directory=str(UPLOADS_DIR)), 
+    UploadFiles(directory=str(UPLOADS_DIR)), 
     name="uploads")
 
 app.mount(
     "/vendors",
-    StaticFiles(directory=str(UPLOADS_DIR / "vendors"), html=False),
+    UploadFiles(directory=str(UPLOADS_DIR / "vendors"), prefix="vendors/"),
     name="vendors-legacy",
 )
 
@@ -60,9 +72,10 @@ print("DEBUG MOUNTS -> /products =>", str(UPLOADS_DIR / "products"))
 
 def _migrate_legacy_static_uploads():
     """
-    Compatibilidad: copia /static/uploads/*.*
+    Compatibilidad: enlaza /static/uploads/*.*
     -> /uploads/legacy/*.* para que URLs antiguas sigan sirviendo.
-    Se ejecuta al boot. Idempotente.
+    Hard link (mismos bytes, sin duplicar en disco); copia solo si el
+    volumen es otro filesystem. Se ejecuta al boot. Idempotente.
     """
     legacy_src = BASE_DIR / "static" / "uploads"
     legacy_dst = UPLOADS_DIR / "legacy"
@@ -73,19 +86,37 @@ def _migrate_legacy_static_uploads():
         target = legacy_dst / p.name
         try:
             if not target.exists() or target.stat().st_size == 0:
-                shutil.copy2(p, target)
+                target.unlink(missing_ok=True)
+                try:
+                    os.link(p, target)
+                except OSError:   # EXDEV: volumen montado aparte
+                    shutil.copy2(p, target)
         except Exception:
             # no interrumpimos el boot por esto
             pass
 
 app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
 
+# Export estático de tiendas: /u/{slug} se sirve desde /uploads/stores/<slug>/ si existe
+if STATIC_EXPORT:
+    app.add_middleware(StaticExportMiddleware)
+
+# brotli/gzip para HTML/JSON dinámicos (los estáticos ya vienen precomprimidos)
+app.add_middleware(CompressionMiddleware)
+
+# tope de MAX_UPLOAD_BYTES aplicado al body multipart mientras llega (antes de parsearlo)
+app.add_middleware(UploadLimitMiddleware)
+
 # --- Ciclo de vida ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()   # crea tablas una sola vez al boot
+    ensure_search_index()   # FTS5 (SQLite) / GIN (Postgres) para /search
+    if JINJA_PRECOMPILE:
+        precompile_templates()   # el primer request ya no compila Jinja
     _migrate_legacy_static_uploads()   # ← ejecuta la copia de compatibilidad
-    yield       # no hacemos nada al shutdown (ya migraste a WebSocket)
+    yield
+    image_pool.shutdown()   # procesos de imágenes (services/image_pool.py)
 
 app.router.lifespan_context = lifespan
 
@@ -93,15 +124,15 @@ app.router.lifespan_context = lifespan
 app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
 
 @app.get("/debug/ls")
-def debug_ls(slug: str = Query(...)):
-    prods_dir = (UPLOADS_DIR / "products" / slug)
-    vend_dir  = (UPLOADS_DIR / "vendors"  / slug)
-    return {
-        "products_path": str(prods_dir),
-        "products_files": sorted([p.name for p in prods_dir.glob("*")]) if prods_dir.exists() else [],
-        "vendors_path": str(vend_dir),
-        "vendors_files": sorted([p.name for p in vend_dir.glob("*")]) if vend_dir.exists() else [],
-    }
+def debug_ls(slug: str = Query(...), session: Session = Depends(get_session)):
+    # Desde upload_manifest (services/uploads.py), sin glob del volumen
+    ref = slug_cache.resolve_store_ref(session, slug)
+    if ref is None:
+        return {"uploads_dir": str(UPLOADS_DIR), "files": []}
+    paths = session.exec(
+        select(UploadManifest.path).where(UploadManifest.owner_id == ref.user_id).order_by(UploadManifest.path)
+    ).all()
+    return {"uploads_dir": str(UPLOADS_DIR), **uploads.usage_summary(session, ref.user_id), "files": list(paths)}
 
 @app.post("/debug/migrate-urls")
 def migrate_urls(session: Session = Depends(get_session)):
@@ -179,6 +210,9 @@ app.include_router(debug.router)
 app.include_router(password_reset.router)
 app.include_router(cart.router)
 app.include_router(billing.router)
+app.include_router(search.router)
+app.include_router(img.router)
+app.include_router(direct_uploads.router)
 
 
 
@@ -0,0 +1,29 @@
+"""store_versions.catalog_version
+
+Revision ID: a1c3e5f70002
+Revises: a1c3e5f70001
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f70002'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f70001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('store_versions', sa.Column('catalog_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('store_versions') as batch_op:
+        batch_op.drop_column('catalog_version')
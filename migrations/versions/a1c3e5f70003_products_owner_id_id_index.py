@@ -0,0 +1,28 @@
+"""products (owner_id, id) index for keyset pagination
+
+Revision ID: a1c3e5f70003
+Revises: a1c3e5f70002
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f70003'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f70002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_owner_id_id', 'products', ['owner_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_owner_id_id', table_name='products')
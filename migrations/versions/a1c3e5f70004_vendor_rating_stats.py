@@ -0,0 +1,40 @@
+"""vendor_rating_stats
+
+Revision ID: a1c3e5f70004
+Revises: a1c3e5f70003
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f70004'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f70003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('vendor_rating_stats',
+    sa.Column('vendor_id', sa.Integer(), nullable=False),
+    sa.Column('reviews_count', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('stars_1', sa.Integer(), nullable=False),
+    sa.Column('stars_2', sa.Integer(), nullable=False),
+    sa.Column('stars_3', sa.Integer(), nullable=False),
+    sa.Column('stars_4', sa.Integer(), nullable=False),
+    sa.Column('stars_5', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('vendor_id')
+    )
+    # Población inicial: python3 -m scripts.rebuild_ratings
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('vendor_rating_stats')
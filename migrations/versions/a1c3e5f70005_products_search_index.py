@@ -0,0 +1,52 @@
+"""products full-text search index
+
+Revision ID: a1c3e5f70005
+Revises: a1c3e5f70004
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f70005'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f70004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_PG_DOC = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_products_fts ON products USING GIN ({_PG_DOC})")
+    elif dialect == "sqlite":
+        # Igual que services/search.ensure_search_index: si el boot ya la creó (y llenó), no se toca
+        exists = op.get_bind().execute(sa.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+        )).first()
+        if exists:
+            return
+        op.execute(
+            "CREATE VIRTUAL TABLE products_fts USING fts5("
+            "name, description, owner_id UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO products_fts(rowid, name, description, owner_id) "
+            "SELECT id, name, coalesce(description, ''), owner_id FROM products"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_products_fts")
+    elif dialect == "sqlite":
+        op.execute("DROP TABLE IF EXISTS products_fts")
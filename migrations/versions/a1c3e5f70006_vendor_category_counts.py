@@ -0,0 +1,42 @@
+"""vendor category counts + products (owner_id, category, id) index
+
+Revision ID: a1c3e5f70006
+Revises: a1c3e5f70005
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f70006'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f70005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('vendor_category_counts',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=120), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('owner_id', 'category')
+    )
+    op.create_index('ix_products_owner_category_id', 'products', ['owner_id', 'category', 'id'], unique=False)
+    # Población inicial desde los productos existentes
+    op.execute(
+        "INSERT INTO vendor_category_counts(owner_id, category, count) "
+        "SELECT owner_id, category, count(*) FROM products "
+        "WHERE category IS NOT NULL GROUP BY owner_id, category"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_owner_category_id', table_name='products')
+    op.drop_table('vendor_category_counts')
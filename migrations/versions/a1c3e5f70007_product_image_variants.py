@@ -0,0 +1,29 @@
+"""products.image_variants (derivados WebP/JPEG de la foto)
+
+Revision ID: a1c3e5f70007
+Revises: a1c3e5f70006
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f70007'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f70006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL = sin derivados: la plantilla usa el original tal cual
+    op.add_column('products', sa.Column('image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'image_variants')
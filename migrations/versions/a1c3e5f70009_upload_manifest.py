@@ -0,0 +1,47 @@
+"""upload_manifest + users.storage_quota_mb
+
+Revision ID: a1c3e5f70009
+Revises: a1c3e5f70008
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f70009'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f70008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('upload_manifest',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(length=512), nullable=False),
+    sa.Column('bytes', sa.Integer(), nullable=False),
+    sa.Column('content_type', sa.String(length=80), nullable=True),
+    sa.Column('digest', sa.String(length=64), nullable=True),
+    sa.Column('refs', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('owner_id', 'path', name='uq_upload_manifest_owner_path')
+    )
+    op.create_index('ix_upload_manifest_owner_bytes', 'upload_manifest', ['owner_id', 'bytes'], unique=False)
+    op.create_index(op.f('ix_upload_manifest_digest'), 'upload_manifest', ['digest'], unique=False)
+    op.add_column('users', sa.Column('storage_quota_mb', sa.Integer(), nullable=True))
+    # Población inicial: python3 -m scripts.backfill_upload_manifest
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'storage_quota_mb')
+    op.drop_index(op.f('ix_upload_manifest_digest'), table_name='upload_manifest')
+    op.drop_index('ix_upload_manifest_owner_bytes', table_name='upload_manifest')
+    op.drop_table('upload_manifest')
@@ -0,0 +1,28 @@
+"""products image_url index (re-optimization keyset and reference updates)
+
+Revision ID: a1c3e5f70010
+Revises: a1c3e5f70009
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f70010'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f70009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_image_url', 'products', ['image_url'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_image_url', table_name='products')
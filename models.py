@@ -2,7 +2,7 @@ from __future__ import annotations
 from typing import Optional, Dict, Any
 from datetime import datetime, timezone
 from sqlmodel import SQLModel, Field, Column, String, UniqueConstraint
-from sqlalchemy import JSON  # JSON nativo de SQLAlchemy (para SQLite lo mapea a TEXT)
+from sqlalchemy import JSON, Index  # JSON nativo de SQLAlchemy (para SQLite lo mapea a TEXT)
 from pydantic import EmailStr
 
 # ----------------------------
@@ -43,10 +43,21 @@ class User(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=now_utc, nullable=False)
     slug: str = Field(sa_column=Column(String(120), nullable=False, index=True))
     role: str = Field(default="vendor", sa_column=Column(String(20), nullable=False))
+    # cuota de subidas en MB (NULL = VENDOR_STORAGE_QUOTA_MB, 0 = sin límite); services/uploads.py
+    storage_quota_mb: Optional[int] = Field(default=None)
 
 
 class Product(SQLModel, table=True):
     __tablename__ = "products"
+    __table_args__ = (
+        # keyset por tienda: WHERE owner_id = ? AND id < ? ORDER BY id DESC
+        Index("ix_products_owner_id_id", "owner_id", "id"),
+        # filtro por categoría: WHERE owner_id = ? AND category = ? AND id < ? ORDER BY id DESC
+        Index("ix_products_owner_category_id", "owner_id", "category", "id"),
+        # re-optimización (services/image_reoptimize.py): keyset por image_url y
+        # UPDATE ... WHERE image_url = ? al cambiar la referencia
+        Index("ix_products_image_url", "image_url"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     owner_id: int = Field(foreign_key="users.id", index=True, nullable=False)
@@ -54,6 +65,8 @@ class Product(SQLModel, table=True):
     price: float
     description: Optional[str] = Field(default=None, sa_column=Column(String(1000)))
     image_url: Optional[str] = Field(default=None, sa_column=Column(String(512)))
+    # derivados de image_url (services/images.py): {"widths": [...], "formats": [...]}
+    image_variants: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
     is_active: bool = Field(default=True, nullable=False)
     created_at: datetime = Field(default_factory=now_utc, nullable=False)
     updated_at: datetime = Field(default_factory=now_utc, nullable=False)
@@ -157,4 +170,96 @@ class Review(SQLModel, table=True):
 
     # Opcional: fuente externa
     source: Optional[str] = Field(default=None, max_length=50)  # "internal", "google", "instagram", etc.
-    source_url: Optional[str] = Field(default=None, max_length=255)
\ No newline at end of file
+    source_url: Optional[str] = Field(default=None, max_length=255)
+
+class StoreVersion(SQLModel, table=True):
+    """
+    Contadores de versión de la tienda pública de un vendor.
+    - page_version: se incrementa en cada escritura que cambia /u/{slug}
+      (productos, branding, moderación de reviews).
+    - catalog_version: solo cambia con escrituras de productos (products.json).
+    Viven en DB (y no en memoria) para que todos los workers vean la misma versión.
+    """
+    __tablename__ = "store_versions"
+
+    owner_id: int = Field(foreign_key="users.id", primary_key=True)
+    page_version: int = Field(default=0, nullable=False)
+    catalog_version: int = Field(default=0, nullable=False)
+    updated_at: datetime = Field(default_factory=now_utc, nullable=False)
+
+
+class VendorRatingStats(SQLModel, table=True):
+    """
+    Agregado de reviews APROBADAS por vendor (lo que ve el público).
+    Se mantiene de forma incremental al aprobar/ocultar reviews
+    (utils/reviews.apply_approval_change) y se puede recalcular desde `review`
+    con scripts/rebuild_ratings.py.
+    """
+    __tablename__ = "vendor_rating_stats"
+
+    vendor_id: int = Field(primary_key=True)  # = Review.vendor_id (users.id)
+    reviews_count: int = Field(default=0, nullable=False)
+    rating_sum: int = Field(default=0, nullable=False)
+    # histograma 1–5
+    stars_1: int = Field(default=0, nullable=False)
+    stars_2: int = Field(default=0, nullable=False)
+    stars_3: int = Field(default=0, nullable=False)
+    stars_4: int = Field(default=0, nullable=False)
+    stars_5: int = Field(default=0, nullable=False)
+    updated_at: datetime = Field(default_factory=now_utc, nullable=False)
+
+
+class VendorCategoryCount(SQLModel, table=True):
+    """
+    Conteo de productos por (vendor, categoría) para los filtros de la tienda.
+    Se mantiene en cada alta/edición/baja de producto (services/facets.py),
+    así /u/{slug} no hace GROUP BY en cada vista.
+    """
+    __tablename__ = "vendor_category_counts"
+
+    owner_id: int = Field(foreign_key="users.id", primary_key=True)
+    category: str = Field(sa_column=Column(String(120), primary_key=True))
+    count: int = Field(default=0, nullable=False)
+
+
+class UploadBlob(SQLModel, table=True):
+    """
+    Archivo subido, direccionado por contenido: /uploads/cas/<ab>/<sha256>.<ext>.
+    Los mismos bytes se guardan una sola vez; refcount = cuántas referencias
+    (fotos de producto, logos) apuntan a él. En 0 se borra (services/uploads.py).
+    """
+    __tablename__ = "upload_blobs"
+
+    digest: str = Field(sa_column=Column(String(64), primary_key=True))   # sha256 hex
+    ext: str = Field(sa_column=Column(String(8), nullable=False))
+    size: int = Field(default=0, nullable=False)
+    refcount: int = Field(default=0, nullable=False)
+    # derivados generados para este contenido (services/images.py), compartidos por todas las referencias
+    variants: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=now_utc, nullable=False)
+
+
+class UploadManifest(SQLModel, table=True):
+    """
+    Índice de lo que cada vendor tiene subido (una fila por vendor y archivo).
+    Lo mantiene services/uploads.py en cada alta/baja de referencia, así el uso de
+    disco de un vendor es un SUM(bytes) por índice, sin recorrer directorios.
+    bytes incluye los derivados (services/images.py). refs = cuántas veces lo usa
+    ese vendor (la misma foto en dos productos ocupa una sola vez).
+    """
+    __tablename__ = "upload_manifest"
+    __table_args__ = (
+        UniqueConstraint("owner_id", "path", name="uq_upload_manifest_owner_path"),
+        # uso por vendor: SELECT SUM(bytes) WHERE owner_id = ? (cubierto por el índice)
+        Index("ix_upload_manifest_owner_bytes", "owner_id", "bytes"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    owner_id: int = Field(foreign_key="users.id", nullable=False)
+    path: str = Field(sa_column=Column(String(512), nullable=False))   # relativo a UPLOADS_DIR
+    bytes: int = Field(default=0, nullable=False)
+    content_type: Optional[str] = Field(default=None, sa_column=Column(String(80)))
+    digest: Optional[str] = Field(default=None, sa_column=Column(String(64), index=True))  # sha256
+    refs: int = Field(default=1, nullable=False)
+    created_at: datetime = Field(default_factory=now_utc, nullable=False)
+
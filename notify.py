@@ -9,6 +9,7 @@ from config import (
     TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN
 )
 import contextlib
+from utils.fastjson import dumps_str
 
 # gestor mínimo de conexiones WS
 
@@ -38,7 +39,10 @@ class WSManager:
     def disconnect(self, ws: WebSocket):
         self.active.discard(ws)
 
-    async def broadcast(self, data: str):
+    async def broadcast(self, data):
+        """`data`: str ya serializado o dict/list (se serializa una vez con orjson)."""
+        if not isinstance(data, str):
+            data = dumps_str(data)
         dead = []
         for ws in list(self.active):
             try:
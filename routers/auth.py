@@ -11,6 +11,7 @@ from starlette.status import HTTP_302_FOUND, HTTP_303_SEE_OTHER
 from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta
 from notify import send_email
+from services import slug_cache
 import re, secrets, hashlib
 
 
@@ -71,6 +72,7 @@ def signup_post(
     session.add(u); 
     session.commit(); 
     session.refresh(u)
+    slug_cache.invalidate_slug(u.slug)  # el slug pudo estar en el cache negativo
 
     # 5) Autologin vendor
     request.session.clear()  # limpia cualquier estado previo
@@ -11,6 +11,7 @@ from datetime import datetime
 
 from db import get_session
 from models import User, VendorBranding  # ajusta si tu modelo está en otro lugar
+from services import slug_cache
 
 
 router = APIRouter()
@@ -47,7 +48,7 @@ def _require_vendor_by_slug(session: Session, slug: str, owner_id: int) -> User:
     Busca el vendor por slug y valida que sea el mismo usuario logueado.
     Mantiene tu patrón de seguridad actual.
     """
-    vendor = session.exec(select(User).where(User.slug == slug)).first()
+    vendor = slug_cache.get_user_by_slug(session, slug)
     if not vendor or int(vendor.id) != int(owner_id):
         raise HTTPException(status_code=403, detail="No autorizado")
     return vendor
@@ -75,6 +76,8 @@ def _get_or_create_branding(session: Session, owner_id: int) -> VendorBranding:
         session.add(branding)
         session.commit()
         session.refresh(branding)
+        slug_cache.invalidate_owner(owner_id)
+        slug_cache.invalidate_slug(branding.slug)
 
     if branding.settings is None:
         branding.settings = {}
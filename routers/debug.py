@@ -1,11 +1,10 @@
 
 from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+from utils.fastjson import FastJSONResponse
 from sqlmodel import Session, select
 from db import get_session
-from models import VendorBranding, User
-from pathlib import Path
-import os
+from models import VendorBranding, User, UploadManifest
+from services import image_pool, image_cache, slug_cache, uploads
 
 router = APIRouter()
 
@@ -15,9 +14,9 @@ def dbg_branding(slug: str, session: Session = Depends(get_session)):
     b = session.exec(select(VendorBranding).where(VendorBranding.slug == slug)).first()
     if not b:
         u = session.exec(select(User).where(User.slug == slug)).first()
-        if not u: return JSONResponse({"error":"no user/branding"}, status_code=404)
+        if not u: return FastJSONResponse({"error":"no user/branding"}, status_code=404)
         b = session.exec(select(VendorBranding).where(VendorBranding.owner_id == u.id)).first()
-        if not b: return JSONResponse({"error":"no branding for user"}, status_code=404)
+        if not b: return FastJSONResponse({"error":"no branding for user"}, status_code=404)
     return {
         "branding_id": b.id,
         "slug": b.slug,
@@ -29,12 +28,24 @@ def dbg_branding(slug: str, session: Session = Depends(get_session)):
     }
 
 @router.get("/debug/uploads/{vendor_slug}")
-def dbg_uploads(vendor_slug: str):
-    root = Path("uploads") / "vendors" / vendor_slug
-    if not root.exists():
-        return {"exists": False, "path": str(root)}
-    files = []
-    for p in root.glob("*"):
-        if p.is_file():
-            files.append({"name": p.name, "size": p.stat().st_size})
-    return {"exists": True, "path": str(root.resolve()), "files": files}
+def dbg_uploads(vendor_slug: str, session: Session = Depends(get_session)):
+    # Desde upload_manifest (índice por vendor), sin recorrer el disco
+    ref = slug_cache.resolve_store_ref(session, vendor_slug)
+    if ref is None:
+        return FastJSONResponse({"error": "no user/branding"}, status_code=404)
+    rows = session.exec(
+        select(UploadManifest).where(UploadManifest.owner_id == ref.user_id).order_by(UploadManifest.id)
+    ).all()
+    return {
+        "owner_id": ref.user_id,
+        **uploads.usage_summary(session, ref.user_id),
+        "files": [
+            {"path": r.path, "size": r.bytes, "content_type": r.content_type, "refs": r.refs, "created_at": r.created_at}
+            for r in rows
+        ],
+    }
+
+@router.get("/debug/image-pool")
+def dbg_image_pool():
+    # cola/tiempos del pool de imágenes y ocupación del cache de /img (por proceso)
+    return {"pool": image_pool.metrics(), "resize_cache": image_cache.stats()}
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Request, Depends, HTTPException
+from utils.fastjson import FastJSONResponse
+from sqlmodel import Session
+from db import get_session
+from services import uploads
+from storage import get_storage, incoming_key
+from storage_local import MAX_UPLOAD_BYTES
+import uuid
+
+router = APIRouter(prefix="/admin/uploads", tags=["Direct Uploads"])
+
+
+@router.post("/presign")
+def presign_upload(request: Request, session: Session = Depends(get_session)):
+    """
+    POST firmado para subir una imagen directo al bucket (STORAGE_BACKEND=s3).
+    El navegador sube a incoming/<vendor>/<id> y manda `key` en el formulario
+    (image_key / logo_key); el servidor la valida y la pasa a cas/ en el pool.
+    404 con el backend local: el formulario sube el archivo como siempre.
+    """
+    uid = request.session.get("user_id")
+    if not uid:
+        raise HTTPException(status_code=401, detail="No autenticado")
+    backend = get_storage()
+    if not backend.supports_presign:
+        raise HTTPException(status_code=404, detail="Subidas directas no disponibles")
+    owner_id = int(uid)
+    uploads.check_quota(session, owner_id)   # 413 antes de firmar nada
+
+    key = incoming_key(owner_id, uuid.uuid4().hex)
+    post = backend.presign_upload(key, MAX_UPLOAD_BYTES)
+    return FastJSONResponse(
+        {"key": key, "url": post["url"], "fields": post["fields"], "max_bytes": MAX_UPLOAD_BYTES},
+        headers={"Cache-Control": "no-store"},
+    )
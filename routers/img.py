@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from services import images, image_cache, image_pool
+from services.assets import IMMUTABLE, is_immutable_upload
+from storage import get_storage
+import os
+import re
+
+router = APIRouter(tags=["Images"])
+
+_SIZE_RE = re.compile(r"^(\d{1,4})x(\d{1,4})$")
+
+
+def _pick_format(request: Request) -> str:
+    """WebP si el navegador lo acepta; si no, JPEG."""
+    return "webp" if "image/webp" in request.headers.get("accept", "") else "jpg"
+
+
+@router.get("/img/{size}/{path:path}")
+async def resized_image(size: str, path: str, request: Request):
+    """
+    Subida redimensionada bajo demanda (cache en disco con LRU). `path` es la clave en el
+    backend (storage.py). size = "{w}x{h}" (h=0: proporcional) y solo de la lista
+    permitida (images.RESIZE_SIZES).
+    """
+    m = _SIZE_RE.match(size)
+    if not m or (int(m.group(1)), int(m.group(2))) not in images.RESIZE_SIZES:
+        raise HTTPException(status_code=404, detail="Tamaño no permitido")
+    width, height = int(m.group(1)), int(m.group(2))
+
+    if os.path.splitext(path)[1].lower() not in images.RASTER_EXTS:
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+    backend = get_storage()
+    # nombres uuid/hash: el original no cambia nunca -> la variante tampoco
+    immutable = is_immutable_upload(os.path.basename(path))
+    if immutable and not backend.is_local:
+        version = "immutable"   # sin HEAD al bucket por request; si no existe, falla el render
+    else:
+        try:
+            version = await run_in_threadpool(backend.version, path)
+        except ValueError:   # clave fuera de UPLOADS_DIR
+            version = None
+        if version is None:
+            raise HTTPException(status_code=404, detail="Imagen no encontrada")
+
+    fmt = _pick_format(request)
+    name = image_cache.cache_key(path, version, width, height, fmt)
+    try:
+        cached = await image_cache.get_or_create(
+            name, lambda: image_pool.run(images.render_resized_key, path, width, height, fmt)
+        )
+    except (OSError, ValueError):   # archivo corrupto / no es imagen / no existe
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+
+    cache_control = IMMUTABLE if immutable else "public, max-age=86400"
+    return FileResponse(
+        cached,
+        media_type=images.FORMATS[fmt][1],
+        headers={"Cache-Control": cache_control, "Vary": "Accept"},
+    )
@@ -15,6 +15,7 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlmodel import Session, select
 from models import PaymentReport, Product, DispatchedOrder, User, Order, OrderItem
 from notify import ws_manager
+from utils.fastjson import FastJSONResponse
 from db import get_session
 from collections import defaultdict
 
@@ -316,7 +317,7 @@ def admin_orders_json(request: Request, session: Session = Depends(get_session))
             g["method"] = getattr(pr, "method", "") or ""
             g["reference"] = getattr(pr, "reference", "") or ""
             g["notes"] = getattr(pr, "notes", "") or ""
-            g["created_at"] = iso_dt(getattr(pr, "created_at", None))
+            g["created_at"] = getattr(pr, "created_at", None)   # datetime o None: lo serializa FastJSONResponse
         g["items"].append({
             "product_id": prod.id,
             "product_name": prod.name,
@@ -325,7 +326,7 @@ def admin_orders_json(request: Request, session: Session = Depends(get_session))
         })
 
     # salida
-    return [{
+    return FastJSONResponse([{
         "id": data["id"],
         "order_id": data["order_id"],
         "items": data["items"],
@@ -335,7 +336,7 @@ def admin_orders_json(request: Request, session: Session = Depends(get_session))
         "reference": data["reference"],
         "notes": data["notes"],
         "created_at": data["created_at"],
-    } for _, data in grouped.items()]
+    } for _, data in grouped.items()])
 
 # =========================
 # JSON: despachadas
@@ -382,8 +383,8 @@ def admin_orders_dispatched_json(request: Request, session: Session = Depends(ge
             g["method"] = getattr(pr, "method", "") or ""
             g["reference"] = getattr(pr, "reference", "") or ""
             g["notes"] = getattr(pr, "notes", "") or ""
-            g["created_at"] = iso_dt(getattr(pr, "created_at", None))
-            g["dispatched_at"] = iso_dt(dispatched[pr.id])
+            g["created_at"] = getattr(pr, "created_at", None)   # datetime o None: lo serializa FastJSONResponse
+            g["dispatched_at"] = dispatched[pr.id]
         g["items"].append({
             "product_id": prod.id,
             "product_name": prod.name,
@@ -391,7 +392,7 @@ def admin_orders_dispatched_json(request: Request, session: Session = Depends(ge
             "unit_price": item.unit_price,
         })
 
-    return [{
+    return FastJSONResponse([{
         "id": data["id"],
         "order_id": data["order_id"],
         "items": data["items"],
@@ -402,7 +403,7 @@ def admin_orders_dispatched_json(request: Request, session: Session = Depends(ge
         "notes": data["notes"],
         "created_at": data["created_at"],
         "dispatched_at": data.get("dispatched_at"),
-    } for _, data in grouped.items()]
+    } for _, data in grouped.items()])
 
 # =========================
 # Acción: marcar como despachado
@@ -485,12 +486,10 @@ def dispatch_order(
     session.commit()
     session.refresh(d)
 
-    payload = {"type": "order_dispatched", "report_id": report_id, "dispatched_at": iso_dt(d.created_at)}
-    # Si ws_manager.broadcast requiere JSON string:
-    # import json; background_tasks and ws_manager may vary en tu app:
+    payload = {"type": "order_dispatched", "report_id": report_id, "dispatched_at": d.created_at}
+    # ws_manager.broadcast serializa el dict una sola vez (utils/fastjson.py)
     if background_tasks is not None:
-        import json
-        background_tasks.add_task(ws_manager.broadcast, json.dumps(payload))
+        background_tasks.add_task(ws_manager.broadcast, payload)
 
-    return {"ok": True, "report_id": report_id, "dispatched_at": iso_dt(d.created_at)}
+    return FastJSONResponse({"ok": True, "report_id": report_id, "dispatched_at": d.created_at})
 
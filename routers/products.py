@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Request, Depends, Form, UploadFile, File, HTTPException
-from fastapi.responses import RedirectResponse, HTMLResponse
+from fastapi.responses import RedirectResponse, HTMLResponse, Response
+from utils.fastjson import FastJSONResponse
 from templates_engine import templates
 from sqlmodel import Session, select
 from models import Product, User
 from notify import ws_manager
 from db import get_session
-from storage_local import save_product_bytes, UPLOADS_DIR
-import os, json
+from storage_local import UPLOADS_DIR
+from services import store_cache, search, images, uploads
+from services.facets import normalize_category, apply_category_change
+from utils.pagination import keyset_page, clamp_limit
+from typing import Optional
+import os
 from datetime import timezone  # si no usas _iso(), puedes eliminar esta import
 
 router = APIRouter(prefix="/admin/products", tags=["Admin Products"])
@@ -75,37 +80,45 @@ async def create_product(
     name: str = Form(...),
     price: float = Form(...),
     stock: int = Form(0),
+    category: str = Form(""),
     description: str = Form(""),
     image: UploadFile | None = File(None),
+    image_key: str | None = Form(None),   # subida directa al bucket (static/admin/js/direct-upload.js)
     session: Session = Depends(get_session),
 ):
     """Crea un producto. Si se adjunta imagen, se guarda en el volumen."""
     owner_id = _owner_id(request)
 
-    # slug del dueño para organizar carpetas
-    owner = session.get(User, owner_id)
-    owner_slug = owner.slug if owner and owner.slug else str(owner_id)
-
     image_url = None
+    image_variants = None
     if image and getattr(image, "filename", ""):
-        content = await image.read()
-        image_url = save_product_bytes(owner_slug, content, image.filename)
+        # a disco por bloques, deduplicada por contenido y dentro de la cuota del
+        # vendor (413/415); derivados WebP/JPEG en el pool solo si la foto es nueva (429)
+        image_url, image_variants = await uploads.ingest_image(session, owner_id, image)
+    elif image_key:
+        image_url, image_variants = await uploads.ingest_key(session, owner_id, image_key)
 
     p = Product(
         name=name.strip(),
         description=(description or "").strip() or None,
         price=price,
         stock=stock,
+        category=normalize_category(category),
         image_url=image_url,
+        image_variants=image_variants,
         owner_id=owner_id,
     )
     session.add(p)
+    session.flush()                 # asigna p.id para el índice de búsqueda
+    search.index_product(session, p)
+    apply_category_change(session, owner_id, None, p.category)
+    store_cache.bump_catalog(session, owner_id)  # nueva versión de catálogo y de /u/{slug}
     session.commit()
     session.refresh(p)
 
     # Notificar a la vista pública (si está abierta)
     try:
-        await ws_manager.broadcast(json.dumps({"type": "products_changed"}))
+        await ws_manager.broadcast({"type": "products_changed", "owner_id": owner_id})
     except Exception:
         pass
 
@@ -130,20 +143,42 @@ def edit_product_page(
 
 # ================== API JSON (admin) ==================
 @router.get("/list.json")
-def products_json(request: Request, session: Session = Depends(get_session)):
-    """Devuelve los productos del vendor autenticado para la UI del admin."""
+def products_json(
+    request: Request,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None,
+    session: Session = Depends(get_session),
+):
+    """
+    Devuelve los productos del vendor autenticado para la UI del admin,
+    paginados por cursor: {"products": [...], "next_cursor": <id> | null}.
+    ETag derivado de la versión del catálogo: 304 sin tocar productos si no cambió.
+    """
     owner_id = _owner_id(request)
-    rows = session.exec(select(Product).where(Product.owner_id == owner_id)).all()
-    return [
-        {
-            "id": p.id,
-            "name": p.name,
-            "price": p.price,
-            "stock": p.stock,
-            "image_url": p.image_url or DEFAULT_IMAGE_URL,
-            "created_at": p.created_at.isoformat(),
-        }
-        for p in rows]
+    limit = clamp_limit(limit)
+    version = store_cache.get_catalog_version(session, owner_id)
+    etag = store_cache.catalog_etag(owner_id, version, "admin", cursor, limit)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if store_cache.etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    rows, next_cursor = keyset_page(
+        session, select(Product).where(Product.owner_id == owner_id), Product.id,
+        cursor=cursor, limit=limit,
+    )
+    return FastJSONResponse({
+        "products": [
+            {
+                "id": p.id,
+                "name": p.name,
+                "price": p.price,
+                "stock": p.stock,
+                "image_url": p.image_url or DEFAULT_IMAGE_URL,
+                "created_at": p.created_at,
+            }
+            for p in rows],
+        "next_cursor": next_cursor,
+    }, headers=headers)
 
 # ================== UPDATE ==================
 @router.post("/update/{product_id}")
@@ -153,9 +188,10 @@ async def update_product(
     name: str = Form(...),
     price: float = Form(...),
     stock: int = Form(0),
-    category: str = Form(""),  # si no lo usas en el modelo, puedes quitar este campo del form
+    category: str | None = Form(None),  # None = el form no lo envió (se conserva la actual)
     description: str = Form(""),
     image: UploadFile | None = File(None),
+    image_key: str | None = Form(None),
     session: Session = Depends(get_session),
 ):
     """Actualiza campos del producto y, opcionalmente, reemplaza la imagen."""
@@ -165,22 +201,32 @@ async def update_product(
         raise HTTPException(status_code=404, detail="Producto no encontrado")
 
     if image and getattr(image, "filename", ""):
-        owner = session.get(User, owner_id)
-        owner_slug = owner.slug if owner and owner.slug else str(owner_id)
-        content = await image.read()
-        p.image_url = save_product_bytes(owner_slug, content, image.filename)
+        old_url = p.image_url
+        p.image_url, p.image_variants = await uploads.ingest_image(session, owner_id, image)
+        uploads.release(session, owner_id, old_url)   # misma foto otra vez: +1 -1, no se borra nada
+    elif image_key:
+        old_url = p.image_url
+        p.image_url, p.image_variants = await uploads.ingest_key(session, owner_id, image_key)
+        uploads.release(session, owner_id, old_url)
 
     p.name = name.strip()
     p.price = price
     p.stock = stock
     p.description = (description or "").strip() or None
+    if category is not None:
+        new_category = normalize_category(category)
+        if p.is_active:   # las facetas cuentan solo productos activos (services/facets.py)
+            apply_category_change(session, owner_id, p.category, new_category)
+        p.category = new_category
 
     session.add(p)
+    search.index_product(session, p)
+    store_cache.bump_catalog(session, owner_id)
     session.commit()
     session.refresh(p)
 
     try:
-        await ws_manager.broadcast(json.dumps({"type": "products_changed"}))
+        await ws_manager.broadcast({"type": "products_changed", "owner_id": owner_id})
     except Exception:
         pass
 
@@ -201,22 +247,30 @@ async def delete_product(
     if not p or p.owner_id != owner_id:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
 
-    # Borrado seguro en el volumen si la URL apunta a /uploads/...
+    # Subidas por contenido: se descuenta la referencia (el archivo se borra si
+    # nadie más lo usa). Subidas viejas (uuid): borrado seguro en el volumen.
     try:
-        if p.image_url and p.image_url.startswith("/uploads/"):
+        if uploads.release(session, owner_id, p.image_url):
+            pass
+        elif p.image_url and p.image_url.startswith("/uploads/"):
             rel = p.image_url[len("/uploads/"):]  # e.g. "products/<slug>/<file>.png"
             file_path = (UPLOADS_DIR / rel).resolve()
             # Evita borrar algo fuera del volumen por error de path
             if str(file_path).startswith(str(UPLOADS_DIR)) and file_path.exists():
                 file_path.unlink()
+            images.remove_variants(p.image_url, p.image_variants)
     except Exception:
         pass  # no bloquea el borrado lógico
 
     session.delete(p)
+    search.remove_product(session, product_id)
+    if p.is_active:
+        apply_category_change(session, owner_id, p.category, None)
+    store_cache.bump_catalog(session, owner_id)
     session.commit()
 
     try:
-        await ws_manager.broadcast(json.dumps({"type": "products_changed"}))
+        await ws_manager.broadcast({"type": "products_changed", "owner_id": owner_id})
     except Exception:
         pass
 
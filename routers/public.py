@@ -1,23 +1,28 @@
 from fastapi import APIRouter, Request, Form, Depends, WebSocket, WebSocketDisconnect, HTTPException
 from templates_engine import templates
-from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, Response
+from utils.fastjson import FastJSONResponse
 from sse_starlette.sse import EventSourceResponse
 from sqlmodel import Session, select
-from models import Product, PaymentReport, User, VendorBranding, Order, OrderItem, Review
+from models import Product, PaymentReport, User, Order, OrderItem
 from db import get_session
 from notify import ws_manager
 from sms import send_sms
 from config import PAYMENT_INFO, SELLER_MOBILE
 from routers.store_helpers import resolve_store, build_theme
-from utils.reviews import compute_avg_rating
-import secrets, asyncio, json
+from services import store_cache, slug_cache, storefront
+from utils.pagination import keyset_page, clamp_limit
+import secrets, asyncio
 
 DEFAULT_IMAGE_URL = "/static/img/product_placeholder.png"
 
+# Productos por página en el HTML de /public (y de /u/{slug} en esta ruta)
+MARKET_PAGE_SIZE = 24
+
 router = APIRouter(prefix="", tags=["Public"])
 
 def _get_user_by_slug(session: Session, slug: str) -> User:
-    user = session.exec(select(User).where(User.slug == slug)).first()
+    user = slug_cache.get_user_by_slug(session, slug)
     if not user: raise HTTPException(status_code=404, detail="Vendedor no encontrado")
     return user
 
@@ -51,14 +56,39 @@ async def root_home(request: Request):
 
 # ---------- HOME PÚBLICO ----------
 @router.get("/public", name="public_home", response_class=HTMLResponse)
-async def public_home(request: Request, session: Session = Depends(get_session)):
-    products = session.exec(
-        select(Product).order_by(Product.id.desc())
-    ).all()
+async def public_home(request: Request, cursor: int | None = None, session: Session = Depends(get_session)):
+    """
+    Marketplace: productos de todos los vendors, más nuevos primero.
+    Solo se renderiza una página; "Cargar más" sigue por /public/products.json.
+    """
+    products, next_cursor = keyset_page(
+        session, select(Product), Product.id, cursor=cursor, limit=MARKET_PAGE_SIZE,
+    )
     return templates.TemplateResponse("public/home.html", {
         "request": request,
-        "products": products
+        "products": products,
+        "next_cursor": next_cursor,
+        "more_url": "/public/products.json",
+        "vendor": None,
+        "branding": None,
+        "theme": build_theme(None),
     })
+
+
+@router.get("/public/products.json")
+def public_feed_json(cursor: int | None = None, limit: int | None = None, session: Session = Depends(get_session)):
+    """Feed paginado del marketplace: {"products": [...], "next_cursor": <id> | null}."""
+    rows, next_cursor = keyset_page(
+        session, select(Product), Product.id, cursor=cursor, limit=clamp_limit(limit),
+    )
+    return {
+        "products": [{
+            "id": p.id, "name": p.name, "price": p.price, "stock": p.stock,
+            "description": p.description,
+            "image_url": p.image_url or DEFAULT_IMAGE_URL,
+        } for p in rows],
+        "next_cursor": next_cursor,
+    }
     
 
 @router.get("/u/{slug}")
@@ -67,41 +97,60 @@ def public_store(
     request: Request, 
     session: Session = Depends(get_session)):
 
-    user = _get_user_by_slug(session, slug)
-    branding = session.exec(select(VendorBranding).where(VendorBranding.owner_id == user.id)).first()
-    products = session.exec(select(Product).where(Product.owner_id == user.id)).all()
-
-    reviews = session.exec(
-        select(Review)
-        .where(Review.vendor_id == user.id)
-        .where(Review.is_approved == True)
-        .order_by(Review.created_at.desc())
-        .limit(20)
-    ).all()
+    # Cabecera (vendor + branding + versión + rating) en una consulta: services/storefront.py
+    sf = storefront.load_store(session, slug)
+    if sf is None:
+        raise HTTPException(status_code=404, detail="Vendedor no encontrado")
+    user = sf.user
 
-    avg_rating = compute_avg_rating(reviews)
-    reviews_count = len(reviews)
+    def render() -> bytes:
+        storefront.load_body(session, sf, limit=MARKET_PAGE_SIZE)
+        rating = sf.rating
 
-    return templates.TemplateResponse("public/home.html", {
-        "request": request,
-        "vendor": user,
-        "branding": branding,
-        "products": products,  # cada p.image_url ya es /uploads/...
-        "reviews": reviews,               # CHG
-        "avg_rating": avg_rating,         # CHG
-        "reviews_count": reviews_count,   # CHG
-    })
+        return templates.TemplateResponse("public/home.html", {
+            "request": request,
+            "vendor": user,
+            "branding": sf.branding,
+            "products": sf.products,  # cada p.image_url ya es /uploads/...
+            "next_cursor": sf.next_cursor,
+            "more_url": f"/u/{user.slug}/products.json",
+            "reviews": sf.reviews,            # CHG
+            "avg_rating": rating.avg,         # CHG
+            "reviews_count": rating.count,    # CHG
+            "rating_histogram": rating.histogram,
+        }).body
+
+    # Variante propia: esta ruta renderiza distinto que vendor.public_store
+    return store_cache.cached_page(request, user.id, sf.page_version, render, variant="public")
 
 # JSON para la grilla pública del vendor
 
 @router.get("/u/{slug}/products.json")
-def public_products_json(slug: str, session: Session = Depends(get_session)):
+def public_products_json(
+    slug: str,
+    request: Request,
+    cursor: int | None = None,
+    limit: int | None = None,
+    session: Session = Depends(get_session)):
     user = _get_user_by_slug(session, slug)
-    rows = session.exec(select(Product).where(Product.owner_id == user.id)).all()
-    return [{
-        "id": p.id, "name": p.name, "price": p.price, "stock": p.stock,
-        "image_url": p.image_url,  # /uploads/...
-    } for p in rows]
+    limit = clamp_limit(limit)
+    version = store_cache.get_catalog_version(session, user.id)
+    etag = store_cache.catalog_etag(user.id, version, "public-lite", cursor, limit)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if store_cache.etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    rows, next_cursor = keyset_page(
+        session, storefront.products_stmt(user.id), Product.id,
+        cursor=cursor, limit=limit,
+    )
+    return FastJSONResponse({
+        "products": [{
+            "id": p.id, "name": p.name, "price": p.price, "stock": p.stock,
+            "image_url": p.image_url,  # /uploads/...
+        } for p in rows],
+        "next_cursor": next_cursor,
+    }, headers=headers)
 
 
 @router.get("/public/payment-info")
@@ -199,7 +248,7 @@ async def public_report_payment(
     """
 
     # 1) Resolver tienda por slug
-    user = session.exec(select(User).where(User.slug == slug)).first()
+    user = slug_cache.get_user_by_slug(session, slug)
     if not user:
         raise HTTPException(status_code=404, detail="Vendedor no encontrado")
 
@@ -265,12 +314,12 @@ async def public_report_payment(
         }
     }
     try:
-        asyncio.create_task(ws_manager.broadcast(json.dumps(payload)))
+        asyncio.create_task(ws_manager.broadcast(payload))
     except Exception:
         pass
 
     # 8) Respuesta JSON mínima (tu front ya la consume)
-    return JSONResponse({"ok": True, "report_id": report.id, "order_id": order.id, "amount": amount})
+    return FastJSONResponse({"ok": True, "report_id": report.id, "order_id": order.id, "amount": amount})
 
 @router.get("/u/{slug}/cart.json")
 def cart_json(slug: str, request: Request, session: Session = Depends(get_session)):
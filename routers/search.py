@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Request, Depends, Query
+from fastapi.responses import Response
+from utils.fastjson import FastJSONResponse
+from sqlmodel import Session
+from db import get_session
+from routers.store_helpers import resolve_store, product_to_json
+from services import store_cache
+from services.search import search_products
+from utils.pagination import clamp_limit
+
+router = APIRouter(tags=["Search"])
+
+# ---------------------------
+# Búsqueda full-text (ver services/search.py)
+# Respuesta: {"q": ..., "products": [...], "page": n, "next_page": n+1 | null}
+# ---------------------------
+
+def _payload(q: str, rows, page: int, has_more: bool) -> dict:
+    return {
+        "q": q,
+        "products": [product_to_json(p) for p in rows],
+        "page": page,
+        "next_page": page + 1 if has_more else None,
+    }
+
+@router.get("/u/{slug}/search")
+def store_search(
+    slug: str,
+    request: Request,
+    q: str = Query("", max_length=200),
+    page: int = Query(1, ge=1, le=500),
+    limit: int | None = None,
+    session: Session = Depends(get_session),
+):
+    """Busca en el catálogo de una tienda. ETag por versión de catálogo (+ q/page/limit)."""
+    user, _ = resolve_store(session, slug)
+    limit = clamp_limit(limit)
+    version = store_cache.get_catalog_version(session, user.id)
+    etag = store_cache.catalog_etag(user.id, version, "search", q.strip().lower(), page, limit)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if store_cache.etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    rows, has_more = search_products(session, q, owner_id=user.id, limit=limit, page=page)
+    return FastJSONResponse(_payload(q, rows, page, has_more), headers=headers)
+
+@router.get("/public/search")
+def marketplace_search(
+    q: str = Query("", max_length=200),
+    page: int = Query(1, ge=1, le=500),
+    limit: int | None = None,
+    session: Session = Depends(get_session),
+):
+    """Busca en todo el marketplace (/public)."""
+    limit = clamp_limit(limit)
+    rows, has_more = search_products(session, q, limit=limit, page=page)
+    return _payload(q, rows, page, has_more)
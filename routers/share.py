@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse, Response
+from fastapi.responses import HTMLResponse, Response, FileResponse
 from templates_engine import templates
 from sqlmodel import Session
 from db import get_session
 from models import User
-from urllib.parse import quote
-import io
+from routers.store_helpers import get_branding_by_owner
+from services import qr
+from typing import Optional
 
 router = APIRouter(prefix="/admin/share", tags=["Admin Share"])
 
@@ -14,40 +15,58 @@ def _require_vendor(request: Request) -> int:
         raise HTTPException(status_code=401, detail="No autenticado")
     return int(request.session["user_id"])
 
-def _public_url(request: Request, vendor: User) -> str:
+def _public_url(request: Request, session: Session, vendor: User) -> str:
+    """/u/<slug del branding> (el que se edita en /vendor/brand); sin branding, el del usuario."""
     base = str(request.base_url).rstrip("/")
-    return f"{base}/u/{vendor.slug}"
+    branding = get_branding_by_owner(session, vendor.id)
+    return f"{base}/u/{branding.slug if branding and branding.slug else vendor.slug}"
 
 @router.get("/", response_class=HTMLResponse)
 def share_page(request: Request, session: Session = Depends(get_session)):
     owner_id = _require_vendor(request)
     vendor = session.get(User, owner_id)
-    public_url = _public_url(request, vendor)
+    public_url = _public_url(request, session, vendor)
     return templates.TemplateResponse("/admin/share.html", {
         "request": request,
         "vendor": vendor,
-        "public_url": public_url
+        "public_url": public_url,
+        "qr_version": qr.version(public_url),
+        "qr_sizes": qr.QR_SIZES,
     })
 
-@router.get("/qr.png")
-def share_qr_png(request: Request, session: Session = Depends(get_session)):
+@router.get("/qr.{fmt}")
+async def share_qr(
+    fmt: str,
+    request: Request,
+    size: int = qr.QR_DEFAULT_SIZE,
+    v: Optional[str] = None,
+    download: bool = False,
+    session: Session = Depends(get_session),
+):
     """
-    Genera PNG del QR en el servidor si hay librería `qrcode` instalada.
-    Si no, hace fallback a un generador público.
+    QR de la URL pública (PNG de `size` px o SVG). Se genera una vez por URL y tamaño y
+    queda en disco (services/qr.py). Con ?v=<versión actual> se cachea como inmutable;
+    sin v, el navegador revalida con ETag (304).
     """
     owner_id = _require_vendor(request)
+    if fmt not in qr.FORMATS or (fmt == "png" and size not in qr.QR_SIZES):
+        raise HTTPException(status_code=404, detail="Formato o tamaño no disponible")
+    if not qr.available():
+        raise HTTPException(status_code=503, detail="Generador de QR no instalado")
     vendor = session.get(User, owner_id)
-    public_url = _public_url(request, vendor)
+    public_url = _public_url(request, session, vendor)
 
-    try:
-        import qrcode  # pip install qrcode[pil]
-        img = qrcode.make(public_url)
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        return Response(buf.getvalue(), media_type="image/png", headers={"Cache-Control": "no-store"})
-    except Exception:
-        # Fallback sencillo (no cachea aquí, es un redirect al generador)
-        return RedirectResponse(
-            f"https://api.qrserver.com/v1/create-qr-code/?size=512x512&data={quote(public_url)}",
-            status_code=302
-        )
\ No newline at end of file
+    version = qr.version(public_url)
+    etag = f'"{version}-{size if fmt == "png" else "svg"}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=31536000, immutable" if v == version else "private, no-cache",
+    }
+    if download:
+        suffix = f"_{size}" if fmt == "png" else ""
+        headers["Content-Disposition"] = f'attachment; filename="mi_tienda_qr{suffix}.{fmt}"'
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    path = await qr.get_or_create(owner_id, public_url, fmt, size)
+    return FileResponse(path, media_type=qr.FORMATS[fmt], headers=headers)
@@ -1,6 +1,8 @@
 from sqlmodel import select, desc
 from fastapi import HTTPException
-from models import User, VendorBranding, DEFAULT_BRANDING_SETTINGS
+from models import VendorBranding, DEFAULT_BRANDING_SETTINGS
+from services import slug_cache, images
+from services.assets import asset
 from copy import deepcopy
 import re
 
@@ -17,20 +19,13 @@ def resolve_store(session, slug: str):
     """
     Fuente de verdad: busca primero por VendorBranding.slug; si no, por User.slug.
     Devuelve (user, branding) o 404.
+    La resolución slug -> ids se cachea entre requests (services/slug_cache.py);
+    aquí solo quedan lecturas por PK.
     """
-    branding = session.exec(
-        select(VendorBranding).where(VendorBranding.slug == slug)
-    ).first()
-    if branding:
-        user = session.exec(select(User).where(User.id == branding.owner_id)).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="Vendedor no encontrado")
-    else:
-        user = session.exec(select(User).where(User.slug == slug)).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="Vendedor no encontrado")
-        branding = get_branding_by_owner(session, user.id)
-    return user, branding
+    found = slug_cache.get_store_by_slug(session, slug)
+    if not found:
+        raise HTTPException(status_code=404, detail="Vendedor no encontrado")
+    return found
 
 def ensure_settings_dict(settings):
     base = deepcopy(DEFAULT_BRANDING_SETTINGS)
@@ -63,7 +58,7 @@ def build_theme(branding):
 
     # 1) tomar logo desde settings o atributo plano
 
-    logo_url = s.get("logo_url") or "/static/public/assets/img/default-store.svg"
+    logo_url = s.get("logo_url") or asset("public/assets/img/default-store.svg")
 
     return {
 
@@ -82,5 +77,20 @@ def build_theme(branding):
         # Medios
         "hero": s.get("hero_image_url", ""),
         "logo": logo_url,
+        # derivados WebP/JPEG del logo subido (services/images.py); None = solo el original
+        "logo_img": images.responsive(s.get("logo_url"), s.get("logo_variants")),
         
-    }
\ No newline at end of file
+    }
+
+def product_to_json(p):
+    """Representación pública de un producto (grilla de la tienda, búsqueda)."""
+    return {
+        "id": p.id,
+        "name": p.name,
+        "price": p.price,
+        "stock": p.stock,
+        "description": p.description,
+        "image_url": p.image_url or "/static/img/product_placeholder.png",
+        "image": images.responsive(p.image_url, getattr(p, "image_variants", None)),
+        "created_at": p.created_at,   # datetime: lo serializa FastJSONResponse
+    }
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Request, HTTPException, Depends
 from templates_engine import templates
 from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlmodel import Session, select
+from sqlmodel import Session
 from models import User
 from db import get_session
+from services import slug_cache
 import os
 from urllib.parse import quote
 
@@ -28,7 +29,7 @@ async def support_page(slug: str, request: Request, session: Session = Depends(g
     if "user_id" not in request.session:
         return RedirectResponse("/login", status_code=302)
 
-    vendor = session.exec(select(User).where(User.slug == slug)).first()
+    vendor = slug_cache.get_user_by_slug(session, slug)
     if not vendor or vendor.id != request.session["user_id"]:
         raise HTTPException(status_code=403, detail="No autorizado")
 
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Form
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse
+from utils.fastjson import FastJSONResponse
 from templates_engine import templates
 from sqlmodel import Session, select, delete
 from db import get_session
-from models import User, Product, PaymentReport, DispatchedOrder
+from models import User, Product, PaymentReport, DispatchedOrder, VendorCategoryCount, UploadManifest, VendorBranding
 from starlette.status import HTTP_302_FOUND
+from services import slug_cache, search, static_export, uploads, qr
 from sqlalchemy import or_, func
 
 router = APIRouter(prefix="/admin/users", tags=["Admin Users"])
@@ -133,11 +135,24 @@ def master_vendor_delete_do(user_id: int, request: Request, session: Session = D
     # 1) Eliminar dependencias en orden seguro (sin FK en cascada)
     session.exec(delete(DispatchedOrder).where(DispatchedOrder.owner_id == vendor.id))
     session.exec(delete(PaymentReport).where(PaymentReport.owner_id == vendor.id))
+    uploads.release_many(session, vendor.id, session.exec(
+        select(Product.image_url).where(Product.owner_id == vendor.id)
+    ).all())
+    # logo/hero del branding: mismas URLs que cuenta uploads.rebuild_manifest (una vez cada una)
+    for b in session.exec(select(VendorBranding).where(VendorBranding.owner_id == vendor.id)).all():
+        settings = b.settings if isinstance(b.settings, dict) else {}
+        uploads.release_many(session, vendor.id, {b.logo_url, settings.get("logo_url"), settings.get("hero_image_url")} - {None, ""})
     session.exec(delete(Product).where(Product.owner_id == vendor.id))
+    session.exec(delete(UploadManifest).where(UploadManifest.owner_id == vendor.id))
+    search.remove_owner(session, vendor.id)
+    session.exec(delete(VendorCategoryCount).where(VendorCategoryCount.owner_id == vendor.id))
 
     # 2) Eliminar usuario
     session.delete(vendor)
     session.commit()
+    slug_cache.invalidate_owner(user_id)
+    static_export.remove_owner(user_id)
+    qr.invalidate_owner(user_id)
 
     # 3) Redirigir a la lista de usuarios (master)
     return RedirectResponse("/admin/users", status_code=303)
@@ -148,4 +163,4 @@ def admin_users_count(request: Request, session: Session = Depends(get_session))
     _require_admin(request)
     total = session.exec(select(User)).all()
     act = len([u for u in total if u.is_active])
-    return JSONResponse({"total": len(total), "activos": act, "inactivos": len(total) - act})
+    return FastJSONResponse({"total": len(total), "activos": act, "inactivos": len(total) - act})
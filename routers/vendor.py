@@ -1,24 +1,32 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, File, UploadFile, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
+from utils.fastjson import FastJSONResponse
 from templates_engine import templates
 from sqlmodel import Session, select
 from db import get_session
 
 from models import User, Product, PaymentReport, VendorBranding, DEFAULT_BRANDING_SETTINGS, Order, OrderItem, Review
-from utils.reviews import compute_avg_rating
+from utils.reviews import apply_approval_change
+from utils.pagination import keyset_page, clamp_limit
 
 from typing import Optional
 from copy import deepcopy
 from datetime import datetime
-from routers.store_helpers import resolve_store, get_branding_by_owner, ensure_settings_dict, norm_instagram, norm_whatsapp, build_theme
-from storage_local import save_vendor_bytes
+from routers.store_helpers import resolve_store, get_branding_by_owner, ensure_settings_dict, norm_instagram, norm_whatsapp, build_theme, product_to_json
+from storage_local import LOGO_TYPES
+from services import store_cache, slug_cache, storefront, uploads, qr
+from services.facets import category_facets, normalize_category
 import re, unicodedata
+from urllib.parse import urlencode
 import logging
 
 log = logging.getLogger("uvicorn.error")  # usa el logger de Uvicorn
 
 router = APIRouter()
 
+# Productos que trae el HTML de la tienda; el resto se pide por cursor
+STORE_PAGE_SIZE = storefront.STORE_PAGE_SIZE
+
 # ---------------------------
 # Helpers de sesión/seguridad
 # ---------------------------
@@ -34,7 +42,7 @@ def _require_vendor_own(request: Request, session: Session, slug: str) -> Option
 
     if "user_id" not in request.session:
         raise HTTPException(status_code=401, detail="No autenticado")
-    vendor = session.exec(select(User).where(User.slug == slug)).first()
+    vendor = slug_cache.get_user_by_slug(session, slug)
     if not vendor or vendor.id != request.session["user_id"]:
         return None
     return vendor
@@ -72,42 +80,19 @@ async def vendor_home(
 
     """
     Vista de preview del vendor usando el mismo template público.
-    CHG:
-    - Ahora también carga reviews aprobadas,
-      el promedio y el conteo, igual que /u/{slug}.
+    Usa el mismo loader que /u/{slug} (services/storefront.py), sin cache:
+    el vendor ve siempre lo último.
     """
 
     owner_id = request.session.get("user_id")
     if not owner_id:
         raise HTTPException(status_code=401, detail="No autenticado")
-    
-    user = session.exec(select(User).where(User.id == owner_id)).first()
-    branding = get_branding_by_owner(session, owner_id)
-    products = session.exec(select(Product).where(Product.owner_id == owner_id)).all()
-    theme = build_theme(branding)
-
-    # CHG: reviews aprobadas del vendor (preview ve lo mismo que el público)
-    reviews = session.exec(
-        select(Review)
-        .where(Review.vendor_id == user.id)
-        .where(Review.is_approved == True)
-        .order_by(Review.created_at.desc())
-        .limit(20)
-    ).all()
 
-    avg_rating = compute_avg_rating(reviews)
-    reviews_count = len(reviews)
-
-    return templates.TemplateResponse("public/home.html", {
-        "request": request,
-        "branding": branding,
-        "vendor": user,
-        "products": products,
-        "theme": theme,
-        "reviews": reviews,               # CHG
-        "avg_rating": avg_rating,         # CHG
-        "reviews_count": reviews_count,   # CHG
-    })
+    sf = storefront.load_by_owner(session, owner_id)
+    if sf is None:
+        raise HTTPException(status_code=404, detail="Vendedor no encontrado")
+    storefront.load_body(session, sf)
+    return HTMLResponse(render_store_html(request, sf, slug=sf.user.slug))
 
 # ----------------
 # Dashboard admin
@@ -152,17 +137,52 @@ def vendor_dashboard(slug: str, request: Request, session: Session = Depends(get
 # --------------------------
 
 @router.get("/u/{slug}/products.json")
-def public_products_json(slug: str, session: Session = Depends(get_session)):
+def public_products_json(
+    slug: str,
+    request: Request,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None,
+    category: Optional[str] = None,
+    session: Session = Depends(get_session)):
+    """
+    Catálogo público del vendor, paginado por cursor (id descendente):
+      {"products": [...], "next_cursor": <id> | null, "facets": [...], "category": ...}
+    `?category=` filtra por categoría (usa el índice owner_id, category, id).
+    ETag derivado de catalog_version (+ cursor/limit/categoría): si el navegador ya tiene
+    esta versión se responde 304 sin consultar ni serializar productos.
+    """
     user, _ = resolve_store(session, slug)  # importa resolve_store desde store_helpers
-    rows = session.exec(select(Product).where(Product.owner_id == user.id)).all()
-    return [{
-        "id": p.id,
-        "name": p.name,
-        "price": p.price,
-        "stock": p.stock,
-        "image_url": p.image_url or "/static/img/product_placeholder.png",
-        "created_at": p.created_at.isoformat(),
-    } for p in rows]
+    limit = clamp_limit(limit)
+    category = normalize_category(category)
+    version = store_cache.get_catalog_version(session, user.id)
+    etag = store_cache.catalog_etag(user.id, version, "public", cursor, limit, category)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if store_cache.etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    payload = store_products_payload(session, user.id, cursor=cursor, limit=limit, category=category)
+    return FastJSONResponse(payload, headers=headers)
+
+
+def store_products_payload(
+    session: Session,
+    owner_id: int,
+    *,
+    cursor: Optional[int] = None,
+    limit: int = STORE_PAGE_SIZE,
+    category: Optional[str] = None,
+) -> dict:
+    """Cuerpo de /u/{slug}/products.json (también lo usa el export estático)."""
+    rows, next_cursor = keyset_page(
+        session, storefront.products_stmt(owner_id, category), Product.id,
+        cursor=cursor, limit=limit,
+    )
+    return {
+        "products": [product_to_json(p) for p in rows],
+        "next_cursor": next_cursor,
+        "facets": category_facets(session, owner_id),
+        "category": category,
+    }
 
 # -------------------------
 # ÚNICA ruta pública canónica
@@ -172,6 +192,7 @@ def public_products_json(slug: str, session: Session = Depends(get_session)):
 def public_store(
     slug: str, 
     request: Request, 
+    category: Optional[str] = None,
     session: Session = Depends(get_session)):
 
     """
@@ -182,44 +203,60 @@ def public_store(
     - products
     - reviews aprobadas
     - promedio de rating
+    El HTML se cachea por versión de la tienda (services/store_cache.py).
     """
 
-    # 1) Resolver vendor y branding a partir del slug público
-    user, branding = resolve_store(session, slug)
+    # 1) Cabecera en una consulta: vendor + branding + versión + rating (services/storefront.py).
+    #    Si el HTML de esta versión ya está en cache, no se consulta nada más.
+    sf = storefront.load_store(session, slug)
+    if sf is None:
+        raise HTTPException(status_code=404, detail="Vendedor no encontrado")
 
-     # 2) Productos del vendor
-    products = session.exec(
-        select(Product).where(Product.owner_id == user.id)
-        ).all()
-    
-    theme = build_theme(branding)
+    # 2) ?category= solo se respeta si existe (facetas de los conteos mantenidos):
+    #    así un ?category=<basura> no crea variantes en el cache.
+    facets = None
+    category = normalize_category(category)
+    if category:
+        facets = category_facets(session, sf.user.id)
+        if category not in {f["category"] for f in facets}:
+            category = None
 
-    # 3) Reviews aprobadas del vendor
-    reviews = session.exec(
-        select(Review)
-        .where(Review.vendor_id == user.id)
-        .where(Review.is_approved == True)
-        .order_by(Review.created_at.desc())
-        .limit(20)
-    ).all()
+    def render() -> bytes:
+        log.info(f"[public_store] render slug={slug} vendor_id={sf.user.id} version={sf.page_version}")
+        storefront.load_body(session, sf, category=category, facets=facets)
+        return render_store_html(request, sf, slug=slug, category=category)
 
-    avg_rating = compute_avg_rating(reviews)
-    reviews_count = len(reviews)
+    return store_cache.cached_page(request, sf.user.id, sf.page_version, render, variant=("store", category))
 
-    # LOG opcional para ver el conteo en consola
-    log.info(f"[public_store] slug={slug} vendor_id={user.id} reviews_count={reviews_count}")
 
+def render_store_html(
+    request: Request,
+    sf: "storefront.Storefront",
+    *,
+    slug: str,
+    category: Optional[str] = None,
+) -> bytes:
+    """
+    Renderiza public/home.html con un Storefront ya cargado (load_body).
+    Lo usan /u/{slug}, /vendor/home y el export estático (services/static_export.py).
+    """
+    user = sf.user
     return templates.TemplateResponse("public/home.html", {
         "request": request,
-        "branding": branding,
+        "branding": sf.branding,
         "vendor": user,
-        "products": products,
-        "theme": theme,
-        "reviews": reviews,
-        "avg_rating": avg_rating,
-        "reviews_count": reviews_count,
-        
-    })
+        "products": sf.products,
+        "next_cursor": sf.next_cursor,
+        "more_url": f"/u/{user.slug}/products.json" + (f"?{urlencode({'category': category})}" if category else ""),
+        "facets": sf.facets,
+        "active_category": category,
+        "store_url": f"/u/{slug}",
+        "theme": build_theme(sf.branding),
+        "reviews": sf.reviews,
+        "avg_rating": sf.rating.avg,
+        "reviews_count": sf.rating.count,
+        "rating_histogram": sf.rating.histogram,
+    }).body
 
 # --------------------------
 # Form "Editar mi página"
@@ -245,8 +282,11 @@ async def brand_form(
             settings=deepcopy(DEFAULT_BRANDING_SETTINGS),
         )
         session.add(branding)
+        store_cache.bump_store(session, owner_id)  # la tienda pública pasa a usar este branding
         session.commit()
         session.refresh(branding)
+        slug_cache.invalidate_owner(owner_id)
+        slug_cache.invalidate_slug(branding.slug)
         
 
     return templates.TemplateResponse("admin/brand_form.html", {
@@ -265,6 +305,7 @@ async def brand_save(
     session: Session = Depends(get_session),
     display_name: str = Form(...),
     logo: UploadFile | None = File(None),
+    logo_key: str | None = Form(None),       # subida directa al bucket (direct-upload.js)
 
     tagline: str | None = Form(None),        
     whatsapp: str | None = Form(None),       
@@ -299,10 +340,12 @@ async def brand_save(
     branding.updated_at = datetime.utcnow()
 
     # CHG: Si el usuario propuso cambiar el slug, lo normalizamos y garantizamos unicidad
+    slug_changed = False
     if slug is not None:
         wanted = _slugify(slug)  # limpia: minúsculas, ascii, guiones
         if wanted and wanted != branding.slug:
             branding.slug = _unique_slug(session, wanted)  # no colisiona con otros VendorBranding
+            slug_changed = True
 
     # CHG: Guardar tagline / whatsapp / instagram / location en settings
     #      (el HTML usa 'tagline', 'whatsapp', 'instagram', 'location')
@@ -317,19 +360,35 @@ async def brand_save(
         settings["location"] = location.strip()
 
     if logo and getattr(logo, "filename", ""):
-        content = await logo.read()
-        if not content:
-            raise HTTPException(status_code=400, detail="Logo vacío")
-        # Guarda en volumen y persiste la URL pública en settings.logo_url
-        public_url = save_vendor_bytes(branding.slug, content, logo.filename)
-        settings["logo_url"] = public_url
+        # Guarda en volumen (por bloques; 400/413/415) y persiste la URL pública en
+        # settings.logo_url. Derivados WebP/JPEG en el pool de procesos (429 si está saturado).
+        # Deduplicada por contenido: el logo anterior pierde una referencia.
+        old_logo = settings.get("logo_url")
+        settings["logo_url"], settings["logo_variants"] = await uploads.ingest_image(
+            session, owner_id, logo, allowed=LOGO_TYPES
+        )
+        uploads.release(session, owner_id, old_logo)
+    elif logo_key:
+        old_logo = settings.get("logo_url")
+        settings["logo_url"], settings["logo_variants"] = await uploads.ingest_key(
+            session, owner_id, logo_key, allowed=LOGO_TYPES
+        )
+        uploads.release(session, owner_id, old_logo)
     
     # CHG: Persistimos los settings actualizados
     branding.settings = settings
 
     session.add(branding); 
+    store_cache.bump_store(session, owner_id)  # invalida el HTML cacheado de /u/{slug}
     session.commit(); 
     session.refresh(branding)
+
+    # El slug pudo cambiar (o el branding ser nuevo): el viejo deja de resolver
+    # y el nuevo puede estar en el cache negativo.
+    slug_cache.invalidate_owner(owner_id)
+    slug_cache.invalidate_slug(branding.slug)
+    if slug_changed:
+        qr.invalidate_owner(owner_id)   # los QR apuntaban a la URL vieja
     
     return RedirectResponse("/vendor/brand?ok=1", status_code=302)
 
@@ -380,6 +439,7 @@ async def public_create_review(
         source="internal",
     )
     session.add(review)
+    apply_approval_change(session, review, was_approved=False)  # no-op mientras nazca sin aprobar
     session.commit()
 
     return RedirectResponse(f"/u/{slug}?review=ok", status_code=302)
@@ -432,8 +492,11 @@ def vendor_review_approve(
     if not review or review.vendor_id != vendor.id:
         raise HTTPException(status_code=404, detail="Review not found")
 
+    was_approved = review.is_approved
     review.is_approved = True
     session.add(review)
+    apply_approval_change(session, review, was_approved)
+    store_cache.bump_store(session, vendor.id)
     session.commit()
 
     return RedirectResponse(f"/admin/{slug}/reviews", status_code=302)
@@ -457,8 +520,11 @@ def vendor_review_hide(
     if not review or review.vendor_id != vendor.id:
         raise HTTPException(status_code=404, detail="Review not found")
 
+    was_approved = review.is_approved
     review.is_approved = False
     session.add(review)
+    apply_approval_change(session, review, was_approved)
+    store_cache.bump_store(session, vendor.id)
     session.commit()
 
     return RedirectResponse(f"/admin/{slug}/reviews", status_code=302)
\ No newline at end of file
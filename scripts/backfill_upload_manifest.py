@@ -0,0 +1,36 @@
+"""
+Puebla (o recalcula) upload_manifest desde las referencias en la DB y los archivos
+que existen en UPLOADS_DIR: una fila por vendor y archivo, con bytes (incluye
+derivados), tipo y sha256. Las subidas viejas (uuid) se hashean en esta pasada.
+Ajusta también upload_blobs.refcount. Ver services/uploads.py.
+
+Uso (desde la raíz del proyecto):
+  python3 -m scripts.backfill_upload_manifest              # todos los vendors
+  python3 -m scripts.backfill_upload_manifest --vendor 12  # solo uno
+"""
+
+import argparse
+
+from sqlmodel import SQLModel
+from db import engine, SessionLocal
+from models import UploadManifest  # noqa: F401  (asegura la tabla en el metadata)
+from services.uploads import rebuild_manifest, usage_summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula upload_manifest desde products/vendor_brandings.")
+    parser.add_argument("--vendor", type=int, default=None, help="ID del vendor (por defecto: todos)")
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine)  # por si la tabla aún no existe
+    with SessionLocal() as session:
+        n = rebuild_manifest(session, args.vendor)
+        session.commit()
+        if args.vendor is not None:
+            usage = usage_summary(session, args.vendor)
+            print(f"  vendor {args.vendor}: {usage['used_bytes'] / (1024 * 1024):.1f} MB usados")
+    print(f"OK: {n} archivo(s) en el manifest.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark de serialización JSON: payload tipo /admin/orders/list.json con 10k órdenes.
+
+Compara:
+- legacy:   iso_dt() por fila + jsonable_encoder + json.dumps (JSONResponse de FastAPI)
+- fastjson: datetimes crudos + utils.fastjson.dumps (orjson), como FastJSONResponse
+
+Antes de medir corre las rutas reales (list.json / dispatched.json) sobre filas reales
+de PaymentReport en una SQLite en memoria: las filas del benchmark son dicts y no
+detectan un atributo que falte en el modelo.
+
+Uso (desde la raíz del proyecto):
+  python3 -m scripts.bench_json
+  python3 -m scripts.bench_json --orders 50000 --runs 5
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+from starlette.requests import Request
+
+from models import DispatchedOrder, Order, OrderItem, PaymentReport, Product, User
+from routers.orders import admin_orders_dispatched_json, admin_orders_json
+from utils.fastjson import dumps
+from utils.helpers import iso_dt
+
+
+def build_orders(n: int, iso: bool):
+    rnd = random.Random(42)
+    base = datetime(2026, 1, 1)
+    out = []
+    for i in range(n):
+        created = base + timedelta(minutes=i)
+        out.append({
+            "id": i + 1,
+            "order_id": i + 1,
+            "items": [{
+                "product_id": rnd.randint(1, 500),
+                "product_name": f"Producto {rnd.randint(1, 500)}",
+                "qty": rnd.randint(1, 4),
+                "unit_price": round(rnd.uniform(1, 200), 2),
+            } for _ in range(rnd.randint(1, 3))],
+            "amount": round(rnd.uniform(5, 800), 2),
+            "payer_name": f"Cliente {i}",
+            "method": "zelle",
+            "reference": f"REF-{i:06d}",
+            "notes": "",
+            "created_at": iso_dt(created) if iso else created,
+        })
+    return out
+
+
+def legacy(n: int) -> bytes:
+    rows = build_orders(n, iso=True)
+    return json.dumps(jsonable_encoder(rows), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast(n: int) -> bytes:
+    return dumps(build_orders(n, iso=False))
+
+
+def check_routes() -> None:
+    """Llama a las rutas JSON de órdenes (sesión admin) con una orden pendiente y una despachada."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "session": {"admin_email": "bench@local"}})
+    with Session(engine) as session:
+        user = User(email="bench@local", password_hash="x", slug="bench")
+        session.add(user)
+        session.flush()
+        product = Product(owner_id=user.id, name="Producto", price=10.0)
+        session.add(product)
+        session.flush()
+        reports = []
+        for _ in range(2):
+            order = Order(total_amount=10.0)
+            session.add(order)
+            session.flush()
+            session.add(OrderItem(order_id=order.id, product_id=product.id, qty=1, unit_price=10.0))
+            pr = PaymentReport(order_id=order.id, payer_name="Cliente", method="zelle", reference="REF", amount=10.0)
+            session.add(pr)
+            session.flush()
+            reports.append(pr)
+        session.add(DispatchedOrder(payment_report_id=reports[1].id, owner_id=user.id))
+        session.commit()
+
+        pending = json.loads(admin_orders_json(request, session).body)
+        dispatched = json.loads(admin_orders_dispatched_json(request, session).body)
+    assert [o["id"] for o in pending] == [reports[0].id], pending
+    assert [o["id"] for o in dispatched] == [reports[1].id], dispatched
+    assert dispatched[0]["dispatched_at"], dispatched
+
+
+def timed(fn, n: int, runs: int):
+    best, body = float("inf"), b""
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        body = fn(n)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de serializar N órdenes: json+jsonable_encoder vs orjson.")
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    check_routes()
+    print("rutas list.json / dispatched.json: ok")
+
+    # armar las filas cuesta lo mismo en ambos caminos (salvo iso_dt): se descuenta
+    build_ms, _ = timed(lambda n: build_orders(n, iso=False), args.orders, args.runs)
+    legacy_ms, legacy_body = timed(legacy, args.orders, args.runs)
+    fast_ms, fast_body = timed(fast, args.orders, args.runs)
+    assert json.loads(legacy_body) == json.loads(fast_body), "las salidas difieren"
+
+    print(f"orders={args.orders} runs={args.runs} (mejor corrida; armado de filas {build_ms:.1f} ms descontado)")
+    print(f"  legacy    {legacy_ms - build_ms:8.1f} ms  {len(legacy_body) / 1024:8.0f} KiB")
+    print(f"  fastjson  {fast_ms - build_ms:8.1f} ms  {len(fast_body) / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
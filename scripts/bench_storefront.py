@@ -0,0 +1,104 @@
+"""
+Benchmark de la carga de /u/{slug}: cantidad de consultas SQL y tiempo,
+antes (consultas en serie, como estaba) y después (services/storefront.py).
+
+Uso (desde la raíz del proyecto, contra la DB de DATABASE_URL):
+  python3 -m scripts.bench_storefront                 # primer vendor
+  python3 -m scripts.bench_storefront --slug mi-tienda --runs 200
+
+Salida, p.ej.:
+  legacy (render)        7 consultas   1.84 ms
+  loader (render)        4 consultas   1.02 ms
+  loader (cache hit)     1 consultas   0.21 ms
+"""
+
+import argparse
+import time
+
+from sqlalchemy import event
+from sqlmodel import select, desc
+
+from db import engine, SessionLocal
+from models import User, VendorBranding, StoreVersion, Product, Review
+from services import slug_cache, storefront
+from services.facets import category_facets
+from utils.pagination import keyset_page
+from utils.reviews import rating_summary
+
+
+def legacy_load(session, slug):
+    """La secuencia anterior a services/storefront.py (una consulta tras otra)."""
+    branding = session.exec(select(VendorBranding).where(VendorBranding.slug == slug)).first()
+    if branding:
+        user = session.exec(select(User).where(User.id == branding.owner_id)).first()
+    else:
+        user = session.exec(select(User).where(User.slug == slug)).first()
+        branding = session.exec(
+            select(VendorBranding).where(VendorBranding.owner_id == user.id)
+            .order_by(desc(VendorBranding.updated_at), desc(VendorBranding.id))
+        ).first()
+    session.get(StoreVersion, user.id)
+    category_facets(session, user.id)
+    keyset_page(session, select(Product).where(Product.owner_id == user.id), Product.id, cursor=None, limit=24)
+    session.exec(
+        select(Review).where(Review.vendor_id == user.id).where(Review.is_approved == True)
+        .order_by(Review.created_at.desc()).limit(20)
+    ).all()
+    rating_summary(session, user.id)
+
+
+def loader_render(session, slug):
+    storefront.load_body(session, storefront.load_store(session, slug))
+
+
+def loader_hit(session, slug):
+    storefront.load_store(session, slug)
+
+
+def measure(fn, slug, runs):
+    count = [0]
+
+    def on_execute(*_):
+        count[0] += 1
+
+    # una pasada para medir consultas (con el slug ya en cache, como en régimen)
+    with SessionLocal() as session:
+        slug_cache.resolve_store_ref(session, slug)
+        event.listen(engine, "before_cursor_execute", on_execute)
+        try:
+            fn(session, slug)
+        finally:
+            event.remove(engine, "before_cursor_execute", on_execute)
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        with SessionLocal() as session:   # sesión nueva: sin identity map de la vuelta anterior
+            fn(session, slug)
+    return count[0], (time.perf_counter() - start) * 1000 / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas/tiempo de carga de /u/{slug}, antes y después.")
+    parser.add_argument("--slug", default=None, help="slug público (por defecto: el del primer vendor)")
+    parser.add_argument("--runs", type=int, default=100)
+    args = parser.parse_args()
+
+    slug = args.slug
+    if slug is None:
+        with SessionLocal() as session:
+            slug = session.exec(select(User.slug).where(User.role == "vendor").order_by(User.id)).first()
+    if not slug:
+        raise SystemExit("No hay vendors en la DB.")
+
+    print(f"slug={slug} runs={args.runs}")
+    for label, fn in (
+        ("legacy (render)", legacy_load),
+        ("loader (render)", loader_render),
+        ("loader (cache hit)", loader_hit),
+    ):
+        queries, ms = measure(fn, slug, args.runs)
+        print(f"  {label:<20} {queries:>3} consultas  {ms:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Calcula el hash de contenido de cada archivo de static/ y escribe asset-manifest.json
+(ruta lógica -> hash, mtime, tamaño). Con el manifest, asset() no tiene que leer
+ningún archivo al arrancar (services/assets.py); sin él funciona igual, calculando
+cada hash al primer uso.
+
+Uso (desde la raíz del proyecto, en el build/deploy; después de precompress_static):
+  python3 -m scripts.build_assets
+"""
+
+import json
+import os
+import time
+
+from services import assets
+
+
+def main():
+    t0 = time.perf_counter()
+    files = {}
+    for path in sorted(assets.STATIC_DIR.rglob("*")):
+        if not path.is_file() or path.suffix in (".gz", ".br", ".tmp"):
+            continue
+        rel = path.relative_to(assets.STATIC_DIR).as_posix()
+        st = path.stat()
+        digest = assets.file_digest(path)
+        files[rel] = {
+            "hash": digest,
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "url": f"{assets.STATIC_URL}/{assets.hashed_name(rel, digest)}",
+        }
+    tmp = assets.MANIFEST_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": 1, "files": files}, indent=1, sort_keys=True))
+    os.replace(tmp, assets.MANIFEST_PATH)
+    print(f"OK: {len(files)} archivo(s) en {(time.perf_counter() - t0) * 1000:.0f} ms -> {assets.MANIFEST_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Exporta a disco todas las tiendas (HTML de /u/{slug} + products.json) en
+<UPLOADS_DIR>/stores/, repartiendo los vendors en un pool de procesos.
+Útil para arrancar en caliente un deploy nuevo o reconstruir el volumen tras perderlo.
+Los archivos solo se sirven con STORE_STATIC_EXPORT=1 (ver services/static_export.py).
+
+Uso (desde la raíz del proyecto):
+  python3 -m scripts.export_stores                # todos los vendors
+  python3 -m scripts.export_stores --workers 8
+  python3 -m scripts.export_stores --vendor 12    # solo uno
+  python3 -m scripts.export_stores --clean        # borra el export previo antes
+"""
+
+import argparse
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlmodel import select
+from db import engine, SessionLocal
+from models import User
+from services import static_export
+
+
+def _init_worker():
+    # cada proceso abre sus propias conexiones (no reutiliza las heredadas del padre)
+    engine.dispose(close=False)
+
+
+def _export_one(owner_id: int):
+    with SessionLocal() as session:
+        return owner_id, static_export.export_store(session, owner_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta las tiendas públicas a UPLOADS_DIR/stores.")
+    parser.add_argument("--vendor", type=int, default=None, help="ID del vendor (por defecto: todos)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesos en paralelo")
+    parser.add_argument("--clean", action="store_true", help="borra UPLOADS_DIR/stores antes de exportar")
+    args = parser.parse_args()
+
+    if args.clean and args.vendor is None:
+        shutil.rmtree(static_export.EXPORT_DIR, ignore_errors=True)
+
+    if args.vendor is not None:
+        ids = [args.vendor]
+    else:
+        with SessionLocal() as session:
+            ids = list(session.exec(select(User.id).where(User.role == "vendor").order_by(User.id)).all())
+
+    ok = failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=_init_worker) as pool:
+        futures = {pool.submit(_export_one, owner_id): owner_id for owner_id in ids}
+        for fut, owner_id in futures.items():
+            try:
+                _, slugs = fut.result()
+                ok += 1
+                print(f"  {owner_id}: {', '.join(slugs) or '(sin slug público)'}")
+            except Exception as e:
+                failed += 1
+                print(f"  {owner_id}: ERROR {e}")
+    print(f"OK: {ok} tienda(s) exportadas, {failed} con error -> {static_export.EXPORT_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Borra de UPLOADS_DIR los archivos que ya no referencia ningún producto ni branding
+(ver services/upload_gc.py). Pensado para un cron: cada corrida revisa un tramo
+acotado y la siguiente continúa desde el cursor.
+
+Uso (desde la raíz del proyecto):
+  python3 -m scripts.gc_uploads --dry-run            # reporta sin borrar
+  python3 -m scripts.gc_uploads                      # hasta UPLOAD_GC_MAX_FILES archivos
+  python3 -m scripts.gc_uploads --max-files 0        # recorrido completo
+  python3 -m scripts.gc_uploads --grace-hours 72
+"""
+
+import argparse
+
+from db import SessionLocal
+from services import upload_gc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recolector de subidas huérfanas en UPLOADS_DIR.")
+    parser.add_argument("--dry-run", action="store_true", help="solo reporta (no borra ni mueve el cursor)")
+    parser.add_argument("--max-files", type=int, default=upload_gc.GC_MAX_FILES, help="archivos por corrida (0 = todos)")
+    parser.add_argument("--grace-hours", type=float, default=upload_gc.GC_GRACE_SECONDS / 3600,
+                        help="no borra archivos más nuevos que esto")
+    parser.add_argument("--verbose", "-v", action="store_true", help="lista cada archivo huérfano")
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        report = upload_gc.run_gc(
+            session,
+            dry_run=args.dry_run,
+            max_files=max(0, args.max_files),
+            grace_seconds=int(args.grace_hours * 3600),
+        )
+
+    if args.verbose or args.dry_run:
+        for rel in report.deleted:
+            print(f"  {'candidato' if args.dry_run else 'borrado'}: {rel}")
+    action = "se borrarían" if args.dry_run else "borrados"
+    print(
+        f"Revisados {report.scanned} archivo(s): {report.referenced} en uso, {report.too_new} recientes, "
+        f"{len(report.deleted)} huérfano(s) {action} ({report.bytes / (1024 * 1024):.1f} MB)."
+    )
+    print("Recorrido completo." if report.complete else f"Continúa desde: {report.cursor}")
+
+
+if __name__ == "__main__":
+    main()
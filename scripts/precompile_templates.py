@@ -0,0 +1,24 @@
+"""
+Precompila todas las plantillas Jinja y deja el bytecode en JINJA_CACHE_DIR.
+Pensado para el paso de build/deploy: los workers arrancan leyendo el cache
+en vez de compilar. Muestra el tiempo de cada plantilla.
+
+Uso (desde la raíz del proyecto):
+  python3 -m scripts.precompile_templates
+  JINJA_CACHE_DIR=/var/cache/stallio-jinja python3 -m scripts.precompile_templates
+"""
+
+from templates_engine import precompile_templates, JINJA_CACHE_DIR, JINJA_BYTECODE_CACHE
+
+
+def main():
+    timings = precompile_templates()
+    for name, ms in timings:
+        print(f"  {ms:8.1f} ms  {name}")
+    total = sum(ms for _, ms in timings)
+    dest = JINJA_CACHE_DIR if JINJA_BYTECODE_CACHE else "(cache de bytecode desactivado)"
+    print(f"OK: {len(timings)} plantilla(s), {total:.1f} ms -> {dest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Genera variantes precomprimidas (.gz y, si está instalado Brotli, .br) junto a cada
+archivo comprimible de static/. PrecompressedStaticFiles (services/compression.py)
+las sirve según Accept-Encoding, sin comprimir en cada request.
+
+Idempotente: solo regenera si el original es más nuevo que la variante. No escribe
+variantes que no ahorren al menos MIN_SAVING (fuentes ya comprimidas, etc.).
+
+Uso (desde la raíz del proyecto, en el build/deploy):
+  python3 -m scripts.precompress_static
+  python3 -m scripts.precompress_static --dir static --force
+  python3 -m scripts.precompress_static --clean      # borra todas las variantes
+"""
+
+import argparse
+import gzip
+import os
+from pathlib import Path
+
+from services.compression import brotli
+
+EXTENSIONS = {".css", ".js", ".mjs", ".map", ".svg", ".html", ".json", ".txt", ".xml", ".ico", ".ttf", ".eot", ".otf"}
+MIN_SIZE = 1024
+MIN_SAVING = 0.10   # la variante debe pesar al menos 10% menos que el original
+
+
+def _fresh(variant: Path, src: Path) -> bool:
+    return variant.exists() and variant.stat().st_mtime >= src.stat().st_mtime
+
+
+def _write(variant: Path, data: bytes, original_size: int, src: Path) -> bool:
+    if len(data) > original_size * (1 - MIN_SAVING):
+        variant.unlink(missing_ok=True)
+        return False
+    tmp = variant.with_name(variant.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, variant)
+    st = src.stat()
+    os.utime(variant, (st.st_atime, st.st_mtime))   # misma mtime que el original
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escribe .gz/.br al lado de los estáticos comprimibles.")
+    parser.add_argument("--dir", default="static")
+    parser.add_argument("--force", action="store_true", help="regenera aunque la variante esté al día")
+    parser.add_argument("--clean", action="store_true", help="borra las variantes .gz/.br y termina")
+    args = parser.parse_args()
+
+    root = Path(args.dir)
+    if args.clean:
+        n = 0
+        for ext in (".gz", ".br"):
+            for p in root.rglob(f"*{ext}"):
+                if p.with_suffix("").suffix.lower() in EXTENSIONS:
+                    p.unlink()
+                    n += 1
+        print(f"OK: {n} variante(s) borradas")
+        return
+
+    if brotli is None:
+        print("Aviso: Brotli no está instalado; solo se generan .gz")
+
+    files = written = 0
+    before = after = 0
+    for src in sorted(root.rglob("*")):
+        if not src.is_file() or src.suffix.lower() not in EXTENSIONS:
+            continue
+        size = src.stat().st_size
+        if size < MIN_SIZE:
+            continue
+        files += 1
+        data = None
+        best = size
+        for ext, compress in ((".gz", lambda b: gzip.compress(b, compresslevel=9, mtime=0)),
+                              (".br", (lambda b: brotli.compress(b, quality=11)) if brotli else None)):
+            if compress is None:
+                continue
+            variant = src.with_name(src.name + ext)
+            if not args.force and _fresh(variant, src):
+                best = min(best, variant.stat().st_size)
+                continue
+            data = data if data is not None else src.read_bytes()
+            out = compress(data)
+            if _write(variant, out, size, src):
+                written += 1
+                best = min(best, len(out))
+        before += size
+        after += best
+
+    saved = (1 - after / before) * 100 if before else 0
+    print(f"OK: {files} archivo(s), {written} variante(s) escritas; "
+          f"{before / 1e6:.1f} MB -> {after / 1e6:.1f} MB con la mejor variante ({saved:.0f}% menos)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Recalcula vendor_category_counts (facetas de categoría) desde la tabla `products`,
+contando solo productos activos. Útil para poblar la tabla la primera vez, tras
+cargas masivas o cambios de is_active / category hechos directo en la DB.
+
+Uso (desde la raíz del proyecto):
+  python3 -m scripts.rebuild_category_counts              # todos los vendors
+  python3 -m scripts.rebuild_category_counts --vendor 12  # solo uno
+"""
+
+import argparse
+
+from sqlmodel import SQLModel, select
+from db import engine, SessionLocal
+from models import Product, VendorCategoryCount
+from services import store_cache
+from services.facets import rebuild_category_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula vendor_category_counts desde products.")
+    parser.add_argument("--vendor", type=int, default=None, help="ID del vendor (por defecto: todos)")
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine)  # por si la tabla aún no existe
+    with SessionLocal() as session:
+        if args.vendor is not None:
+            owners = {args.vendor}
+        else:
+            owners = set(session.exec(select(VendorCategoryCount.owner_id).distinct()).all())
+            owners |= set(session.exec(select(Product.owner_id).distinct()).all())
+        n = rebuild_category_counts(session, args.vendor)
+        for owner_id in owners:
+            store_cache.bump_catalog(session, owner_id)   # las facetas van en el catálogo cacheado
+        session.commit()
+    print(f"OK: {n} categoría(s) recalculadas.")
+
+
+if __name__ == "__main__":
+    main()
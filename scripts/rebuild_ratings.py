@@ -0,0 +1,32 @@
+"""
+Recalcula vendor_rating_stats (promedio/conteo/histograma de reviews aprobadas)
+desde la tabla `review`. Útil tras cargas masivas, correcciones a mano en la DB
+o para poblar el agregado la primera vez.
+
+Uso (desde la raíz del proyecto):
+  python3 -m scripts.rebuild_ratings              # todos los vendors
+  python3 -m scripts.rebuild_ratings --vendor 12  # solo uno
+"""
+
+import argparse
+
+from sqlmodel import SQLModel
+from db import engine, SessionLocal
+from models import VendorRatingStats  # noqa: F401  (asegura la tabla en el metadata)
+from utils.reviews import rebuild_rating_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula vendor_rating_stats desde review.")
+    parser.add_argument("--vendor", type=int, default=None, help="ID del vendor (por defecto: todos)")
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine)  # por si la tabla aún no existe
+    with SessionLocal() as session:
+        n = rebuild_rating_stats(session, args.vendor)
+        session.commit()
+    print(f"OK: {n} vendor(s) recalculados.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Reconstruye el índice de búsqueda de productos desde la tabla `products`
+(ver services/search.py). Solo hace algo con SQLite + FTS5: en Postgres el índice
+es de expresión y se mantiene solo. Útil tras restaurar la DB, cargas masivas o
+escrituras que no pasaron por routers/products.py.
+
+Uso (desde la raíz del proyecto):
+  python3 -m scripts.rebuild_search_index
+"""
+
+from sqlalchemy import text
+
+from db import engine
+from services import search
+
+
+def main():
+    kind = search.backend()
+    if kind != "fts5":
+        print(f"Nada que hacer: el backend de búsqueda es '{kind}'.")
+        return
+    search.rebuild_search_index()
+    with engine.connect() as conn:
+        n = conn.execute(text("SELECT count(*) FROM products_fts")).scalar()
+    print(f"OK: {n} producto(s) indexados.")
+
+
+if __name__ == "__main__":
+    main()
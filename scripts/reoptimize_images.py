@@ -0,0 +1,139 @@
+"""
+Re-optimiza la biblioteca de imágenes existente (ver services/image_reoptimize.py):
+quita metadatos, re-encodea, genera derivados + placeholder y actualiza las referencias.
+
+Reanudable: después de cada lote confirmado guarda un checkpoint (fase + última URL);
+si se corta (deploy, Ctrl-C, OOM) la próxima corrida sigue desde ahí. Las imágenes ya
+optimizadas se saltean solas, así que correrlo de nuevo no repite trabajo.
+El pool corre con prioridad baja (nice) para no competir con el tráfico.
+
+Uso (desde la raíz del proyecto):
+  python3 -m scripts.reoptimize_images --dry-run          # estima el ahorro sin escribir
+  python3 -m scripts.reoptimize_images                    # todo, desde el checkpoint
+  python3 -m scripts.reoptimize_images --limit 5000       # un tramo (cron)
+  python3 -m scripts.reoptimize_images --workers 4 --batch 128
+  python3 -m scripts.reoptimize_images --restart          # ignora el checkpoint
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from db import engine, SessionLocal
+from services import image_reoptimize
+from storage_local import UPLOADS_DIR
+
+CHECKPOINT_FILE = Path(os.getenv("REOPT_CHECKPOINT", str(UPLOADS_DIR / ".reoptimize-checkpoint.json")))
+NICE = int(os.getenv("REOPT_NICE", "10"))
+
+
+def _init_worker():
+    # cada proceso abre sus propias conexiones (no reutiliza las heredadas del padre)
+    engine.dispose(close=False)
+    try:
+        os.nice(NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+def _read_checkpoint() -> dict:
+    try:
+        return json.loads(CHECKPOINT_FILE.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_checkpoint(state: dict) -> None:
+    tmp = CHECKPOINT_FILE.with_name(CHECKPOINT_FILE.name + ".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, CHECKPOINT_FILE)
+
+
+def _batches(state: dict, batch: int):
+    """
+    (urls, cursor tras el lote, {url: vendors con ese logo/hero}): primero logos/heroes,
+    después fotos de producto (sin vendors: apply_result solo toca products).
+    """
+    if state["phase"] == "brandings":
+        owners: dict = {}
+        with SessionLocal() as session:
+            for owner_id, url in image_reoptimize.branding_images(session):
+                if url > state["after"]:
+                    owners.setdefault(url, set()).add(owner_id)
+        urls = sorted(owners)
+        for i in range(0, len(urls), batch):
+            chunk = urls[i:i + batch]
+            yield chunk, chunk[-1], owners
+        state["phase"], state["after"] = "products", ""
+    while state["phase"] == "products":
+        with SessionLocal() as session:
+            urls, last = image_reoptimize.product_images(session, state["after"], batch)
+        if last is None:
+            state["phase"] = "done"
+            return
+        yield urls, last, {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-optimiza las imágenes subidas (reanudable).")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="procesos en paralelo")
+    parser.add_argument("--batch", type=int, default=64, help="imágenes por lote (una transacción por lote)")
+    parser.add_argument("--limit", type=int, default=0, help="corta tras procesar N imágenes (0 = todas)")
+    parser.add_argument("--dry-run", action="store_true", help="estima el ahorro sin escribir ni mover el checkpoint")
+    parser.add_argument("--restart", action="store_true", help="empieza de cero (ignora el checkpoint)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="una línea por imagen")
+    args = parser.parse_args()
+
+    state = {} if args.restart or args.dry_run else _read_checkpoint()
+    if state.get("phase") == "done":
+        print("El checkpoint indica que la pasada terminó. Usa --restart para empezar otra.")
+        return
+    state = {"phase": state.get("phase", "brandings"), "after": state.get("after", ""), "stats": state.get("stats", {})}
+    stats = state["stats"]
+    for k in ("ok", "skipped", "missing", "error", "refs", "bytes_before", "bytes_after"):
+        stats.setdefault(k, 0)
+
+    job = partial(image_reoptimize.reoptimize, dry_run=args.dry_run)
+    processed = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=_init_worker) as pool:
+        for urls, cursor, owners in _batches(state, max(1, args.batch)):
+            results = list(pool.map(job, urls))
+            if not args.dry_run:
+                with SessionLocal() as session:
+                    for res in results:
+                        if res["status"] == "ok":
+                            stats["refs"] += image_reoptimize.apply_result(session, res, owners.get(res["url"], ()))
+                    session.commit()   # referencias del lote: todas o ninguna
+            for res in results:
+                stats[res["status"]] += 1
+                if res["status"] == "ok":
+                    stats["bytes_before"] += res["old_size"]
+                    stats["bytes_after"] += res["size"]
+                if args.verbose or res["status"] == "error":
+                    detail = f"{res['old_size']} -> {res['size']} bytes" if res["status"] == "ok" else res.get("reason", "")
+                    print(f"  {res['status']}: {res['url']} {detail}")
+            state["after"] = cursor
+            if not args.dry_run:
+                _write_checkpoint(state)
+            processed += len(urls)
+            if args.limit and processed >= args.limit:
+                break
+        else:
+            if not args.dry_run:
+                _write_checkpoint(state)   # fase "done"
+
+    saved = stats["bytes_before"] - stats["bytes_after"]
+    print(
+        f"Optimizadas {stats['ok']} imagen(es) ({stats['refs']} referencia(s)), {stats['skipped']} salteadas, "
+        f"{stats['missing']} faltantes, {stats['error']} con error. "
+        f"{'Ahorro estimado' if args.dry_run else 'Ahorro'}: {saved / (1024 * 1024):.1f} MB."
+    )
+    if not args.dry_run:
+        print("Pasada completa." if state["phase"] == "done" else f"Continúa desde: {state['phase']} > {state['after']}")
+
+
+if __name__ == "__main__":
+    main()
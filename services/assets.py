@@ -0,0 +1,132 @@
+"""
+Estáticos con huella de contenido (fingerprint) y cache inmutable.
+
+- asset("admin/css/sb-admin-2.min.css") -> "/static/admin/css/sb-admin-2.min.<hash>.css"
+  (global de Jinja, ver templates_engine.py). El hash es del contenido: si el archivo
+  cambia, cambia la URL, así que el navegador puede guardarlo para siempre.
+- No se copian archivos: AssetStaticFiles (mount /static) quita el hash, sirve el
+  original (o su .br/.gz) y agrega Cache-Control inmutable si el hash coincide.
+- Los hashes se precalculan en el build (python3 -m scripts.build_assets ->
+  asset-manifest.json). Sin manifest se calculan al primer uso; en ambos casos se
+  validan contra (mtime, tamaño), así que nunca se emite un hash viejo.
+- is_immutable_upload(): los archivos de /uploads con nombre uuid/hash (logos, fotos
+  de producto) nunca cambian de contenido -> también inmutables (services/upload_files.py).
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+from services.compression import PrecompressedStaticFiles
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+STATIC_DIR = BASE_DIR / "static"
+STATIC_URL = "/static"
+MANIFEST_PATH = Path(os.getenv("ASSET_MANIFEST", str(BASE_DIR / "asset-manifest.json")))
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Estáticos sin hash (fuentes/imágenes referenciadas desde CSS): cache corto
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "86400"))
+
+HASH_LEN = 10
+_HASHED_RE = re.compile(r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[A-Za-z0-9]+)$" % HASH_LEN)
+# <uuid hex>.<ext> (storage_local), <uuid hex>-<ancho>.<ext> (services/images) o <hash>.<ext>
+_UPLOAD_IMMUTABLE_RE = re.compile(r"^[0-9a-f]{16,64}(-[0-9]{1,5})?(\.[A-Za-z0-9]+)?$")
+
+# ruta lógica -> (mtime_ns, tamaño, hash)
+_hashes: Dict[str, Tuple[int, int, str]] = {}
+_lock = threading.Lock()
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=HASH_LEN // 2)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hashed_name(rel: str, digest: str) -> str:
+    stem, dot, ext = rel.rpartition(".")
+    if not dot or "/" in ext:
+        return f"{rel}.{digest}"
+    return f"{stem}.{digest}.{ext}"
+
+
+def load_manifest() -> int:
+    """Carga asset-manifest.json en el cache de hashes (si existe). Devuelve cuántas entradas."""
+    try:
+        data = json.loads(MANIFEST_PATH.read_text())
+    except (FileNotFoundError, ValueError):
+        return 0
+    with _lock:
+        for rel, entry in data.get("files", {}).items():
+            _hashes[rel] = (entry["mtime_ns"], entry["size"], entry["hash"])
+    return len(data.get("files", {}))
+
+
+def current_digest(rel: str) -> Optional[str]:
+    """Hash vigente del archivo static/<rel> (None si no existe)."""
+    path = STATIC_DIR / rel
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    cached = _hashes.get(rel)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    digest = file_digest(path)
+    with _lock:
+        _hashes[rel] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+def asset(rel: str) -> str:
+    """URL con huella para static/<rel>; si el archivo no existe, la URL tal cual."""
+    rel = rel.lstrip("/")
+    if rel.startswith("static/"):
+        rel = rel[len("static/"):]
+    digest = current_digest(rel)
+    if digest is None:
+        return f"{STATIC_URL}/{rel}"
+    return f"{STATIC_URL}/{hashed_name(rel, digest)}"
+
+
+def unhash(rel: str) -> Optional[Tuple[str, str]]:
+    """'a/b.<hash>.css' -> ('a/b.css', hash) si tiene forma de ruta con huella."""
+    m = _HASHED_RE.match(rel)
+    if not m:
+        return None
+    return m.group("stem") + m.group("ext"), m.group("hash")
+
+def is_immutable_upload(name: str) -> bool:
+    """Nombre de subida que nunca cambia de contenido (uuid/hash, ver storage_local)."""
+    return bool(_UPLOAD_IMMUTABLE_RE.match(name))
+
+# ============ Mounts ============
+
+class AssetStaticFiles(PrecompressedStaticFiles):
+    """/static: resuelve rutas con huella al archivo original y las marca inmutables."""
+
+    async def get_response(self, path: str, scope):
+        original = unhash(path)
+        if original is not None and not (STATIC_DIR / path).is_file():
+            rel, digest = original
+            response = await super().get_response(rel, scope)
+            if digest == current_digest(rel):
+                response.headers["Cache-Control"] = IMMUTABLE
+                return response
+            # hash viejo (deploy nuevo): se sirve el contenido actual con cache corto
+        else:
+            response = await super().get_response(path, scope)
+        if STATIC_MAX_AGE and "cache-control" not in response.headers:
+            response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}"
+        return response
+
+
+load_manifest()
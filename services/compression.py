@@ -0,0 +1,214 @@
+"""
+Compresión de respuestas (brotli/gzip).
+
+- CompressionMiddleware: comprime al vuelo las respuestas dinámicas (HTML, JSON, texto)
+  de más de COMPRESSION_MIN_SIZE bytes. Usa brotli si el cliente lo acepta y el paquete
+  está instalado; si no, gzip. No toca respuestas ya codificadas (p.ej. los .br/.gz
+  de static/), imágenes, SSE ni WebSockets.
+- PrecompressedStaticFiles: StaticFiles que, si existe `archivo.br` / `archivo.gz`
+  al lado del original y el cliente lo acepta, sirve esa variante (sin CPU por request).
+  Las variantes se generan en el build: python3 -m scripts.precompress_static
+"""
+
+import os
+import re
+import stat
+import zlib
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli  # opcional (requirements.txt: Brotli)
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))   # al vuelo: rápido, no máximo
+
+_COMPRESSIBLE_RE = re.compile(
+    r"^(text/|application/(json|javascript|xml|rss\+xml|atom\+xml|manifest\+json)|image/svg\+xml)"
+)
+
+
+def is_compressible(content_type: str) -> bool:
+    """True si CompressionMiddleware comprime este tipo (necesita el body en mensajes)."""
+    return bool(_COMPRESSIBLE_RE.match(content_type or ""))
+
+
+def accepted_encodings(headers: Headers) -> set:
+    """Codificaciones aceptadas por el cliente (ignora las marcadas q=0)."""
+    out = set()
+    for part in headers.get("accept-encoding", "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            out.add(name.strip())
+    return out
+
+
+def add_vary(headers: MutableHeaders) -> None:
+    """Vary: Accept-Encoding (sin duplicarlo si el handler ya lo puso)."""
+    if "accept-encoding" not in headers.get("vary", "").lower():
+        headers.add_vary_header("Accept-Encoding")
+
+
+def pick_encoding(headers: Headers) -> Optional[str]:
+    accepted = accepted_encodings(headers)
+    if "br" in accepted and brotli is not None:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+# ============ Compresores (interfaz común: compress/flush) ============
+
+class _Gzip:
+    def __init__(self) -> None:
+        self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)   # wbits 31 = formato gzip
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self, final: bool) -> bytes:
+        return self._c.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _Brotli:
+    def __init__(self) -> None:
+        self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self, final: bool) -> bytes:
+        return self._c.finish() if final else self._c.flush()
+
+# ============ Middleware (respuestas dinámicas) ============
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = pick_encoding(Headers(scope=scope))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _Responder:
+    """Decide con el primer bloque del body; si la respuesta sigue en streaming, comprime por partes."""
+
+    def __init__(self, app, encoding: str, minimum_size: int) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.wrapped_send)
+
+    async def wrapped_send(self, message):
+        kind = message["type"]
+        if kind == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message.get("headers", []))
+            self.passthrough = (
+                "content-encoding" in headers
+                or not _COMPRESSIBLE_RE.match(headers.get("content-type", ""))
+                or headers.get("content-type", "").startswith("text/event-stream")
+                or message.get("status", 200) in (204, 304)
+            )
+            return
+
+        if kind != "http.response.body":
+            # zerocopysend / pathsend (services/upload_files.py): el body no pasa por acá,
+            # no hay nada que comprimir; el start retenido sale tal cual
+            if self.start_message is not None:
+                start, self.start_message = self.start_message, None
+                self.passthrough = True
+                await self.send(start)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                await self.send(start)
+                await self.send(message)
+                self.passthrough = True
+                return
+            self.compressor = _Brotli() if self.encoding == "br" else _Gzip()
+            headers = MutableHeaders(raw=start.setdefault("headers", []))
+            headers["Content-Encoding"] = self.encoding
+            add_vary(headers)
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"   # otra representación del mismo recurso
+            del headers["Content-Length"]
+            if not more_body:
+                data = self.compressor.compress(body) + self.compressor.flush(final=True)
+                headers["Content-Length"] = str(len(data))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": data})
+                return
+            await self.send(start)
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        data = self.compressor.compress(body) + self.compressor.flush(final=not more_body)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+# ============ Estáticos precomprimidos ============
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Sirve `x.br`/`x.gz` (si existen, están al día y el cliente los acepta) en lugar de `x`.
+    Una variante más vieja que `x` se ignora: AssetStaticFiles marca la respuesta como
+    inmutable con el hash del original, así que servirla dejaría el contenido viejo cacheado.
+    """
+
+    async def get_response(self, path: str, scope):
+        accepted = accepted_encodings(Headers(scope=scope)) if scope["method"] in ("GET", "HEAD") else ()
+        original = None
+        if "br" in accepted or "gzip" in accepted:
+            try:
+                _, original = await anyio.to_thread.run_sync(self.lookup_path, path)
+            except OSError:
+                original = None
+        if original is not None and stat.S_ISREG(original.st_mode):
+            for encoding, ext in (("br", ".br"), ("gzip", ".gz")):
+                if encoding not in accepted:
+                    continue
+                try:
+                    full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + ext)
+                except OSError:
+                    continue
+                if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                    continue
+                if stat_result.st_mtime < original.st_mtime:
+                    continue   # variante vieja (se editó x sin volver a correr precompress_static)
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["Content-Encoding"] = encoding
+                add_vary(response.headers)
+                return response
+        response = await super().get_response(path, scope)
+        add_vary(response.headers)
+        return response
@@ -0,0 +1,78 @@
+"""
+Facetas de categoría por vendor (tabla vendor_category_counts).
+
+- normalize_category(): limpia lo que escribe el vendor ("  Ropa  " -> "Ropa", "" -> None).
+- apply_category_change(): ajusta los conteos al crear/editar/borrar un producto.
+  Se llama ANTES del commit de la escritura (misma transacción).
+- category_facets(): lista [{"category", "count"}] leyendo solo la tabla de conteos.
+- rebuild_category_counts(): recalcula desde products (poblar/reparar):
+  python3 -m scripts.rebuild_category_counts
+
+Solo cuentan los productos activos, igual que la grilla de la tienda
+(services/storefront.py): así cada número coincide con lo que se lista. Un cambio de
+is_active hecho fuera de routers/products.py requiere recalcular.
+"""
+
+from typing import Dict, List, Optional
+
+from sqlalchemy import update, delete, func
+from sqlmodel import Session, select
+
+from models import Product, VendorCategoryCount
+
+MAX_CATEGORY_LEN = 120
+
+
+def normalize_category(value: Optional[str]) -> Optional[str]:
+    value = " ".join((value or "").split())
+    return value[:MAX_CATEGORY_LEN] or None
+
+
+def _add(session: Session, owner_id: int, category: str, delta: int) -> None:
+    res = session.exec(
+        update(VendorCategoryCount)
+        .where(VendorCategoryCount.owner_id == owner_id)
+        .where(VendorCategoryCount.category == category)
+        .values(count=VendorCategoryCount.count + delta)
+    )
+    if not res.rowcount and delta > 0:
+        session.add(VendorCategoryCount(owner_id=owner_id, category=category, count=delta))
+
+
+def apply_category_change(session: Session, owner_id: int, old: Optional[str], new: Optional[str]) -> None:
+    """old=None en altas, new=None en bajas. NO hace commit."""
+    if old == new:
+        return
+    if old:
+        _add(session, owner_id, old, -1)
+    if new:
+        _add(session, owner_id, new, +1)
+
+
+def category_facets(session: Session, owner_id: int) -> List[Dict]:
+    rows = session.exec(
+        select(VendorCategoryCount.category, VendorCategoryCount.count)
+        .where(VendorCategoryCount.owner_id == owner_id)
+        .where(VendorCategoryCount.count > 0)
+        .order_by(VendorCategoryCount.category)
+    ).all()
+    return [{"category": c, "count": n} for c, n in rows]
+
+
+def rebuild_category_counts(session: Session, owner_id: Optional[int] = None) -> int:
+    """Recalcula los conteos desde products (de un vendor o de todos). NO hace commit."""
+    wipe = delete(VendorCategoryCount)
+    q = (
+        select(Product.owner_id, Product.category, func.count())
+        .where(Product.category.is_not(None))
+        .where(Product.is_active == True)
+        .group_by(Product.owner_id, Product.category)
+    )
+    if owner_id is not None:
+        wipe = wipe.where(VendorCategoryCount.owner_id == owner_id)
+        q = q.where(Product.owner_id == owner_id)
+    session.exec(wipe)
+    rows = session.exec(q).all()
+    for oid, category, n in rows:
+        session.add(VendorCategoryCount(owner_id=oid, category=category, count=n))
+    return len(rows)
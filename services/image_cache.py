@@ -0,0 +1,169 @@
+"""
+Cache en disco de imágenes redimensionadas bajo demanda (/img/{w}x{h}/{path}).
+
+- Clave: tamaño + formato + clave del original + su versión (local: mtime y tamaño;
+  S3: ETag). Si el original se reemplaza, la clave cambia y la entrada vieja termina expulsada por LRU.
+- Tope de bytes (IMAGE_CACHE_MAX_BYTES) con expulsión LRU. El orden vive en memoria
+  (OrderedDict) y se persiste en el mtime de cada archivo (se "toca" en los hits, como
+  mucho una vez por TOUCH_INTERVAL), así al reiniciar se reconstruye desde el disco.
+- Coalescing: si N requests piden la misma variante en frío, una sola la genera y el
+  resto espera ese resultado (por proceso; entre workers, a lo sumo una por worker y
+  la escritura es atómica).
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from storage_local import UPLOADS_DIR
+
+log = logging.getLogger("uvicorn.error")
+
+# oculto dentro del volumen de subidas: no lo sirve /uploads ni lo recorre el GC, y no es
+# una ruta fija en /tmp que otro usuario pueda crear antes (y llenar de bytes "inmutables")
+IMAGE_CACHE_DIR = Path(os.getenv("IMAGE_CACHE_DIR", str(UPLOADS_DIR / ".img-cache")))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+TOUCH_INTERVAL = 60.0
+
+# nombre de archivo -> tamaño en bytes (orden = LRU: el primero es el más viejo)
+_index: "OrderedDict[str, int]" = OrderedDict()
+_total = 0
+_loaded = False
+_lock = threading.Lock()
+
+_inflight: Dict[str, "asyncio.Future[Path]"] = {}
+
+
+def cache_key(key: str, version: str, width: int, height: int, fmt: str) -> str:
+    raw = f"{width}x{height}|{fmt}|{key}|{version}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest() + "." + fmt
+
+def _path_for(name: str) -> Path:
+    return IMAGE_CACHE_DIR / name[:2] / name
+
+# ============ Índice LRU ============
+
+def _load_index() -> None:
+    """Reconstruye el índice desde el disco (orden por mtime) la primera vez."""
+    global _total, _loaded
+    entries = []
+    if IMAGE_CACHE_DIR.is_dir():
+        for sub in IMAGE_CACHE_DIR.iterdir():
+            if not sub.is_dir():
+                continue
+            for f in sub.iterdir():
+                if f.name.startswith("."):
+                    continue
+                try:
+                    st = f.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, f.name, st.st_size))
+    entries.sort()
+    _index.clear()
+    for _, name, size in entries:
+        _index[name] = size
+    _total = sum(size for _, _, size in entries)
+    _loaded = True
+
+def _ensure_loaded() -> None:
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                _load_index()
+
+def lookup(name: str) -> Optional[Path]:
+    """Entrada del cache si existe (y la marca como recién usada)."""
+    _ensure_loaded()
+    path = _path_for(name)
+    try:
+        st = path.stat()
+    except OSError:
+        with _lock:
+            _forget(name)
+        return None
+    with _lock:
+        if name in _index:
+            _index.move_to_end(name)
+        else:   # la escribió otro worker
+            _add(name, st.st_size)
+    if time.time() - st.st_mtime > TOUCH_INTERVAL:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    return path
+
+def _forget(name: str) -> None:
+    global _total
+    size = _index.pop(name, None)
+    if size is not None:
+        _total -= size
+
+def _add(name: str, size: int) -> None:
+    global _total
+    _forget(name)
+    _index[name] = size
+    _total += size
+
+def _evict() -> None:
+    """Borra las entradas menos usadas hasta quedar bajo el tope."""
+    global _total
+    while _total > IMAGE_CACHE_MAX_BYTES and len(_index) > 1:
+        name, size = _index.popitem(last=False)
+        _total -= size
+        _path_for(name).unlink(missing_ok=True)
+
+def store(name: str, content: bytes) -> Path:
+    _ensure_loaded()
+    dest = _path_for(name)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, dest)
+    with _lock:
+        _add(name, len(content))
+        _evict()
+    return dest
+
+def stats() -> dict:
+    _ensure_loaded()
+    return {"entries": len(_index), "bytes": _total, "max_bytes": IMAGE_CACHE_MAX_BYTES}
+
+# ============ Coalescing ============
+
+async def get_or_create(name: str, produce: Callable[[], Awaitable[bytes]]) -> Path:
+    """
+    Devuelve la ruta en cache de `name`; si no existe la genera con `await produce()`
+    (services/image_pool). Requests concurrentes por la misma clave comparten la generación.
+    """
+    hit = await run_in_threadpool(lookup, name)
+    if hit is not None:
+        return hit
+    pending = _inflight.get(name)
+    if pending is not None:
+        return await asyncio.shield(pending)
+    future = asyncio.get_running_loop().create_future()
+    _inflight[name] = future
+    try:
+        content = await produce()
+        path = await run_in_threadpool(store, name, content)
+        future.set_result(path)
+        return path
+    except BaseException as exc:
+        if isinstance(exc, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(exc)
+            future.exception()   # marcada como leída si nadie más esperaba
+        raise
+    finally:
+        _inflight.pop(name, None)
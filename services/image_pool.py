@@ -0,0 +1,156 @@
+"""
+Pool de procesos para el trabajo de imágenes (decodificar, redimensionar, re-encodear).
+
+Pillow ocupa CPU y retiene el GIL en buena parte del trabajo: hecho dentro del event
+loop (o del threadpool) una subida grande congela las demás requests del worker.
+Aquí cada job corre en otro proceso y el event loop solo espera el resultado.
+
+- IMAGE_WORKERS procesos (0 = sin pool: threadpool, útil en desarrollo/tests).
+- Cola acotada: como mucho IMAGE_QUEUE_MAX jobs en vuelo (corriendo + esperando).
+  Si está llena, run() lanza ImagePoolSaturated -> HTTP 429 con Retry-After, en vez de
+  encolar sin límite y que las subidas de un vendor frenen a todos.
+- Métricas por proceso: profundidad de cola, rechazos y tiempos por job
+  (GET /debug/image-pool).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+log = logging.getLogger("uvicorn.error")
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(min(2, os.cpu_count() or 1))))
+IMAGE_QUEUE_MAX = int(os.getenv("IMAGE_QUEUE_MAX", str(max(1, IMAGE_WORKERS) * 4)))
+RETRY_AFTER = int(os.getenv("IMAGE_RETRY_AFTER", "5"))
+
+
+class ImagePoolSaturated(HTTPException):
+    """Cola de imágenes llena: el cliente debe reintentar más tarde."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=429,
+            detail="Procesando demasiadas imágenes, intenta de nuevo en unos segundos",
+            headers={"Retry-After": str(RETRY_AFTER)},
+        )
+
+# ============ Métricas ============
+
+class _Metrics:
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self.recent = deque(maxlen=200)   # (job, ms) de los últimos jobs
+
+    def snapshot(self) -> Dict[str, Any]:
+        times = sorted(ms for _, ms in self.recent)
+
+        def pct(p: float) -> Optional[float]:
+            return round(times[min(len(times) - 1, int(len(times) * p))], 1) if times else None
+
+        by_job: Dict[str, list] = {}
+        for job, ms in self.recent:
+            by_job.setdefault(job, []).append(ms)
+        return {
+            "workers": IMAGE_WORKERS,
+            "queue_max": IMAGE_QUEUE_MAX,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_ms / self.completed, 1) if self.completed else None,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "recent_by_job": {
+                job: {"count": len(v), "avg_ms": round(sum(v) / len(v), 1), "max_ms": round(max(v), 1)}
+                for job, v in by_job.items()
+            },
+        }
+
+
+_metrics = _Metrics()
+
+def metrics() -> Dict[str, Any]:
+    return _metrics.snapshot()
+
+# ============ Pool ============
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: el proceso web tiene hilos (threadpool, export estático) y conexiones
+            # abiertas; un fork los copiaría a medias.
+            _pool = ProcessPoolExecutor(
+                max_workers=IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def shutdown() -> None:
+    """Cierra los procesos del pool (lifespan de la app)."""
+    _reset_pool()
+
+async def run(fn: Callable, *args) -> Any:
+    """
+    Ejecuta fn(*args) en el pool y espera el resultado sin bloquear el event loop.
+    `fn` y los argumentos deben ser serializables (funciones de módulo, bytes, str...).
+    Lanza ImagePoolSaturated si ya hay IMAGE_QUEUE_MAX jobs en vuelo.
+    """
+    m = _metrics
+    if m.in_flight >= IMAGE_QUEUE_MAX:
+        m.rejected += 1
+        log.warning(f"[image_pool] cola llena ({m.in_flight}/{IMAGE_QUEUE_MAX}), rechazo {fn.__name__}")
+        raise ImagePoolSaturated()
+    m.in_flight += 1
+    m.max_in_flight = max(m.max_in_flight, m.in_flight)
+    m.submitted += 1
+    started = time.perf_counter()
+    try:
+        if IMAGE_WORKERS <= 0:
+            result = await run_in_threadpool(fn, *args)
+        else:
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(_get_pool(), fn, *args)
+            except BrokenProcessPool:
+                # un worker murió (OOM con una imagen enorme): se recrea el pool para los próximos
+                _reset_pool()
+                raise
+    except BaseException:
+        m.failed += 1
+        raise
+    else:
+        ms = (time.perf_counter() - started) * 1000
+        m.completed += 1
+        m.total_ms += ms
+        m.recent.append((fn.__name__, ms))
+        return result
+    finally:
+        m.in_flight -= 1
@@ -0,0 +1,221 @@
+"""
+Re-optimización de las imágenes ya subidas (fotos de producto, logos, heroes).
+
+Pensado para la biblioteca vieja: PNG sin optimizar, JPEG a tamaño completo con EXIF,
+uuid por vendor, /static/uploads (legacy/). Por cada imagen referenciada:
+
+1. reoptimize() (job de un pool de procesos, sin DB):
+   - aplica la orientación EXIF y quita metadatos (EXIF/XMP/comentarios; se conserva
+     el perfil ICC para no cambiar colores);
+   - re-encodea: PNG/GIF estático -> PNG optimizado (sin pérdida); JPEG y WebP -> a la
+     calidad objetivo (REOPT_JPEG_QUALITY / REOPT_WEBP_QUALITY);
+   - se queda con el resultado solo si pesa menos o si el original tenía metadatos;
+     si no, conserva los bytes originales;
+   - guarda el resultado direccionado por contenido (cas/<ab>/<sha256>.<ext>) con sus
+     derivados, tamaño intrínseco y placeholder (services/images.make_variants).
+2. apply_result() (proceso principal, una transacción por lote): cambia las URLs en
+   products / vendor_brandings, suma referencias al blob nuevo y suelta las del viejo
+   (services/uploads: el archivo viejo se borra después del commit si nadie más lo usa).
+
+Los derivados llevan "optimized": REOPT_VERSION: una imagen ya procesada no se vuelve a
+procesar (volver a correr el job es barato). Los archivos viejos que no son cas/ quedan
+para el GC (scripts/gc_uploads). Orquestación y checkpoint: scripts/reoptimize_images.py.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from PIL import Image, ImageOps
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from models import Product, VendorBranding, UploadBlob
+from services import images, store_cache, uploads
+from storage import get_storage
+from storage_local import cas_rel, sniff_ext
+
+log = logging.getLogger("uvicorn.error")
+
+REOPT_VERSION = 1   # subir para forzar otra pasada sobre todo (p.ej. cambia la calidad)
+REOPT_JPEG_QUALITY = int(os.getenv("REOPT_JPEG_QUALITY", "85"))
+REOPT_WEBP_QUALITY = int(os.getenv("REOPT_WEBP_QUALITY", "82"))
+
+_METADATA_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "comment", "photoshop")
+
+
+def is_optimized(variants: Optional[dict]) -> bool:
+    return bool(variants) and variants.get("optimized", 0) >= REOPT_VERSION
+
+# ============ Job (pool) ============
+
+def _reencode(path: Path) -> Optional[Tuple[bytes, str, bool]]:
+    """(bytes, extensión, tenía metadatos) o None si no es una imagen rasterizada estática."""
+    with Image.open(path) as src:
+        if src.format not in ("PNG", "JPEG", "WEBP", "GIF") or getattr(src, "is_animated", False):
+            return None
+        had_metadata = any(k in src.info for k in _METADATA_KEYS) or len(src.getexif()) > 0
+        icc = src.info.get("icc_profile")
+        fmt = src.format
+        img = ImageOps.exif_transpose(src)   # la orientación queda en los píxeles
+        buf = BytesIO()
+        if fmt in ("PNG", "GIF"):
+            if img.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+                img = img.convert("RGBA")
+            img.save(buf, "PNG", optimize=True, icc_profile=icc)
+            ext = ".png"
+        elif fmt == "JPEG":
+            if img.mode not in ("L", "RGB", "CMYK"):
+                img = img.convert("RGB")
+            img.save(buf, "JPEG", quality=REOPT_JPEG_QUALITY, optimize=True, progressive=True, icc_profile=icc)
+            ext = ".jpg"
+        else:
+            img.save(buf, "WEBP", quality=REOPT_WEBP_QUALITY, method=6, icc_profile=icc)
+            ext = ".webp"
+    return buf.getvalue(), ext, had_metadata
+
+def reoptimize(url: str, dry_run: bool = False) -> Dict:
+    """
+    (Job del pool) Re-optimiza la imagen de `url` y la deja en cas/ con sus derivados.
+    Devuelve {"url", "status": ok|skipped|missing|error, ...}; con ok: "new_url", "digest",
+    "ext", "size", "old_size", "variants". dry_run: calcula sin escribir nada.
+    """
+    backend = get_storage()
+    key = backend.key_for_url(url)
+    if key is None:
+        return {"url": url, "status": "skipped", "reason": "URL externa"}
+    try:
+        with backend.local_copy(key) as src, tempfile.TemporaryDirectory(prefix="stallio-reopt-") as tmp:
+            original = src.read_bytes()
+            encoded = _reencode(src)
+            if encoded is None:
+                return {"url": url, "status": "skipped", "reason": "no es una imagen estática"}
+            content, ext, had_metadata = encoded
+            if len(content) >= len(original) and not had_metadata:
+                content, ext = original, sniff_ext(original[:512]) or ext   # ya estaba bien
+            digest = hashlib.sha256(content).hexdigest()
+            new_key = cas_rel(digest, ext).as_posix()
+            out = Path(tmp) / f"{digest}{ext}"
+            out.write_bytes(content)
+            variants = images.make_variants(out)
+            if variants is None:
+                return {"url": url, "status": "skipped", "reason": "no se pudieron generar derivados"}
+            variants["optimized"] = REOPT_VERSION
+            if not dry_run:
+                if not backend.exists(new_key):
+                    backend.put(new_key, out, mimetypes.guess_type(new_key)[0])
+                for vkey in images.variant_keys(new_key, variants):
+                    vpath = out.with_name(vkey.rpartition("/")[2])
+                    backend.put(vkey, vpath, mimetypes.guess_type(vkey)[0])
+    except FileNotFoundError:
+        return {"url": url, "status": "missing"}
+    except Exception as exc:
+        log.exception(f"[reoptimize] {url}")
+        return {"url": url, "status": "error", "reason": str(exc)}
+    return {
+        "url": url,
+        "status": "ok",
+        "new_url": backend.url(new_key),
+        "digest": digest,
+        "ext": ext,
+        "size": len(content),
+        "old_size": len(original),
+        "variants": variants,
+    }
+
+# ============ Recorrido ============
+
+def branding_images(session: Session) -> List[Tuple[int, str]]:
+    """(owner_id, url) de logos y heroes sin optimizar (una o dos por vendor), ordenados por URL."""
+    pairs: Set[Tuple[int, str]] = set()
+    rows = session.exec(select(VendorBranding.owner_id, VendorBranding.logo_url, VendorBranding.settings)).all()
+    for owner_id, logo_url, settings in rows:
+        settings = settings if isinstance(settings, dict) else {}
+        if not is_optimized(settings.get("logo_variants")):
+            pairs.update((owner_id, u) for u in (logo_url, settings.get("logo_url")) if u)
+        hero = settings.get("hero_image_url")
+        if hero:
+            blob = session.get(UploadBlob, uploads.digest_of(hero) or "")
+            if blob is None or not is_optimized(blob.variants):   # el hero no guarda derivados
+                pairs.add((owner_id, hero))
+    return sorted(pairs, key=lambda p: (p[1], p[0]))
+
+def product_images(session: Session, after: str, limit: int) -> Tuple[List[str], Optional[str]]:
+    """
+    Hasta `limit` URLs de fotos de producto sin optimizar, en orden, posteriores a `after`
+    (keyset sobre ix_products_image_url). Devuelve (urls, último valor visto o None si terminó).
+    """
+    rows = session.exec(
+        select(Product.image_url, Product.image_variants)
+        .where(Product.image_url.is_not(None))
+        .where(Product.image_url > after)
+        .order_by(Product.image_url)
+        .limit(limit * 4)   # hay repetidas (misma foto en varios productos) y ya optimizadas
+    ).all()
+    if not rows:
+        return [], None
+    urls: List[str] = []
+    last = None
+    for url, variants in rows:
+        if url != last:
+            if len(urls) >= limit:
+                break
+            if not is_optimized(variants):
+                urls.append(url)
+        last = url
+    return urls, last
+
+# ============ Referencias ============
+
+def apply_result(session: Session, res: Dict, branding_owners: Iterable[int] = ()) -> int:
+    """
+    Apunta las referencias de res["url"] a la versión optimizada (sin commit).
+    Productos: por ix_products_image_url. branding_owners: vendors cuyo logo/hero es
+    res["url"] (fase de logos, ver branding_images); solo se cargan esas filas.
+    Devuelve cuántas filas cambió.
+    """
+    old_url, new_url, variants = res["url"], res["new_url"], res["variants"]
+    # corre con la app en vivo: los contadores van por los UPDATE atómicos de services/uploads
+    blob = UploadBlob(digest=res["digest"], ext=res["ext"], size=res["size"], variants=variants, refcount=0)
+    session.exec(update(UploadBlob).where(UploadBlob.digest == blob.digest).values(variants=variants))
+
+    def swap(owner_id: int) -> None:
+        if new_url != old_url:
+            uploads.ref_blob(session, blob)
+            uploads.add_ref(session, owner_id, new_url, variants=variants, digest=blob.digest)
+            uploads.release(session, owner_id, old_url)
+
+    changed = 0
+    for p in session.exec(select(Product).where(Product.image_url == old_url)).all():
+        swap(p.owner_id)
+        p.image_url, p.image_variants = new_url, variants
+        session.add(p)
+        store_cache.bump_catalog(session, p.owner_id)
+        changed += 1
+
+    owners = list(set(branding_owners))
+    brandings = session.exec(select(VendorBranding).where(VendorBranding.owner_id.in_(owners))).all() if owners else []
+    for b in brandings:
+        settings = dict(b.settings) if isinstance(b.settings, dict) else {}
+        touched = False
+        if settings.get("logo_url") == old_url or b.logo_url == old_url:
+            swap(b.owner_id)
+            settings["logo_url"], settings["logo_variants"] = new_url, variants
+            if b.logo_url == old_url:
+                b.logo_url = new_url
+            touched = True
+        if settings.get("hero_image_url") == old_url:
+            swap(b.owner_id)
+            settings["hero_image_url"] = new_url
+            touched = True
+        if touched:
+            b.settings = settings
+            session.add(b)
+            store_cache.bump_store(session, b.owner_id)
+            changed += 1
+    return changed
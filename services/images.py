@@ -0,0 +1,246 @@
+"""
+Derivados redimensionados de las imágenes subidas (fotos de producto y logos).
+
+Al guardar un original se generan, al lado y con el mismo nombre (sha256 en las
+subidas por contenido, uuid en las viejas):
+  cas/ab/<sha256>.png            original (sin tocar)
+  cas/ab/<sha256>-320.webp       cas/ab/<sha256>-320.jpg
+  cas/ab/<sha256>-640.webp       ...
+  cas/ab/<sha256>-1280.webp
+
+- Anchos fijos VARIANT_WIDTHS; nunca se agranda: si el original es más angosto, el
+  mayor derivado queda con el ancho original.
+- WebP + JPEG de fallback (<picture>). AVIF opcional (IMAGE_AVIF=1) si el Pillow
+  instalado lo soporta.
+- Lo generado ({"widths": [...], "formats": [...]}) se guarda junto a la URL
+  (Product.image_variants, settings["logo_variants"]), así las plantillas arman el
+  srcset sin tocar el disco. Incluye también el tamaño intrínseco ("width", "height")
+  y un placeholder ("lqip": WebP de LQIP_WIDTH px en data: URL, ~200 bytes) para
+  reservar el espacio y pintar algo antes de que llegue la imagen. Sin variantes (SVG, GIF animado, archivo inválido o
+  subidas anteriores) se usa el original tal cual.
+- Todo esto corre en el pool de procesos (services/image_pool.py), no en el event loop.
+- Tamaños bajo demanda: /img/{w}x{h}/{path} (routers/img.py) redimensiona cualquier
+  subida con render_resized() y la guarda en services/image_cache.py. Solo se aceptan
+  los tamaños de RESIZE_SIZES (evita que se llene el cache con tamaños arbitrarios).
+- Con un backend remoto (storage.py, STORAGE_BACKEND=s3) el original se descarga a un
+  temporal, se procesa igual y los derivados se suben con la misma clave + sufijo.
+"""
+
+import base64
+import logging
+import os
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from PIL import Image, ImageOps, features
+
+from storage import get_storage
+
+log = logging.getLogger("uvicorn.error")
+
+VARIANT_WIDTHS = (320, 640, 1280)
+WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "82"))
+AVIF_QUALITY = int(os.getenv("IMAGE_AVIF_QUALITY", "60"))
+LQIP_WIDTH = 16
+LQIP_QUALITY = 30
+
+IMAGE_AVIF = os.getenv("IMAGE_AVIF", "").lower() in ("1", "true", "yes")
+
+# formato -> (extensión, mime). Orden = preferencia en <picture>; jpg siempre al final.
+FORMATS = {
+    "avif": ("avif", "image/avif"),
+    "webp": ("webp", "image/webp"),
+    "jpg": ("jpg", "image/jpeg"),
+}
+
+RASTER_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+
+# Grilla de public/home.html: col-12 / col-sm-6 / col-lg-4
+GRID_SIZES = "(min-width: 992px) 33vw, (min-width: 576px) 50vw, 100vw"
+
+
+# /img/{w}x{h}/...: h=0 = alto proporcional; ambos = recorte centrado (cover)
+RESIZE_SIZES: Set[Tuple[int, int]] = {
+    tuple(int(n) for n in s.strip().split("x", 1))
+    for s in os.getenv("IMAGE_RESIZE_SIZES", "160x160,320x320,640x640,320x0,640x0,1280x0").split(",")
+    if s.strip()
+}
+
+
+def enabled_formats() -> List[str]:
+    out = ["webp", "jpg"]
+    if IMAGE_AVIF and features.check("avif"):
+        out.insert(0, "avif")
+    return out
+
+# ============ Rutas ============
+
+def variant_url(url: str, width: int, fmt: str) -> str:
+    stem = url.rsplit(".", 1)[0] if "." in url.rsplit("/", 1)[-1] else url
+    return f"{stem}-{width}.{FORMATS[fmt][0]}"
+
+def _variant_path(path: Path, width: int, fmt: str) -> Path:
+    return path.with_name(f"{path.stem}-{width}.{FORMATS[fmt][0]}")
+
+def variant_keys(key: str, variants: Optional[dict]) -> List[str]:
+    """Claves de backend de los derivados de `key` (cas/ab/x.png -> cas/ab/x-320.webp, ...)."""
+    if not key or not variants:
+        return []
+    folder, _, name = key.rpartition("/")
+    prefix = f"{folder}/" if folder else ""
+    stem = name.rsplit(".", 1)[0]
+    return [
+        f"{prefix}{stem}-{width}.{FORMATS[fmt][0]}"
+        for width in variants.get("widths", [])
+        for fmt in variants.get("formats", [])
+    ]
+
+# ============ Generación ============
+
+def _target_widths(original_width: int) -> List[int]:
+    widths = [w for w in VARIANT_WIDTHS if w < original_width]
+    if len(widths) < len(VARIANT_WIDTHS):
+        widths.append(original_width)   # el tope es el propio original
+    return widths
+
+def _encode(img: Image.Image, fmt: str) -> bytes:
+    buf = BytesIO()
+    if fmt == "jpg":
+        if img.mode in ("RGBA", "LA", "P"):
+            rgba = img.convert("RGBA")
+            flat = Image.new("RGB", rgba.size, (255, 255, 255))   # JPEG no tiene alfa
+            flat.paste(rgba, mask=rgba.getchannel("A"))
+            img = flat
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        img.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif fmt == "webp":
+        img.save(buf, "WEBP", quality=WEBP_QUALITY, method=4)
+    else:
+        img.save(buf, "AVIF", quality=AVIF_QUALITY)
+    return buf.getvalue()
+
+def _lqip(img: Image.Image) -> str:
+    """Miniatura de LQIP_WIDTH px como data: URL (el navegador la estira: se ve borrosa)."""
+    height = max(1, round(img.height * LQIP_WIDTH / img.width))
+    buf = BytesIO()
+    img.resize((LQIP_WIDTH, height), Image.BOX).save(buf, "WEBP", quality=LQIP_QUALITY, method=6)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+def make_variants(path: Path) -> Optional[Dict[str, list]]:
+    """
+    Genera los derivados de `path`. Devuelve {"widths", "formats", "width", "height",
+    "lqip"} o None si el
+    archivo no es una imagen rasterizada estática (no es error: se usa el original).
+    """
+    if path.suffix.lower() not in RASTER_EXTS:
+        return None
+    try:
+        with Image.open(path) as src:
+            if getattr(src, "is_animated", False):
+                return None
+            img = ImageOps.exif_transpose(src)   # fotos de celular: respeta la orientación
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+            formats = enabled_formats()
+            widths = _target_widths(img.width)
+            width, height = img.size
+            lqip = _lqip(img)
+            for w in widths:
+                h = max(1, round(height * w / width))
+                resized = img if w == width else img.resize((w, h), Image.LANCZOS)
+                for fmt in formats:
+                    _variant_path(path, w, fmt).write_bytes(_encode(resized, fmt))
+    except Exception:
+        log.exception(f"[images] no se pudieron generar derivados de {path.name}")
+        return None
+    return {"widths": widths, "formats": formats, "width": width, "height": height, "lqip": lqip}
+
+def make_variants_for_url(url: str) -> Optional[Dict[str, list]]:
+    """(Job del pool) derivados de una subida, en el backend configurado."""
+    backend = get_storage()
+    key = backend.key_for_url(url)
+    if key is None or not backend.exists(key):
+        return None
+    with backend.local_copy(key) as path:
+        variants = make_variants(path)
+        if variants and not backend.is_local:
+            folder = key.rpartition("/")[0]
+            for width in variants["widths"]:
+                for fmt in variants["formats"]:
+                    vpath = _variant_path(path, width, fmt)
+                    backend.put(f"{folder}/{vpath.name}" if folder else vpath.name, vpath, FORMATS[fmt][1])
+    return variants
+
+def remove_variants(url: str, variants: Optional[dict]) -> None:
+    backend = get_storage()
+    for key in variant_keys(backend.key_for_url(url), variants):
+        backend.delete(key)
+
+def render_resized(path: Path, width: int, height: int, fmt: str) -> bytes:
+    """
+    `path` a width x height (height=0: proporcional; ambos: recorte centrado).
+    Nunca agranda: si el original es más chico se achica el objetivo en proporción.
+    """
+    with Image.open(path) as src:
+        src.seek(0)   # GIF animado: primer frame
+        img = ImageOps.exif_transpose(src)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+        if height:
+            scale = min(1.0, img.width / width, img.height / height)
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            out = ImageOps.fit(img, size, Image.LANCZOS)
+        elif width < img.width:
+            out = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        else:
+            out = img
+        return _encode(out, fmt)
+
+def render_resized_key(key: str, width: int, height: int, fmt: str) -> bytes:
+    """(Job del pool) render_resized() de una clave del backend (descarga si es remoto)."""
+    with get_storage().local_copy(key) as path:
+        return render_resized(path, width, height, fmt)
+
+# ============ Plantillas ============
+
+def resized_url(url: str, width: int, height: int = 0) -> str:
+    """URL de una subida -> /img/{w}x{h}/<clave> si el tamaño está permitido (si no, la URL tal cual)."""
+    if not url or (width, height) not in RESIZE_SIZES:
+        return url
+    key = get_storage().key_for_url(url)
+    return f"/img/{width}x{height}/{key}" if key else url
+
+def srcset(url: str, variants: Optional[dict], fmt: str) -> str:
+    """'a-320.webp 320w, a-640.webp 640w' ('' si no hay derivados en ese formato)."""
+    if not url or not variants or fmt not in variants.get("formats", []):
+        return ""
+    return ", ".join(f"{variant_url(url, w, fmt)} {w}w" for w in variants.get("widths", []))
+
+def picture_sources(url: str, variants: Optional[dict]) -> List[Dict[str, str]]:
+    """<source> de un <picture> (sin el jpg, que va en el srcset del <img>)."""
+    if not url or not variants:
+        return []
+    return [
+        {"type": FORMATS[fmt][1], "srcset": srcset(url, variants, fmt)}
+        for fmt in variants.get("formats", [])
+        if fmt != "jpg"
+    ]
+
+def responsive(url: str, variants: Optional[dict]) -> Optional[dict]:
+    """
+    Forma compacta para plantillas y JSON (grilla cargada por JS):
+    {"sources": [...], "srcset": jpg, "width", "height", "lqip"} (los tres últimos None
+    en derivados generados antes de existir el placeholder).
+    """
+    if not url or not variants:
+        return None
+    return {
+        "sources": picture_sources(url, variants),
+        "srcset": srcset(url, variants, "jpg"),
+        "width": variants.get("width"),
+        "height": variants.get("height"),
+        "lqip": variants.get("lqip"),
+    }
@@ -0,0 +1,101 @@
+"""
+Códigos QR de la URL pública de cada tienda (admin/share).
+
+- Se generan una sola vez por URL y tamaño, en el pool de imágenes, y quedan en disco:
+    <UPLOADS_DIR>/.qr/<owner_id>/<hash>-<px>.png
+    <UPLOADS_DIR>/.qr/<owner_id>/<hash>.svg        (vectorial: sirve para cualquier tamaño)
+  <hash> depende solo de la URL: si cambia el slug del branding cambia la URL, el hash
+  y por lo tanto la URL versionada (?v=<hash>) que usa la página -> cache inmutable.
+- invalidate_owner() borra los QR del vendor (cambio de slug, borrado de la cuenta).
+- El directorio es oculto: no lo sirve el mount /uploads ni lo recorre el GC.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+try:
+    import qrcode  # opcional (requirements.txt: qrcode)
+    import qrcode.image.svg
+except ImportError:  # pragma: no cover
+    qrcode = None
+
+from PIL import Image
+from starlette.concurrency import run_in_threadpool
+
+from services import image_pool
+from storage_local import UPLOADS_DIR
+
+log = logging.getLogger("uvicorn.error")
+
+QR_DIR = Path(os.getenv("QR_DIR", str(UPLOADS_DIR / ".qr")))
+QR_SIZES = (256, 512, 1024, 2048)   # px; 2048 alcanza para imprimir un volante
+QR_DEFAULT_SIZE = 512
+QR_BORDER = 4                        # módulos de margen (mínimo del estándar)
+
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def available() -> bool:
+    return qrcode is not None
+
+def version(url: str) -> str:
+    """Hash corto de la URL: nombre de archivo y parámetro ?v= de la página."""
+    return hashlib.blake2b(url.encode(), digest_size=10).hexdigest()
+
+def _path(owner_id: int, url: str, fmt: str, size: int) -> Path:
+    name = f"{version(url)}.svg" if fmt == "svg" else f"{version(url)}-{size}.png"
+    return QR_DIR / str(owner_id) / name
+
+# ============ Generación (pool) ============
+
+def _matrix(url: str) -> "qrcode.QRCode":
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, border=QR_BORDER)
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr
+
+def render(url: str, fmt: str, size: int) -> bytes:
+    """PNG de size x size (módulos enteros, centrado, sin interpolar) o SVG."""
+    qr = _matrix(url)
+    if fmt == "svg":
+        return qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).to_string(encoding="utf-8")
+    modules = qr.modules_count + 2 * QR_BORDER
+    qr.box_size = max(1, size // modules)
+    img = qr.make_image().get_image().convert("L")
+    if img.width != size:
+        canvas = Image.new("L", (max(size, img.width), max(size, img.width)), 255)
+        offset = (canvas.width - img.width) // 2
+        canvas.paste(img, (offset, offset))
+        img = canvas
+    buf = BytesIO()
+    img.save(buf, "PNG", optimize=True)
+    return buf.getvalue()
+
+# ============ Cache en disco ============
+
+def _store(dest: Path, content: bytes) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, dest)
+
+async def get_or_create(owner_id: int, url: str, fmt: str, size: int = QR_DEFAULT_SIZE) -> Path:
+    """Ruta del QR en disco; lo genera (pool de imágenes, 429 si está saturado) si no existe."""
+    dest = _path(owner_id, url, fmt, size)
+    if not await run_in_threadpool(dest.is_file):
+        content = await image_pool.run(render, url, fmt, size)
+        await run_in_threadpool(_store, dest, content)
+    return dest
+
+def invalidate_owner(owner_id: Optional[int]) -> None:
+    if owner_id is None:
+        return
+    try:
+        shutil.rmtree(QR_DIR / str(owner_id), ignore_errors=True)
+    except Exception:
+        log.exception(f"[qr] no se pudieron borrar los QR del vendor {owner_id}")
@@ -0,0 +1,197 @@
+"""
+Búsqueda full-text de productos (nombre + descripción).
+
+Backends (se elige según el engine):
+- SQLite:   tabla virtual FTS5 `products_fts` (rowid = products.id). No se sincroniza
+            sola: routers/products.py llama a index_product()/remove_product() en la
+            misma transacción que la escritura del producto.
+- Postgres: índice GIN sobre to_tsvector('simple', name || ' ' || description).
+            Es un índice de expresión, así que se mantiene solo (index_product es no-op).
+- Si el SQLite no trae FTS5, se cae a LIKE (correcto, pero lento en catálogos grandes).
+- Igual que la grilla de la tienda (services/storefront.py), solo devuelve productos
+  activos; el índice guarda todos y el filtro se aplica al consultar.
+- Reconstrucción (drift, restore de la DB): python3 -m scripts.rebuild_search_index
+
+La consulta del usuario nunca se pasa tal cual al motor: se parte en palabras y se
+arma una búsqueda por prefijo con AND (p.ej. "cami roj" -> camión rojo).
+"""
+
+import logging
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from db import engine
+from models import Product
+
+log = logging.getLogger("uvicorn.error")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MAX_TOKENS = 8
+
+_PG_DOC = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+_backend: Optional[str] = None
+
+
+def backend() -> str:
+    """'fts5' | 'postgres' | 'like' (detectado una vez por proceso)."""
+    global _backend
+    if _backend is None:
+        if engine.dialect.name == "postgresql":
+            _backend = "postgres"
+        elif engine.dialect.name == "sqlite" and _sqlite_has_fts5():
+            _backend = "fts5"
+        else:
+            _backend = "like"
+    return _backend
+
+
+def _sqlite_has_fts5() -> bool:
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS temp._fts5_probe USING fts5(x)"))
+            conn.execute(text("DROP TABLE IF EXISTS temp._fts5_probe"))
+        return True
+    except Exception:
+        log.warning("[search] SQLite sin FTS5: se usa LIKE como fallback")
+        return False
+
+# ============ Índice ============
+
+def ensure_search_index() -> None:
+    """
+    Crea el índice si falta (se llama al boot, después de init_db).
+    En SQLite, si la tabla FTS es nueva, se llena con los productos existentes.
+    """
+    kind = backend()
+    with engine.begin() as conn:
+        if kind == "fts5":
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+            )).first()
+            if not exists:
+                conn.execute(text(
+                    "CREATE VIRTUAL TABLE products_fts USING fts5("
+                    "name, description, owner_id UNINDEXED, "
+                    "tokenize = 'unicode61 remove_diacritics 2')"
+                ))
+                _fill_fts(conn)
+        elif kind == "postgres":
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_products_fts ON products USING GIN ({_PG_DOC})"))
+
+
+def rebuild_search_index() -> None:
+    """Reconstruye el índice FTS5 desde `products` (no hace nada en Postgres/LIKE)."""
+    if backend() != "fts5":
+        return
+    ensure_search_index()
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM products_fts"))
+        _fill_fts(conn)
+
+
+def _fill_fts(conn) -> None:
+    conn.execute(text(
+        "INSERT INTO products_fts(rowid, name, description, owner_id) "
+        "SELECT id, name, coalesce(description, ''), owner_id FROM products"
+    ))
+
+
+def index_product(session: Session, p: Product) -> None:
+    """Alta/actualización del producto en el índice. Requiere p.id (flush antes). NO hace commit."""
+    if backend() != "fts5":
+        return
+    session.exec(text("DELETE FROM products_fts WHERE rowid = :id").bindparams(id=p.id))
+    session.exec(text(
+        "INSERT INTO products_fts(rowid, name, description, owner_id) "
+        "VALUES (:id, :name, :description, :owner_id)"
+    ).bindparams(id=p.id, name=p.name or "", description=p.description or "", owner_id=p.owner_id))
+
+
+def remove_product(session: Session, product_id: int) -> None:
+    """Baja del producto en el índice. NO hace commit."""
+    if backend() != "fts5":
+        return
+    session.exec(text("DELETE FROM products_fts WHERE rowid = :id").bindparams(id=product_id))
+
+
+def remove_owner(session: Session, owner_id: int) -> None:
+    """Baja de todos los productos de un vendor (borrado masivo). NO hace commit."""
+    if backend() != "fts5":
+        return
+    session.exec(text("DELETE FROM products_fts WHERE owner_id = :owner_id").bindparams(owner_id=owner_id))
+
+# ============ Consulta ============
+
+def _tokens(q: str) -> List[str]:
+    return _TOKEN_RE.findall((q or "").lower())[:MAX_TOKENS]
+
+
+def search_products(
+    session: Session,
+    q: str,
+    *,
+    owner_id: Optional[int] = None,
+    limit: int = 24,
+    page: int = 1,
+) -> Tuple[List[Product], bool]:
+    """
+    Productos que coinciden con `q`, ordenados por relevancia (y id desc en empate).
+    Devuelve (productos, hay_más). Paginación por página: el orden por rank
+    no admite cursor por id.
+    """
+    tokens = _tokens(q)
+    if not tokens:
+        return [], False
+    offset = (max(1, page) - 1) * limit
+    ids = _search_ids(session, tokens, owner_id, limit + 1, offset)
+    has_more = len(ids) > limit
+    ids = ids[:limit]
+    if not ids:
+        return [], False
+    by_id = {p.id: p for p in session.exec(select(Product).where(Product.id.in_(ids))).all()}
+    return [by_id[i] for i in ids if i in by_id], has_more
+
+
+def _search_ids(session: Session, tokens: List[str], owner_id: Optional[int], limit: int, offset: int) -> List[int]:
+    kind = backend()
+    params = {"limit": limit, "offset": offset, "active": True}
+    owner_sql = ""
+    if owner_id is not None:
+        params["owner_id"] = owner_id
+
+    if kind == "fts5":
+        # "tok"* = prefijo; espacio = AND. Las comillas neutralizan la sintaxis de FTS5.
+        params["q"] = " ".join(f'"{t}"*' for t in tokens)
+        if owner_id is not None:
+            owner_sql = "AND products_fts.owner_id = :owner_id"
+        sql = (
+            "SELECT products_fts.rowid FROM products_fts "
+            "JOIN products ON products.id = products_fts.rowid "
+            f"WHERE products_fts MATCH :q AND products.is_active = :active {owner_sql} "
+            "ORDER BY products_fts.rank, products_fts.rowid DESC LIMIT :limit OFFSET :offset"
+        )
+    elif kind == "postgres":
+        params["q"] = " & ".join(f"{t}:*" for t in tokens)
+        if owner_id is not None:
+            owner_sql = "AND owner_id = :owner_id"
+        sql = (
+            "SELECT id FROM products "
+            f"WHERE {_PG_DOC} @@ to_tsquery('simple', :q) AND is_active = :active {owner_sql} "
+            f"ORDER BY ts_rank({_PG_DOC}, to_tsquery('simple', :q)) DESC, id DESC "
+            "LIMIT :limit OFFSET :offset"
+        )
+    else:
+        conds = []
+        for i, t in enumerate(tokens):
+            params[f"t{i}"] = f"%{t}%"
+            conds.append(f"(lower(name) LIKE :t{i} OR lower(coalesce(description, '')) LIKE :t{i})")
+        conds.append("is_active = :active")
+        if owner_id is not None:
+            conds.append("owner_id = :owner_id")
+        sql = f"SELECT id FROM products WHERE {' AND '.join(conds)} ORDER BY id DESC LIMIT :limit OFFSET :offset"
+
+    return [row[0] for row in session.exec(text(sql).bindparams(**params)).all()]
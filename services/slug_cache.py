@@ -0,0 +1,167 @@
+"""
+Cache compartido de resolución de slugs (entre requests, por proceso).
+
+Dos espacios de nombres:
+- "store": slug público de /u/{slug} -> (user_id, branding_id, branding_slug),
+  con la misma prioridad que resolve_store (primero VendorBranding.slug, luego User.slug).
+- "user":  User.slug -> user_id (helpers de autorización del panel /admin/{slug}/...).
+
+Detalles:
+- LRU acotado (SLUG_CACHE_SIZE) con TTL por entrada.
+- Cache negativo: los slugs inexistentes (bots probando /u/<basura>) se recuerdan
+  SLUG_NEGATIVE_TTL segundos, así no vuelven a pegarle a la DB.
+- Invalidación explícita con invalidate_slug()/invalidate_owner() en signup y brand_save.
+  Como la memoria es por worker, los getters verifican que el slug del registro
+  cargado siga coincidiendo y, si no, descartan la entrada y reconsultan.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from sqlmodel import Session, select, desc
+
+from models import User, VendorBranding
+
+SLUG_CACHE_SIZE = int(os.getenv("SLUG_CACHE_SIZE", "5000"))
+SLUG_CACHE_TTL = float(os.getenv("SLUG_CACHE_TTL", "300"))          # segundos (positivos)
+SLUG_NEGATIVE_TTL = float(os.getenv("SLUG_NEGATIVE_TTL", "30"))     # segundos (no encontrados)
+
+
+@dataclass(frozen=True)
+class SlugRef:
+    user_id: int
+    branding_id: Optional[int]
+    branding_slug: Optional[str]
+
+
+# clave (namespace, slug) -> (expira_en, valor | None)
+_entries: "OrderedDict[Tuple[str, str], Tuple[float, object]]" = OrderedDict()
+_lock = threading.Lock()
+_MISSING = object()
+
+# ============ LRU ============
+
+def _get(key):
+    with _lock:
+        item = _entries.get(key)
+        if item is None:
+            return _MISSING
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            _entries.pop(key, None)
+            return _MISSING
+        _entries.move_to_end(key)
+        return value
+
+def _put(key, value) -> None:
+    ttl = SLUG_CACHE_TTL if value is not None else SLUG_NEGATIVE_TTL
+    with _lock:
+        _entries[key] = (time.monotonic() + ttl, value)
+        _entries.move_to_end(key)
+        while len(_entries) > SLUG_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+def invalidate_slug(*slugs: Optional[str]) -> None:
+    """Olvida los slugs dados (positivos y negativos) en ambos namespaces."""
+    with _lock:
+        for slug in slugs:
+            if slug:
+                _entries.pop(("store", slug), None)
+                _entries.pop(("user", slug), None)
+
+def invalidate_owner(user_id: int) -> None:
+    """Olvida todas las entradas que apuntan al vendor (cambio de slug, branding nuevo, borrado)."""
+    with _lock:
+        for key in [k for k, (_, v) in _entries.items() if _owner_of(v) == user_id]:
+            _entries.pop(key, None)
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+def _owner_of(value) -> Optional[int]:
+    if isinstance(value, SlugRef):
+        return value.user_id
+    return value if isinstance(value, int) else None
+
+# ============ Resolución (DB en caso de miss) ============
+
+def resolve_user_id(session: Session, slug: str) -> Optional[int]:
+    """User.slug -> user_id (o None)."""
+    key = ("user", slug)
+    value = _get(key)
+    if value is _MISSING:
+        value = session.exec(select(User.id).where(User.slug == slug)).first()
+        _put(key, value)
+    return value
+
+def resolve_store_ref(session: Session, slug: str) -> Optional[SlugRef]:
+    """Slug público -> SlugRef (o None). Misma prioridad que resolve_store."""
+    key = ("store", slug)
+    value = _get(key)
+    if value is _MISSING:
+        value = _load_store_ref(session, slug)
+        _put(key, value)
+    return value
+
+def _load_store_ref(session: Session, slug: str) -> Optional[SlugRef]:
+    row = session.exec(
+        select(VendorBranding.id, VendorBranding.owner_id, VendorBranding.slug)
+        .where(VendorBranding.slug == slug)
+    ).first()
+    if row:
+        return SlugRef(user_id=row[1], branding_id=row[0], branding_slug=row[2])
+
+    user_id = resolve_user_id(session, slug)
+    if user_id is None:
+        return None
+    # toma SIEMPRE el branding más reciente (igual que get_branding_by_owner)
+    row = session.exec(
+        select(VendorBranding.id, VendorBranding.slug)
+        .where(VendorBranding.owner_id == user_id)
+        .order_by(desc(VendorBranding.updated_at), desc(VendorBranding.id))
+    ).first()
+    return SlugRef(
+        user_id=user_id,
+        branding_id=row[0] if row else None,
+        branding_slug=row[1] if row else None,
+    )
+
+# ============ Getters de objetos (PK) con verificación ============
+
+def get_user_by_slug(session: Session, slug: str) -> Optional[User]:
+    """User por User.slug usando el cache; verifica que el slug no haya cambiado."""
+    for _ in range(2):
+        user_id = resolve_user_id(session, slug)
+        if user_id is None:
+            return None
+        user = session.get(User, user_id)
+        if user is not None and user.slug == slug:
+            return user
+        invalidate_slug(slug)  # entrada vieja (p.ej. borrado en otro worker): reintenta
+    return None
+
+def get_store_by_slug(session: Session, slug: str) -> Optional[Tuple[User, Optional[VendorBranding]]]:
+    """(user, branding) para el slug público, o None si no existe."""
+    for _ in range(2):
+        ref = resolve_store_ref(session, slug)
+        if ref is None:
+            return None
+        user = session.get(User, ref.user_id)
+        branding = session.get(VendorBranding, ref.branding_id) if ref.branding_id else None
+        if user is not None and still_valid(ref, slug, user, branding):
+            return user, branding
+        invalidate_slug(slug)
+    return None
+
+def still_valid(ref: SlugRef, slug: str, user: User, branding: Optional[VendorBranding]) -> bool:
+    """True si (user, branding) cargados por PK siguen correspondiendo a `slug`."""
+    if ref.branding_id is not None:
+        if branding is None or branding.owner_id != user.id or branding.slug != ref.branding_slug:
+            return False
+    # resuelto por VendorBranding.slug o por User.slug
+    return ref.branding_slug == slug or user.slug == slug
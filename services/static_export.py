@@ -0,0 +1,203 @@
+"""
+Export estático de tiendas a disco (modo opcional: STORE_STATIC_EXPORT=1).
+
+Para tiendas con mucho tráfico y pocos cambios: el HTML de /u/{slug} y la primera
+página de /u/{slug}/products.json se escriben como archivos y se sirven por el
+mount /uploads (StaticFiles) sin DB ni Jinja por request.
+
+Layout bajo UPLOADS_DIR:
+  stores/<slug>/index.html
+  stores/<slug>/products.json
+  stores/_owners/<owner_id>      slugs exportados del vendor (uno por línea)
+
+Flujo:
+- store_cache._bump() llama a mark_dirty(): borra los archivos del vendor en el acto
+  (nunca se sirve una versión vieja; mientras tanto responde la ruta dinámica) y
+  encola la regeneración para DESPUÉS del commit (evento after_commit de la sesión).
+- Un hilo de fondo por proceso regenera los vendors encolados (export_store()).
+- StaticExportMiddleware reescribe GET /u/{slug} y /u/{slug}/products.json (sin query)
+  a /uploads/stores/<slug>/... solo si el archivo existe.
+- Export completo: python3 -m scripts.export_stores (pool de procesos).
+"""
+
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from storage_local import UPLOADS_DIR
+
+log = logging.getLogger("uvicorn.error")
+
+STATIC_EXPORT = os.getenv("STORE_STATIC_EXPORT", "").lower() in ("1", "true", "yes")
+EXPORT_DIR = UPLOADS_DIR / "stores"
+EXPORT_URL_PREFIX = "/uploads/stores"
+
+# Espera antes de regenerar: agrupa ráfagas de cambios (p.ej. carga de 20 productos)
+EXPORT_DEBOUNCE = float(os.getenv("STORE_EXPORT_DEBOUNCE", "1.0"))
+
+_SLUG_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,119}$")
+_STORE_PATH_RE = re.compile(r"^/u/([^/]+)(/products\.json)?$")
+
+# ============ Archivos ============
+
+def _owners_file(owner_id: int) -> Path:
+    return EXPORT_DIR / "_owners" / str(owner_id)
+
+def _store_dir(slug: str) -> Path:
+    return EXPORT_DIR / slug
+
+def _write_atomic(dest: Path, content: bytes) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, dest)   # el StaticFiles nunca ve un archivo a medio escribir
+
+def exported_slugs(owner_id: int) -> List[str]:
+    try:
+        return [s for s in _owners_file(owner_id).read_text().split() if _SLUG_RE.match(s)]
+    except FileNotFoundError:
+        return []
+
+def remove_owner(owner_id: int) -> None:
+    """Borra los archivos exportados del vendor (siguen sirviéndose por la ruta dinámica)."""
+    for slug in exported_slugs(owner_id):
+        shutil.rmtree(_store_dir(slug), ignore_errors=True)
+    _owners_file(owner_id).unlink(missing_ok=True)
+
+# ============ Render ============
+
+def _fake_request(path: str):
+    # public/home.html solo necesita un Request para TemplateResponse
+    from starlette.requests import Request
+    return Request({
+        "type": "http", "method": "GET", "path": path, "root_path": "",
+        "query_string": b"", "headers": [], "scheme": "http", "server": ("localhost", 80),
+    })
+
+def _public_slugs(session: Session, user, branding) -> List[str]:
+    """Slugs por los que /u/{slug} resuelve a este vendor (branding primero, como resolve_store)."""
+    from services import slug_cache
+    out = []
+    for slug in (getattr(branding, "slug", None), user.slug):
+        if slug and slug not in out and _SLUG_RE.match(slug):
+            ref = slug_cache.resolve_store_ref(session, slug)
+            if ref is not None and ref.user_id == user.id:
+                out.append(slug)
+    return out
+
+def export_store(session: Session, owner_id: int) -> List[str]:
+    """
+    Renderiza y escribe los archivos de la tienda. Devuelve los slugs exportados
+    ([] si el vendor ya no existe o no tiene slug público).
+    """
+    from services import storefront
+    from utils.fastjson import dumps
+    from routers.vendor import render_store_html, store_products_payload
+
+    sf = storefront.load_by_owner(session, owner_id)
+    if sf is None:
+        remove_owner(owner_id)
+        return []
+    slugs = _public_slugs(session, sf.user, sf.branding)
+    if slugs:
+        storefront.load_body(session, sf)
+
+    payload = dumps(store_products_payload(session, owner_id))
+    for slug in slugs:
+        html = render_store_html(_fake_request(f"/u/{slug}"), sf, slug=slug)
+        _write_atomic(_store_dir(slug) / "index.html", html)
+        _write_atomic(_store_dir(slug) / "products.json", payload)
+
+    # slugs que ya no apuntan a este vendor (cambio de slug en brand_save)
+    for old in set(exported_slugs(owner_id)) - set(slugs):
+        shutil.rmtree(_store_dir(old), ignore_errors=True)
+    if slugs:
+        _write_atomic(_owners_file(owner_id), "\n".join(slugs).encode())
+    else:
+        _owners_file(owner_id).unlink(missing_ok=True)
+    return slugs
+
+# ============ Regeneración en segundo plano ============
+
+_queue: "queue.Queue[int]" = queue.Queue()
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+def mark_dirty(session: Session, owner_id: int) -> None:
+    """
+    La tienda cambió: borra su export ya y la regenera cuando `session` haga commit.
+    Se llama desde store_cache._bump (antes del commit). No-op si el modo está apagado.
+    """
+    if not STATIC_EXPORT:
+        return
+    remove_owner(owner_id)
+    event.listen(session, "after_commit", lambda _s: schedule(owner_id), once=True)
+
+def schedule(owner_id: int) -> None:
+    """Encola la regeneración del vendor en el hilo de fondo de este proceso."""
+    _ensure_worker()
+    _queue.put(owner_id)
+
+def _ensure_worker() -> None:
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="static-export", daemon=True)
+            _worker.start()
+
+def _run() -> None:
+    from db import SessionLocal
+    while True:
+        pending = {_queue.get()}
+        time.sleep(EXPORT_DEBOUNCE)
+        while not _queue.empty():
+            pending.add(_queue.get_nowait())
+        for owner_id in pending:
+            try:
+                with SessionLocal() as session:
+                    export_store(session, owner_id)
+            except Exception:
+                log.exception(f"[static_export] falló el export de owner_id={owner_id}")
+                remove_owner(owner_id)   # sin archivo → responde la ruta dinámica
+
+# ============ Servir ============
+
+class StaticExportMiddleware:
+    """
+    Middleware ASGI: si existe el export de la tienda, reescribe el path para que lo
+    sirva el mount /uploads. Solo GET/HEAD sin query string (filtros, cursor, ?ok=...
+    siguen por la ruta dinámica).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD") and not scope.get("query_string"):
+            m = _STORE_PATH_RE.match(scope["path"])
+            if m and _SLUG_RE.match(m.group(1)):
+                name = "products.json" if m.group(2) else "index.html"
+                if (_store_dir(m.group(1)) / name).is_file():
+                    path = f"{EXPORT_URL_PREFIX}/{m.group(1)}/{name}"
+                    scope = dict(scope, path=path, raw_path=path.encode())
+                    send = _no_cache(send)
+        await self.app(scope, receive, send)
+
+def _no_cache(send):
+    # el export cambia sin cambiar de URL: que el navegador revalide (ETag → 304)
+    async def wrapped(message):
+        if message["type"] == "http.response.start":
+            headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"cache-control"]
+            headers.append((b"cache-control", b"no-cache"))
+            message = dict(message, headers=headers)
+        await send(message)
+    return wrapped
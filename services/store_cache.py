@@ -0,0 +1,153 @@
+"""
+Cache del HTML renderizado de la tienda pública (/u/{slug}).
+
+Cómo funciona:
+- Cada vendor tiene una fila en `store_versions` con un `page_version`.
+- Toda escritura que cambia la página (guardar branding, aprobar/ocultar review)
+  llama a `bump_store(session, owner_id)` ANTES de su commit, así datos y versión
+  se confirman juntos. Las escrituras de productos usan `bump_catalog()`, que además
+  incrementa `catalog_version` (ETag de los endpoints products.json).
+- El GET lee la versión (1 consulta por PK) y, si el HTML de esa versión ya está
+  en memoria, lo devuelve sin tocar productos/reviews ni Jinja.
+- Se emite un ETag fuerte (hash del HTML) y se responde 304 si el navegador ya lo tiene.
+
+La memoria es por proceso (LRU acotado); la versión es compartida vía DB, por lo que
+varios workers nunca sirven una página vieja.
+
+Con STORE_STATIC_EXPORT=1 cada bump además regenera el export a disco
+(services/static_export.py).
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import update
+from sqlmodel import Session
+
+from models import StoreVersion, now_utc
+from services import static_export
+
+# Máximo de páginas renderizadas en memoria por worker
+STORE_PAGE_CACHE_SIZE = int(os.getenv("STORE_PAGE_CACHE_SIZE", "500"))
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    version: int
+    body: bytes
+    etag: str
+
+
+_pages: "OrderedDict[tuple, CachedPage]" = OrderedDict()
+_lock = threading.Lock()
+
+# ============ Versiones (DB) ============
+
+def get_page_version(session: Session, owner_id: int) -> int:
+    """Versión actual de la tienda del vendor (0 si nunca se escribió)."""
+    row = session.get(StoreVersion, owner_id)
+    return row.page_version if row else 0
+
+def get_catalog_version(session: Session, owner_id: int) -> int:
+    """Versión actual del catálogo (productos) del vendor."""
+    row = session.get(StoreVersion, owner_id)
+    return row.catalog_version if row else 0
+
+def _bump(session: Session, owner_id: int, catalog: bool) -> None:
+    # UPDATE atómico (col + 1) para no perder incrementos con escrituras concurrentes
+    values = {"page_version": StoreVersion.page_version + 1, "updated_at": now_utc()}
+    if catalog:
+        values["catalog_version"] = StoreVersion.catalog_version + 1
+    res = session.exec(
+        update(StoreVersion).where(StoreVersion.owner_id == owner_id).values(**values)
+    )
+    if not res.rowcount:
+        session.add(StoreVersion(owner_id=owner_id, page_version=1, catalog_version=int(catalog)))
+    invalidate(owner_id)
+    static_export.mark_dirty(session, owner_id)   # export a disco (si está activo) tras el commit
+
+def bump_store(session: Session, owner_id: int) -> None:
+    """
+    Incrementa la versión de la página. NO hace commit: se confirma con el
+    commit de la escritura que la llama.
+    """
+    _bump(session, owner_id, catalog=False)
+
+def bump_catalog(session: Session, owner_id: int) -> None:
+    """Como bump_store, pero para escrituras de productos (cambia también el catálogo)."""
+    _bump(session, owner_id, catalog=True)
+
+def catalog_etag(owner_id: int, version: int, *parts) -> str:
+    """
+    ETag fuerte derivado de la versión del catálogo (sin serializar nada).
+    `parts` distingue representaciones distintas del mismo catálogo (ruta, filtros...).
+    """
+    tag = hashlib.blake2b(repr(parts).encode(), digest_size=4).hexdigest()
+    return f'"c{owner_id}.{version}.{tag}"'
+
+# ============ Páginas (memoria) ============
+
+def invalidate(owner_id: int) -> None:
+    """Suelta del LRU local todas las variantes de la tienda del vendor."""
+    with _lock:
+        for key in [k for k in _pages if k[0] == owner_id]:
+            _pages.pop(key, None)
+
+def _get(key: tuple, version: int) -> Optional[CachedPage]:
+    with _lock:
+        page = _pages.get(key)
+        if page is None or page.version != version:
+            return None
+        _pages.move_to_end(key)
+        return page
+
+def _put(key: tuple, version: int, body: bytes) -> CachedPage:
+    page = CachedPage(
+        version=version,
+        body=body,
+        etag='"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest(),
+    )
+    with _lock:
+        _pages[key] = page
+        _pages.move_to_end(key)
+        while len(_pages) > STORE_PAGE_CACHE_SIZE:
+            _pages.popitem(last=False)
+    return page
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True si el If-None-Match del request incluye `etag` (→ responder 304)."""
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    if inm.strip() == "*":
+        return True
+    return etag in [t.strip().removeprefix("W/") for t in inm.split(",")]
+
+def cached_page(
+    request: Request,
+    owner_id: int,
+    version: int,
+    render: Callable[[], bytes],
+    variant: Hashable = "store",
+) -> Response:
+    """
+    Devuelve la página de la tienda desde el cache (o la renderiza con `render()`).
+    - `version` debe leerse ANTES de consultar los datos que usa `render()`.
+    - `variant` separa páginas distintas del mismo vendor (p.ej. rutas duplicadas).
+    """
+    key = (owner_id, variant)
+    page = _get(key, version)
+    if page is None:
+        page = _put(key, version, render())
+
+    # no-cache: el navegador guarda la copia pero revalida siempre (→ 304 barato)
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, page.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(page.body, media_type="text/html; charset=utf-8", headers=headers)
@@ -0,0 +1,136 @@
+"""
+Carga de datos de la tienda pública en pocos round trips.
+
+Antes, /u/{slug} hacía en serie: branding por slug, user por id, branding más
+reciente por owner, versión, conteo de reviews, productos y reviews (7+ consultas).
+Ahora:
+
+- Cabecera (1 consulta): user + branding + store_versions + vendor_rating_stats
+  en un solo SELECT con LEFT JOINs. Con eso ya se sabe la versión de la página,
+  así que un hit del cache HTML (services/store_cache.py) cuesta solo esta consulta.
+- Cuerpo (3 consultas, solo al renderizar): grilla de productos activos proyectada
+  a las columnas que usa la plantilla, reviews aprobadas (también proyectadas) y facetas.
+
+Benchmark de consultas antes/después: python3 -m scripts.bench_storefront
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import false
+from sqlmodel import Session, select, desc
+
+from models import User, VendorBranding, StoreVersion, VendorRatingStats, Product, Review
+from services import slug_cache
+from services.facets import category_facets
+from utils.pagination import keyset_page
+from utils.reviews import RatingSummary, summary_from_row
+
+STORE_PAGE_SIZE = 24
+STORE_REVIEWS_LIMIT = 20
+
+# Columnas que usa la grilla/modal de public/home.html (ni stock ni timestamps)
+GRID_COLUMNS = (
+    Product.id, Product.name, Product.price, Product.description,
+    Product.image_url, Product.image_variants,
+)
+REVIEW_COLUMNS = (Review.id, Review.name, Review.rating, Review.comment, Review.created_at)
+
+
+@dataclass
+class Storefront:
+    user: User
+    branding: Optional[VendorBranding]
+    page_version: int
+    rating_row: Optional[VendorRatingStats] = None
+    # cuerpo (load_body)
+    rating: RatingSummary = field(default_factory=RatingSummary)
+    products: List = field(default_factory=list)
+    next_cursor: Optional[int] = None
+    reviews: List = field(default_factory=list)
+    facets: List = field(default_factory=list)
+
+# ============ Cabecera ============
+
+def _head(session: Session, user_id: int, branding_on) -> Optional[Storefront]:
+    row = session.exec(
+        select(User, VendorBranding, StoreVersion, VendorRatingStats)
+        .select_from(User)
+        .outerjoin(VendorBranding, branding_on)
+        .outerjoin(StoreVersion, StoreVersion.owner_id == User.id)
+        .outerjoin(VendorRatingStats, VendorRatingStats.vendor_id == User.id)
+        .where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    user, branding, version, stats = row
+    return Storefront(
+        user=user,
+        branding=branding,
+        page_version=version.page_version if version else 0,
+        rating_row=stats,
+    )
+
+def load_store(session: Session, slug: str) -> Optional[Storefront]:
+    """
+    Cabecera de la tienda por slug público (misma prioridad que resolve_store).
+    Con el slug en cache: 1 consulta. None si no existe.
+    """
+    for _ in range(2):
+        ref = slug_cache.resolve_store_ref(session, slug)
+        if ref is None:
+            return None
+        on = VendorBranding.id == ref.branding_id if ref.branding_id else false()
+        sf = _head(session, ref.user_id, on)
+        if sf is not None and slug_cache.still_valid(ref, slug, sf.user, sf.branding):
+            return sf
+        slug_cache.invalidate_slug(slug)  # entrada vieja: reintenta una vez
+    return None
+
+def load_by_owner(session: Session, owner_id: int) -> Optional[Storefront]:
+    """Cabecera por id del vendor (preview del panel, export). Toma el branding más reciente."""
+    latest = (
+        select(VendorBranding.id)
+        .where(VendorBranding.owner_id == User.id)
+        .order_by(desc(VendorBranding.updated_at), desc(VendorBranding.id))
+        .limit(1)
+        .correlate(User)
+        .scalar_subquery()
+    )
+    return _head(session, owner_id, VendorBranding.id == latest)
+
+# ============ Cuerpo ============
+
+def products_stmt(owner_id: int, category: Optional[str] = None, columns=None):
+    """Productos activos del vendor (opcionalmente de una categoría), sin ORDER BY/LIMIT."""
+    stmt = select(*columns) if columns else select(Product)
+    stmt = stmt.where(Product.owner_id == owner_id).where(Product.is_active == True)
+    if category:
+        stmt = stmt.where(Product.category == category)
+    return stmt
+
+def load_body(
+    session: Session,
+    sf: Storefront,
+    *,
+    category: Optional[str] = None,
+    facets: Optional[List] = None,
+    limit: int = STORE_PAGE_SIZE,
+) -> Storefront:
+    """Primera página de la grilla, reviews aprobadas y facetas (3 consultas)."""
+    owner_id = sf.user.id
+    # sin fila de vendor_rating_stats se calcula al vuelo (+1 consulta, solo aquí)
+    sf.rating = summary_from_row(session, owner_id, sf.rating_row)
+    sf.products, sf.next_cursor = keyset_page(
+        session, products_stmt(owner_id, category, GRID_COLUMNS), Product.id,
+        cursor=None, limit=limit,
+    )
+    sf.reviews = session.exec(
+        select(*REVIEW_COLUMNS)
+        .where(Review.vendor_id == owner_id)
+        .where(Review.is_approved == True)
+        .order_by(Review.created_at.desc())
+        .limit(STORE_REVIEWS_LIMIT)
+    ).all()
+    sf.facets = facets if facets is not None else category_facets(session, owner_id)
+    return sf
@@ -0,0 +1,256 @@
+"""
+Servidor de archivos para los mounts /uploads y /vendors (fotos, logos, derivados).
+
+Reemplaza a StaticFiles para que revalidar o reanudar una imagen casi no cueste nada:
+
+- ETag fuerte por contenido, sin leer el archivo:
+    cas/ab/<sha256>.png          -> "<sha256>" (el nombre es el hash)
+    cas/ab/<sha256>-640.webp     -> "<sha256>-640.webp" (derivado fijo de ese contenido)
+    subidas viejas (uuid)        -> digest de upload_manifest (una consulta por archivo y
+                                    proceso; se guarda en memoria)
+    resto (export de tiendas...) -> W/"<mtime>-<tamaño>"
+- If-None-Match / If-Modified-Since -> 304 sin body; Range (un solo rango) -> 206,
+  If-Range respetado, 416 si el rango no entra. Salvo en los tipos que comprime
+  CompressionMiddleware: ahí se ignora Range (200 completo), porque Content-Range habla
+  de bytes sin comprimir y el cliente armaría un archivo corrupto.
+- Body sin copiar a Python cuando el servidor ASGI lo soporta (extensiones
+  http.response.zerocopysend -> sendfile, o http.response.pathsend). Si no, lectura por
+  bloques en el threadpool. Los tipos que comprime CompressionMiddleware (HTML/JSON del
+  export) van siempre por bloques.
+- No sirve archivos ocultos (.incoming/, .gc-cursor) ni directorios.
+"""
+
+import mimetypes
+import os
+import re
+import stat
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from services.assets import IMMUTABLE, is_immutable_upload
+from services.compression import is_compressible
+
+CHUNK_SIZE = 64 * 1024
+ETAG_CACHE_SIZE = int(os.getenv("UPLOAD_ETAG_CACHE_SIZE", "20000"))
+NEGATIVE_TTL = 300.0   # rutas sin fila en el manifest: se vuelve a consultar tras esto
+
+_CAS_NAME_RE = re.compile(r"^(?P<digest>[0-9a-f]{64})(?P<variant>-\d{1,5})?\.[a-z0-9]+$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# ruta relativa -> (digest o None, instante de la consulta)
+_digests: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+# ============ Validadores ============
+
+def _manifest_digest(rel: str) -> Optional[str]:
+    """Digest de `rel` en upload_manifest (cacheado; los nombres de subida no cambian de contenido)."""
+    now = time.monotonic()
+    with _lock:
+        hit = _digests.get(rel)
+        if hit is not None and (hit[0] is not None or now - hit[1] < NEGATIVE_TTL):
+            _digests.move_to_end(rel)
+            return hit[0]
+    from sqlmodel import select
+    from db import SessionLocal
+    from models import UploadManifest
+    with SessionLocal() as session:
+        digest = session.exec(
+            select(UploadManifest.digest).where(UploadManifest.path == rel).where(UploadManifest.digest.is_not(None)).limit(1)
+        ).first()
+    with _lock:
+        _digests[rel] = (digest, now)
+        _digests.move_to_end(rel)
+        while len(_digests) > ETAG_CACHE_SIZE:
+            _digests.popitem(last=False)
+    return digest
+
+def _cas_etag(name: str) -> Optional[str]:
+    m = _CAS_NAME_RE.match(name)
+    if not m:
+        return None
+    return f'"{m.group("digest")}"' if not m.group("variant") else f'"{name}"'
+
+def etag_for(rel: str, st: os.stat_result) -> str:
+    name = rel.rsplit("/", 1)[-1]
+    cas = _cas_etag(name)
+    if cas:
+        return cas
+    if is_immutable_upload(name):
+        digest = _manifest_digest(rel)
+        if digest:
+            return f'"{digest}"'
+    return f'W/"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+def _etag_list(value: str) -> List[str]:
+    return [tag.strip() for tag in value.split(",") if tag.strip()]
+
+def _weak_match(a: str, b: str) -> bool:
+    return a.removeprefix("W/") == b.removeprefix("W/")
+
+def not_modified(headers: Headers, etag: str, mtime: float) -> bool:
+    """If-None-Match manda (comparación débil); si no viene, If-Modified-Since."""
+    inm = headers.get("if-none-match")
+    if inm is not None:
+        return any(tag == "*" or _weak_match(tag, etag) for tag in _etag_list(inm))
+    ims = headers.get("if-modified-since")
+    if ims:
+        try:
+            return int(mtime) <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def _if_range_ok(headers: Headers, etag: str, last_modified: str) -> bool:
+    value = headers.get("if-range")
+    if value is None:
+        return True
+    if value.startswith('"') or value.startswith("W/"):
+        return not etag.startswith("W/") and value == etag   # comparación fuerte
+    return value == last_modified
+
+def byte_range(value: Optional[str], size: int) -> Union[None, bool, Tuple[int, int]]:
+    """
+    (inicio, fin inclusive) de un Range "bytes=a-b" / "bytes=a-" / "bytes=-n".
+    None: sin rango o no soportado (varios rangos) -> 200 completo. False: 416.
+    """
+    if not value:
+        return None
+    m = _RANGE_RE.match(value.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    if not m.group(1):
+        length = int(m.group(2))
+        if length == 0 or size == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(m.group(1))
+    end = int(m.group(2)) if m.group(2) else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+# ============ App ASGI ============
+
+class UploadFiles:
+    """App ASGI para montar un directorio de subidas (`prefix`: carpeta bajo UPLOADS_DIR)."""
+
+    def __init__(self, directory: Union[str, Path], prefix: str = "") -> None:
+        self.directory = Path(directory).resolve()
+        self.prefix = prefix
+
+    def _resolve(self, path: str) -> Optional[Path]:
+        parts = [p for p in path.split("/") if p]
+        if not parts or any(p.startswith(".") for p in parts):
+            return None
+        full = self.directory.joinpath(*parts).resolve()
+        if not full.is_relative_to(self.directory):
+            return None
+        return full
+
+    async def __call__(self, scope, receive, send) -> None:
+        assert scope["type"] == "http"
+        if scope["method"] not in ("GET", "HEAD"):
+            await _plain(send, 405, b"Method Not Allowed", [(b"allow", b"GET, HEAD")])
+            return
+        full = self._resolve(scope["path"])   # Mount deja en "path" lo que sigue al prefijo
+        try:
+            st = await run_in_threadpool(os.stat, full) if full is not None else None
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            await _plain(send, 404, b"Not Found")
+            return
+
+        rel = self.prefix + full.relative_to(self.directory).as_posix()
+        # cas/: sale del nombre, sin saltar al threadpool; el resto puede consultar la DB
+        etag = _cas_etag(full.name) or await run_in_threadpool(etag_for, rel, st)
+        last_modified = formatdate(st.st_mtime, usegmt=True)
+        headers = Headers(scope=scope)
+        content_type = mimetypes.guess_type(full.name)[0] or "application/octet-stream"
+        compressible = is_compressible(content_type)
+        base = [
+            (b"etag", etag.encode()),
+            (b"last-modified", last_modified.encode()),
+            (b"accept-ranges", b"none" if compressible else b"bytes"),
+        ]
+        if is_immutable_upload(full.name):
+            base.append((b"cache-control", IMMUTABLE.encode()))
+
+        if not_modified(headers, etag, st.st_mtime):
+            await send({"type": "http.response.start", "status": 304, "headers": base})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+        size = st.st_size
+        status, start, end = 200, 0, size - 1
+        rng = None
+        if not compressible and _if_range_ok(headers, etag, last_modified):
+            rng = byte_range(headers.get("range"), size)
+        if rng is False:
+            await _plain(send, 416, b"Range Not Satisfiable", base + [(b"content-range", f"bytes */{size}".encode())])
+            return
+        if rng:
+            status, (start, end) = 206, rng
+            base.append((b"content-range", f"bytes {start}-{end}/{size}".encode()))
+        length = end - start + 1 if size else 0
+
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": base + [
+                (b"content-type", content_type.encode()),
+                (b"content-length", str(length).encode()),
+            ],
+        })
+        if scope["method"] == "HEAD" or length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await _send_body(scope, send, full, start, length, size, zero_copy=not compressible)
+
+
+async def _plain(send, status: int, body: bytes, headers: Optional[list] = None) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": (headers or []) + [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def _send_body(scope, send, path: Path, start: int, length: int, size: int, zero_copy: bool) -> None:
+    extensions = scope.get("extensions") or {}
+    f = await run_in_threadpool(open, path, "rb")
+    try:
+        if zero_copy and "http.response.zerocopysend" in extensions:
+            # sendfile(2): el kernel copia del archivo al socket
+            await send({"type": "http.response.zerocopysend", "file": f, "offset": start, "count": length})
+            return
+        if zero_copy and "http.response.pathsend" in extensions and length == size:
+            await send({"type": "http.response.pathsend", "path": str(path)})
+            return
+        await run_in_threadpool(f.seek, start)
+        remaining = length
+        while remaining > 0:
+            chunk = await run_in_threadpool(f.read, min(CHUNK_SIZE, remaining))
+            if not chunk:   # se truncó mientras se servía
+                break
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b""})
+    finally:
+        await run_in_threadpool(f.close)
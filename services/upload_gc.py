@@ -0,0 +1,185 @@
+"""
+Recolector de subidas huérfanas en UPLOADS_DIR.
+
+Quedan archivos sin referencia cuando se reemplaza una foto/logo subido antes del
+almacenamiento por contenido (uuid por vendor), cuando se borraba un vendor, o cuando
+una subida se escribió pero la transacción falló (413/429 tras escribir, rollback...).
+
+- Referencias (una consulta por tabla): products.image_url, vendor_brandings.logo_url,
+  settings.logo_url / settings.hero_image_url y upload_blobs con refcount > 0.
+  Un derivado (<nombre>-<ancho>.<ext>, services/images.py) vive mientras su original.
+- Recorrido incremental: orden fijo (DFS por nombre) con un cursor en
+  UPLOADS_DIR/.gc-cursor; cada corrida revisa como mucho `max_files` archivos y la
+  siguiente sigue desde ahí (I/O acotado por corrida). Al terminar vuelve a empezar.
+- Solo se borra lo no referenciado con mtime más viejo que el período de gracia
+  (una subida en curso todavía no llegó a la DB). .incoming/*.part viejos también.
+- dry_run: reporta sin borrar ni mover el cursor.
+- No se tocan stores/ (export estático) ni legacy/ (enlaces de /static/uploads).
+- Solo backend local (storage.py). Con S3 no hace nada: los incoming/ abandonados los
+  expira una regla de lifecycle del bucket y los blobs se borran al soltar la última referencia.
+
+Uso: python3 -m scripts.gc_uploads [--dry-run] [--max-files N] [--grace-hours H]
+"""
+
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Set, Tuple
+
+from sqlmodel import Session, select, delete
+
+from models import Product, VendorBranding, UploadBlob, UploadManifest
+from storage_local import UPLOADS_DIR, CAS_DIR, INCOMING_DIR
+from services.uploads import url_to_rel
+from storage import get_storage
+
+log = logging.getLogger("uvicorn.error")
+
+GC_GRACE_SECONDS = int(os.getenv("UPLOAD_GC_GRACE_SECONDS", str(24 * 3600)))
+GC_MAX_FILES = int(os.getenv("UPLOAD_GC_MAX_FILES", "5000"))
+CURSOR_FILE = UPLOADS_DIR / ".gc-cursor"
+
+SKIP_DIRS = {"stores", "legacy"}
+_VARIANT_RE = re.compile(r"^(?P<stem>.+)-\d{1,5}$")
+
+
+@dataclass
+class GCReport:
+    scanned: int = 0
+    referenced: int = 0
+    too_new: int = 0
+    deleted: List[str] = field(default_factory=list)   # rutas relativas (o candidatas en dry-run)
+    bytes: int = 0
+    cursor: str = ""
+    complete: bool = False
+    dry_run: bool = False
+
+# ============ Referencias ============
+
+def _key(rel: str) -> Tuple[str, str]:
+    """(carpeta, nombre sin extensión ni sufijo de ancho): el original y sus derivados comparten clave."""
+    folder, _, name = rel.rpartition("/")
+    stem = name.rsplit(".", 1)[0]
+    return folder, stem
+
+def referenced_keys(session: Session) -> Set[Tuple[str, str]]:
+    urls = list(session.exec(select(Product.image_url).where(Product.image_url.is_not(None))).all())
+    for logo_url, settings in session.exec(select(VendorBranding.logo_url, VendorBranding.settings)).all():
+        urls.append(logo_url)
+        if isinstance(settings, dict):
+            urls.extend([settings.get("logo_url"), settings.get("hero_image_url")])
+    keys = {_key(rel) for rel in map(url_to_rel, urls) if rel}
+    for digest in session.exec(select(UploadBlob.digest).where(UploadBlob.refcount > 0)).all():
+        keys.add((f"{CAS_DIR}/{digest[:2]}", digest))
+    return keys
+
+def _is_referenced(rel: str, keys: Set[Tuple[str, str]]) -> bool:
+    folder, stem = _key(rel)
+    if (folder, stem) in keys:
+        return True
+    m = _VARIANT_RE.match(stem)
+    return bool(m) and (folder, m.group("stem")) in keys
+
+# ============ Recorrido ============
+
+def _walk(rel_dir: Tuple[str, ...], cursor: Tuple[str, ...]) -> Iterator[Tuple[Tuple[str, ...], os.DirEntry]]:
+    """Archivos bajo UPLOADS_DIR en orden DFS por nombre, estrictamente después de `cursor`."""
+    try:
+        entries = sorted(os.scandir(UPLOADS_DIR.joinpath(*rel_dir)), key=lambda e: e.name)
+    except OSError:
+        return
+    for entry in entries:
+        parts = rel_dir + (entry.name,)
+        if entry.is_dir(follow_symlinks=False):
+            if not rel_dir and (entry.name in SKIP_DIRS or (entry.name.startswith(".") and entry.name != INCOMING_DIR.name)):
+                continue
+            if cursor and parts < cursor[:len(parts)]:
+                continue   # subárbol completo antes del cursor: ni se lista
+            yield from _walk(parts, cursor)
+        elif entry.is_file(follow_symlinks=False):
+            if not rel_dir and entry.name.startswith("."):
+                continue   # .gc-cursor y similares
+            if cursor and parts <= cursor:
+                continue
+            yield parts, entry
+
+def _read_cursor() -> Tuple[str, ...]:
+    try:
+        raw = CURSOR_FILE.read_text().strip()
+    except FileNotFoundError:
+        return ()
+    return tuple(raw.split("/")) if raw else ()
+
+def _write_cursor(parts: Tuple[str, ...]) -> None:
+    tmp = CURSOR_FILE.with_name(CURSOR_FILE.name + ".tmp")
+    tmp.write_text("/".join(parts))
+    os.replace(tmp, CURSOR_FILE)
+
+# ============ Corrida ============
+
+def run_gc(
+    session: Session,
+    *,
+    dry_run: bool = False,
+    max_files: int = GC_MAX_FILES,
+    grace_seconds: int = GC_GRACE_SECONDS,
+) -> GCReport:
+    """Revisa hasta `max_files` archivos (0 = todos) desde el cursor y borra los huérfanos viejos."""
+    report = GCReport(dry_run=dry_run)
+    if not get_storage().is_local:
+        log.info("[upload_gc] backend remoto: nada que recorrer en UPLOADS_DIR")
+        report.complete = True
+        return report
+    keys = referenced_keys(session)
+    cutoff = time.time() - grace_seconds
+    cursor = _read_cursor()
+    last = cursor
+    orphan_digests = set()
+
+    walker = _walk((), cursor)
+    for parts, entry in walker:
+        last = parts
+        report.scanned += 1
+        rel = "/".join(parts)
+        in_incoming = parts[0] == INCOMING_DIR.name
+        if not in_incoming and _is_referenced(rel, keys):
+            report.referenced += 1
+        else:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                st = None
+            if st is not None and st.st_mtime >= cutoff:
+                report.too_new += 1
+            elif st is not None:
+                report.deleted.append(rel)
+                report.bytes += st.st_size
+                if parts[0] == CAS_DIR:
+                    orphan_digests.add(_key(rel)[1].split("-")[0])
+                if not dry_run:
+                    Path(entry.path).unlink(missing_ok=True)
+        if max_files and report.scanned >= max_files:
+            break
+    else:
+        report.complete = True
+        last = ()
+
+    if not dry_run:
+        if report.deleted:
+            # el manifest no debería tener huérfanos; si quedó alguno (drift), se limpia
+            session.exec(delete(UploadManifest).where(UploadManifest.path.in_(report.deleted)))
+            session.commit()
+        if orphan_digests:
+            # filas sin referencias (refcount 0) de blobs cuyo archivo ya no existe
+            session.exec(delete(UploadBlob).where(UploadBlob.digest.in_(orphan_digests)).where(UploadBlob.refcount <= 0))
+            session.commit()
+        _write_cursor(last)
+    report.cursor = "/".join(last)
+    log.info(
+        f"[upload_gc] {'dry-run ' if dry_run else ''}revisados={report.scanned} "
+        f"huérfanos={len(report.deleted)} ({report.bytes} bytes) completo={report.complete}"
+    )
+    return report
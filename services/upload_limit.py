@@ -0,0 +1,79 @@
+"""
+Límite duro del body de las subidas (multipart/form-data), ANTES de que Starlette lo parsee.
+
+FastAPI lee y guarda en un temporal todo el multipart antes de llamar a la ruta, así que
+el tope de storage_local.stream_upload() (MAX_UPLOAD_BYTES) llega tarde: el servidor ya
+recibió el body entero. Este middleware:
+
+- responde 413 sin leer nada si Content-Length ya supera el tope;
+- si no (o si viene chunked), cuenta los bytes a medida que llegan y corta con 413 apenas
+  se pasa, sin dejar que el parser siga recibiendo.
+
+Tope = MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD (boundaries, headers de cada parte y los
+campos de texto del formulario). Cada formulario de la app sube un solo archivo.
+Las subidas directas al bucket (routers/direct_uploads.py) no pasan por acá.
+"""
+
+import os
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from storage_local import MAX_UPLOAD_BYTES, UploadTooLarge
+
+MULTIPART_OVERHEAD = int(os.getenv("MULTIPART_OVERHEAD", str(64 * 1024)))
+
+
+class UploadLimitMiddleware:
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").lower().startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            declared = int(headers.get("content-length", ""))
+        except ValueError:
+            declared = None
+        if declared is not None and declared > self.max_bytes:
+            await _too_large(scope, receive, send)
+            return
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise UploadTooLarge()   # lo convierte en 413 el manejo de HTTPException de la app
+            return message
+
+        async def tracked_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except UploadTooLarge:
+            if started:
+                raise
+            await _too_large(scope, receive, send)
+
+
+async def _too_large(scope, receive, send) -> None:
+    exc = UploadTooLarge()
+    # Connection: close -> el servidor no intenta leer el resto del body para reusar la conexión
+    response = JSONResponse({"detail": exc.detail}, status_code=413, headers={"Connection": "close"})
+    await response(scope, receive, send)
@@ -0,0 +1,333 @@
+"""
+Subidas direccionadas por contenido y su conteo de referencias (tabla upload_blobs).
+
+- storage_local.stream_upload() guarda los bytes en cas/<ab>/<sha256>.<ext> (una sola
+  copia por contenido, URL estable e inmutable).
+- ingest_image() suma una referencia y genera los derivados solo la primera vez que
+  aparece ese contenido; las siguientes subidas de la misma foto los reutilizan.
+- release() resta una referencia (producto borrado, foto/logo reemplazado). En 0 se
+  borra la fila y, DESPUÉS del commit, el archivo y sus derivados.
+- refcount (blobs) y refs (manifest) se cambian siempre con UPDATE ... SET n = n ± 1 y
+  el alta es un INSERT ... ON CONFLICT DO NOTHING: varios workers (o el job de
+  re-optimización) pueden sumar/restar referencias a la vez sin perder cuentas ni chocar
+  con la PK / uq_upload_manifest_owner_path.
+- URLs viejas (uuid por vendor, legacy/) no están en la tabla: release() devuelve
+  False y el llamador decide como antes.
+- Manifest por vendor (tabla upload_manifest): cada referencia suma/resta en la fila
+  (vendor, archivo). El uso de disco es un SUM indexado (storage_usage) y la cuota
+  (User.storage_quota_mb o VENDOR_STORAGE_QUOTA_MB) se valida al subir (413).
+  Backfill de lo ya subido: python3 -m scripts.backfill_upload_manifest
+- Los bytes viven en el backend de storage.py (disco local o bucket S3). Con S3 el
+  navegador puede subir directo al bucket: ingest_key() toma la clave de incoming/.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import event, func, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, select, delete
+
+from models import Product, VendorBranding, UploadBlob, UploadManifest, User
+from services import images, image_pool
+from storage import INCOMING_PREFIX, IncomingTooLarge, finalize_incoming, get_storage
+from storage_local import RASTER_TYPES, StoredUpload, UnsupportedUpload, UploadTooLarge, stream_upload
+
+log = logging.getLogger("uvicorn.error")
+
+VENDOR_STORAGE_QUOTA_MB = int(os.getenv("VENDOR_STORAGE_QUOTA_MB", "200"))   # 0 = sin límite
+
+_CAS_KEY_RE = re.compile(r"^cas/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})\.[a-z0-9]+$")
+_INCOMING_KEY_RE = re.compile(rf"^{INCOMING_PREFIX}/(?P<owner>\d+)/[0-9a-f]{{32}}$")
+
+
+def url_to_rel(url: Optional[str]) -> Optional[str]:
+    """URL de una subida -> clave en el backend ('/uploads/a/b.png' -> 'a/b.png'; S3: su URL pública)."""
+    return get_storage().key_for_url(url) if url else None
+
+def digest_of(url: Optional[str]) -> Optional[str]:
+    """sha256 de una subida cas/... (None si es una subida vieja u otra URL)."""
+    m = _CAS_KEY_RE.match(url_to_rel(url) or "")
+    return m.group("digest") if m else None
+
+def _insert_ignore(session: Session, row: SQLModel, keys: Tuple[str, ...]) -> None:
+    """INSERT de `row` (instancia sin agregar a la sesión) salvo que ya exista otra con las mismas `keys`."""
+    values = {c.name: getattr(row, c.name) for c in row.__table__.columns if getattr(row, c.name) is not None}
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        try:
+            with session.begin_nested():   # otros motores: savepoint; si otro la insertó primero, se usa esa
+                session.exec(insert(type(row)).values(**values))
+        except IntegrityError:
+            pass
+        return
+    session.exec(dialect_insert(type(row)).values(**values).on_conflict_do_nothing(index_elements=list(keys)))
+
+# ============ Cuotas ============
+
+class QuotaExceeded(HTTPException):
+    def __init__(self, quota_mb: int) -> None:
+        super().__init__(status_code=413, detail=f"Superaste tu espacio de almacenamiento ({quota_mb} MB)")
+
+
+def storage_usage(session: Session, owner_id: int) -> int:
+    """Bytes que ocupan las subidas del vendor (SUM sobre ix_upload_manifest_owner_bytes)."""
+    total = session.exec(
+        select(func.coalesce(func.sum(UploadManifest.bytes), 0)).where(UploadManifest.owner_id == owner_id)
+    ).one()
+    return int(total or 0)
+
+def quota_bytes(session: Session, owner_id: int) -> int:
+    """Cuota del vendor en bytes (0 = sin límite)."""
+    user = session.get(User, owner_id)
+    mb = user.storage_quota_mb if user is not None and user.storage_quota_mb is not None else VENDOR_STORAGE_QUOTA_MB
+    return max(0, mb) * 1024 * 1024
+
+def usage_summary(session: Session, owner_id: int) -> Dict[str, int]:
+    return {"used_bytes": storage_usage(session, owner_id), "quota_bytes": quota_bytes(session, owner_id)}
+
+# ============ Manifest ============
+
+def _manifest_row(session: Session, owner_id: int, rel: str) -> Optional[UploadManifest]:
+    return session.exec(
+        select(UploadManifest).where(UploadManifest.owner_id == owner_id).where(UploadManifest.path == rel)
+    ).first()
+
+def _disk_bytes(rel: str, variants: Optional[dict]) -> int:
+    """Original + derivados en el backend."""
+    backend = get_storage()
+    return sum(backend.size(key) or 0 for key in [rel] + images.variant_keys(rel, variants))
+
+def add_ref(
+    session: Session,
+    owner_id: int,
+    url: str,
+    *,
+    variants: Optional[dict] = None,
+    digest: Optional[str] = None,
+) -> None:
+    """Suma una referencia del vendor a `url` en el manifest (crea la fila la primera vez)."""
+    rel = url_to_rel(url)
+    if rel is None:
+        return
+    if _bump_refs(session, owner_id, rel, 1):
+        return
+    row = UploadManifest(
+        owner_id=owner_id,
+        path=rel,
+        bytes=_disk_bytes(rel, variants),
+        content_type=mimetypes.guess_type(rel)[0],
+        digest=digest if digest is not None else digest_of(url),
+        refs=0,
+    )
+    _insert_ignore(session, row, ("owner_id", "path"))   # refs=0: la primera referencia concurrente no choca
+    _bump_refs(session, owner_id, rel, 1)
+
+def drop_ref(session: Session, owner_id: int, url: Optional[str]) -> None:
+    rel = url_to_rel(url)
+    if rel is None or not _bump_refs(session, owner_id, rel, -1):
+        return
+    session.exec(
+        delete(UploadManifest)
+        .where(UploadManifest.owner_id == owner_id)
+        .where(UploadManifest.path == rel)
+        .where(UploadManifest.refs <= 0)
+    )
+
+def _bump_refs(session: Session, owner_id: int, rel: str, delta: int) -> bool:
+    """refs += delta en la fila (vendor, archivo), atómico. False si no existe."""
+    result = session.exec(
+        update(UploadManifest)
+        .where(UploadManifest.owner_id == owner_id)
+        .where(UploadManifest.path == rel)
+        .values(refs=UploadManifest.refs + delta)
+    )
+    return result.rowcount > 0
+
+def _file_sha256(rel: str) -> Optional[str]:
+    h = hashlib.sha256()
+    try:
+        with get_storage().local_copy(rel) as path, open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+def rebuild_manifest(session: Session, owner_id: Optional[int] = None) -> int:
+    """
+    Recalcula upload_manifest desde las referencias (products, vendor_brandings) y el
+    backend: una fila por (vendor, archivo existente). Ajusta también upload_blobs.refcount.
+    Para poblar la tabla la primera vez o corregir drift. NO hace commit.
+    """
+    backend = get_storage()
+    refs: Dict[Tuple[int, str], int] = {}
+    variants_of: Dict[str, Optional[dict]] = {}
+
+    def count(oid: int, url: Optional[str], variants: Optional[dict] = None) -> None:
+        rel = url_to_rel(url)
+        if rel and backend.exists(rel):
+            refs[(oid, rel)] = refs.get((oid, rel), 0) + 1
+            variants_of.setdefault(rel, variants)
+
+    q = select(Product.owner_id, Product.image_url, Product.image_variants).where(Product.image_url.is_not(None))
+    b = select(VendorBranding.owner_id, VendorBranding.logo_url, VendorBranding.settings)
+    wipe = delete(UploadManifest)
+    if owner_id is not None:
+        q = q.where(Product.owner_id == owner_id)
+        b = b.where(VendorBranding.owner_id == owner_id)
+        wipe = wipe.where(UploadManifest.owner_id == owner_id)
+    for oid, url, variants in session.exec(q).all():
+        count(oid, url, variants)
+    for oid, logo_url, settings in session.exec(b).all():
+        settings = settings if isinstance(settings, dict) else {}
+        for url in {logo_url, settings.get("logo_url"), settings.get("hero_image_url")} - {None, ""}:
+            count(oid, url, settings.get("logo_variants") if url == settings.get("logo_url") else None)
+
+    session.exec(wipe)
+    per_digest: Dict[str, int] = {}
+    for (oid, rel), n in refs.items():
+        url = backend.url(rel)
+        digest = digest_of(url) or _file_sha256(rel)
+        session.add(UploadManifest(
+            owner_id=oid,
+            path=rel,
+            bytes=_disk_bytes(rel, variants_of.get(rel)),
+            content_type=mimetypes.guess_type(rel)[0],
+            digest=digest,
+            refs=n,
+        ))
+        if digest_of(url):
+            per_digest[digest] = per_digest.get(digest, 0) + n
+    if owner_id is None:
+        for blob in session.exec(select(UploadBlob)).all():
+            blob.refcount = per_digest.get(blob.digest, 0)
+            session.add(blob)
+    return len(refs)
+
+# ============ Alta / baja ============
+
+async def ingest_image(
+    session: Session,
+    owner_id: int,
+    upload: UploadFile,
+    allowed: Iterable[str] = RASTER_TYPES,
+) -> Tuple[str, Optional[dict]]:
+    """
+    Guarda la subida (deduplicada) y suma una referencia del vendor. Devuelve (url, variants).
+    Los derivados se generan en el pool solo si el contenido es nuevo (429 si está saturado).
+    413 si la subida no entra en la cuota del vendor.
+    """
+    quota, used = check_quota(session, owner_id)
+    stored = await stream_upload(upload, allowed)
+    return await _register(session, owner_id, stored, quota, used)
+
+async def ingest_key(
+    session: Session,
+    owner_id: int,
+    key: str,
+    allowed: Iterable[str] = RASTER_TYPES,
+) -> Tuple[str, Optional[dict]]:
+    """
+    Como ingest_image() pero para una subida directa al bucket (routers/direct_uploads.py):
+    `key` es incoming/<owner_id>/<id>. La validación, el hash y la copia a cas/ corren en
+    el pool (storage.finalize_incoming), no en el worker web.
+    """
+    m = _INCOMING_KEY_RE.match(key or "")
+    if m is None or int(m.group("owner")) != owner_id:
+        raise HTTPException(status_code=400, detail="Subida inválida")
+    quota, used = check_quota(session, owner_id)
+    try:
+        stored = await image_pool.run(finalize_incoming, key, tuple(allowed))
+    except FileNotFoundError:
+        raise HTTPException(status_code=400, detail="La subida no existe o expiró, vuelve a elegir el archivo")
+    except IncomingTooLarge:
+        raise UploadTooLarge()
+    if stored is None:
+        raise UnsupportedUpload()
+    return await _register(session, owner_id, stored, quota, used)
+
+def check_quota(session: Session, owner_id: int) -> Tuple[int, int]:
+    """(cuota, uso) en bytes; 413 si el vendor ya no tiene espacio (antes de recibir bytes)."""
+    quota = quota_bytes(session, owner_id)
+    used = storage_usage(session, owner_id) if quota else 0
+    if quota and used >= quota:
+        raise QuotaExceeded(quota // (1024 * 1024))
+    return quota, used
+
+async def _register(
+    session: Session,
+    owner_id: int,
+    stored: StoredUpload,
+    quota: int,
+    used: int,
+) -> Tuple[str, Optional[dict]]:
+    blob = session.get(UploadBlob, stored.digest)
+    already_owned = _manifest_row(session, owner_id, url_to_rel(stored.url)) is not None
+    if quota and not already_owned and used + stored.size > quota:
+        if blob is None:   # nadie más usa estos bytes: no queda huérfano
+            get_storage().delete(url_to_rel(stored.url))
+        raise QuotaExceeded(quota // (1024 * 1024))
+
+    if blob is None:
+        # contenido nuevo (o lo está registrando otra subida en paralelo: los derivados son iguales)
+        variants = await image_pool.run(images.make_variants_for_url, stored.url)
+        blob = UploadBlob(digest=stored.digest, ext=stored.ext, size=stored.size, variants=variants, refcount=0)
+    ref_blob(session, blob)
+    add_ref(session, owner_id, stored.url, variants=blob.variants, digest=stored.digest)
+    return stored.url, blob.variants
+
+def _bump_refcount(session: Session, digest: str, delta: int) -> bool:
+    """refcount += delta en la DB (atómico). False si no hay fila para `digest`."""
+    result = session.exec(
+        update(UploadBlob).where(UploadBlob.digest == digest).values(refcount=UploadBlob.refcount + delta)
+    )
+    return result.rowcount > 0
+
+def ref_blob(session: Session, blob: UploadBlob) -> None:
+    """Suma una referencia a blob.digest; si la fila no existe la inserta con los datos de `blob`."""
+    if not _bump_refcount(session, blob.digest, 1):
+        _insert_ignore(session, blob, ("digest",))   # refcount=0: el alta concurrente no choca con la PK
+        _bump_refcount(session, blob.digest, 1)
+
+def release(session: Session, owner_id: int, url: Optional[str]) -> bool:
+    """Resta una referencia del vendor a `url`. False si no es una subida direccionada por contenido."""
+    drop_ref(session, owner_id, url)
+    digest = digest_of(url)
+    if digest is None:
+        return False
+    if not _bump_refcount(session, digest, -1):
+        return True
+    row = session.exec(select(UploadBlob.refcount, UploadBlob.variants).where(UploadBlob.digest == digest)).first()
+    if row is None or row[0] > 0:
+        return True
+    # solo si sigue en 0: una subida concurrente pudo sumar una referencia entre medio
+    gone = session.exec(delete(UploadBlob).where(UploadBlob.digest == digest).where(UploadBlob.refcount <= 0))
+    if gone.rowcount:
+        variants = row[1]
+        event.listen(session, "after_commit", lambda _s: _remove_files(digest, url, variants), once=True)
+    return True
+
+def release_many(session: Session, owner_id: int, urls: Iterable[Optional[str]]) -> None:
+    for url in urls:
+        release(session, owner_id, url)
+
+def _remove_files(digest: str, url: str, variants: Optional[dict]) -> None:
+    from db import SessionLocal
+    try:
+        with SessionLocal() as s:
+            if s.get(UploadBlob, digest) is not None:
+                return   # otra subida del mismo contenido lo volvió a referenciar
+        get_storage().delete(url_to_rel(url))
+        images.remove_variants(url, variants)
+    except Exception:
+        log.exception(f"[uploads] no se pudo borrar el blob {digest}")
@@ -0,0 +1,70 @@
+/*
+ * Subidas directas al bucket (STORAGE_BACKEND=s3).
+ *
+ * <input type="file" name="image" data-direct-upload="image_key">
+ *
+ * Al enviar el formulario: pide un POST firmado (/admin/uploads/presign), sube el archivo
+ * al bucket y manda solo la clave en un campo oculto (image_key / logo_key). El input de
+ * archivo se deshabilita para que los bytes no pasen por el servidor.
+ * Si no hay subidas directas (backend local: 404) o algo falla, el formulario se envía
+ * como siempre, con el archivo adjunto.
+ */
+(function () {
+  'use strict';
+
+  async function presign() {
+    const res = await fetch('/admin/uploads/presign', { method: 'POST', credentials: 'same-origin' });
+    if (res.status === 404) return null;
+    if (!res.ok) {
+      let detail = 'No se pudo preparar la subida';
+      try { detail = (await res.json()).detail || detail; } catch (e) {}
+      throw new Error(detail);
+    }
+    return res.json();
+  }
+
+  async function upload(input) {
+    const file = input.files[0];
+    const target = await presign();
+    if (!target) return null;
+    if (file.size > target.max_bytes) {
+      throw new Error('Archivo demasiado grande (máx. ' + Math.round(target.max_bytes / 1048576) + ' MB)');
+    }
+    const body = new FormData();
+    Object.entries(target.fields).forEach(([k, v]) => body.append(k, v));
+    body.append('file', file);   // S3 exige el archivo al final
+    const res = await fetch(target.url, { method: 'POST', body: body });
+    if (!res.ok) throw new Error('Falló la subida de la imagen');
+    return target.key;
+  }
+
+  document.addEventListener('submit', async (ev) => {
+    const form = ev.target;
+    if (form.dataset.directUploadDone) return;
+    const inputs = Array.from(form.querySelectorAll('input[type=file][data-direct-upload]'))
+      .filter((i) => i.files && i.files.length);
+    if (!inputs.length) return;
+
+    ev.preventDefault();
+    const buttons = form.querySelectorAll('[type=submit]');
+    buttons.forEach((b) => { b.disabled = true; });
+    try {
+      for (const input of inputs) {
+        const key = await upload(input);
+        if (!key) break;   // sin subidas directas: envío normal
+        const hidden = document.createElement('input');
+        hidden.type = 'hidden';
+        hidden.name = input.dataset.directUpload;
+        hidden.value = key;
+        form.appendChild(hidden);
+        input.disabled = true;
+      }
+    } catch (err) {
+      buttons.forEach((b) => { b.disabled = false; });
+      alert(err.message);
+      return;
+    }
+    form.dataset.directUploadDone = '1';
+    form.submit();
+  });
+})();
@@ -0,0 +1,105 @@
+"""
+Backend de almacenamiento de las subidas (fotos de producto, logos y sus derivados).
+
+STORAGE_BACKEND elige dónde viven los bytes:
+  local  (default) storage_local.LocalStorage: UPLOADS_DIR servido por el mount /uploads.
+                   Un solo nodo (o un volumen compartido).
+  s3               storage_s3.S3Storage: bucket S3-compatible (AWS, MinIO, R2...). Cualquier
+                   réplica de la app ve los mismos archivos; se sirven desde S3_PUBLIC_URL.
+
+Las claves son rutas relativas con "/" (cas/ab/<sha256>.png, incoming/<vendor>/<id>), iguales
+en los dos backends: lo que se guarda en la DB (upload_manifest.path) no depende del backend.
+
+Subidas directas (solo s3): el navegador pide un POST firmado (routers/direct_uploads.py),
+sube a incoming/<vendor>/<id> y el formulario manda solo la clave. finalize_incoming()
+corre en el pool de imágenes: valida, hashea y copia a cas/; el worker web nunca toca los bytes.
+Los incoming/ abandonados los borra una regla de lifecycle del bucket (p.ej. 1 día).
+"""
+
+import hashlib
+import mimetypes
+import os
+import threading
+from pathlib import Path
+from typing import ContextManager, Iterable, Optional, Protocol
+
+from storage_local import MAX_UPLOAD_BYTES, StoredUpload, cas_rel, sniff_ext
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").strip().lower()
+INCOMING_PREFIX = "incoming"
+
+
+class StorageBackend(Protocol):
+    is_local: bool            # True: las claves son archivos bajo UPLOADS_DIR
+    supports_presign: bool    # True: presign_upload() disponible
+
+    def put(self, key: str, src: Path, content_type: Optional[str] = None, move: bool = False) -> None: ...
+    def get(self, key: str) -> bytes: ...
+    def delete(self, key: str) -> None: ...
+    def exists(self, key: str) -> bool: ...
+    def size(self, key: str) -> Optional[int]: ...
+    def version(self, key: str) -> Optional[str]: ...
+    def url(self, key: str) -> str: ...
+    def key_for_url(self, url: Optional[str]) -> Optional[str]: ...
+    def local_copy(self, key: str) -> ContextManager[Path]: ...
+    # solo si supports_presign (LocalStorage no lo implementa)
+    def presign_upload(self, key: str, max_bytes: int, expires: int) -> dict: ...
+
+
+_backend: Optional[StorageBackend] = None
+_lock = threading.Lock()
+
+def get_storage() -> StorageBackend:
+    """Backend del proceso (uno por proceso: web, pool de imágenes, scripts)."""
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                if STORAGE_BACKEND == "s3":
+                    from storage_s3 import S3Storage
+                    _backend = S3Storage.from_env()
+                elif STORAGE_BACKEND == "local":
+                    from storage_local import LocalStorage
+                    _backend = LocalStorage()
+                else:
+                    raise RuntimeError(f"STORAGE_BACKEND desconocido: {STORAGE_BACKEND!r} (local | s3)")
+    return _backend
+
+def incoming_key(owner_id: int, token: str) -> str:
+    return f"{INCOMING_PREFIX}/{owner_id}/{token}"
+
+# ============ Subidas directas ============
+
+class IncomingTooLarge(Exception):
+    """La subida directa supera MAX_UPLOAD_BYTES (sale del pool; el llamador responde 413)."""
+
+
+def finalize_incoming(key: str, allowed: Iterable[str]) -> Optional[StoredUpload]:
+    """
+    (Job del pool) incoming/<vendor>/<id> -> cas/<ab>/<sha256>.<ext>, igual que stream_upload():
+    extensión por firma, sha256 y una sola copia por contenido. Borra el incoming.
+    None si el archivo no es de un tipo permitido; IncomingTooLarge si supera MAX_UPLOAD_BYTES.
+    FileNotFoundError si la clave no existe (subida no terminada o expirada).
+    """
+    backend = get_storage()
+    with backend.local_copy(key) as path:
+        size = path.stat().st_size
+        if size > MAX_UPLOAD_BYTES:
+            backend.delete(key)
+            raise IncomingTooLarge(key)
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            head = f.read(512)
+            h.update(head)
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+        ext = sniff_ext(head)
+        if ext not in allowed:
+            backend.delete(key)
+            return None
+        digest = h.hexdigest()
+        dest = cas_rel(digest, ext).as_posix()
+        if not backend.exists(dest):
+            backend.put(dest, path, mimetypes.guess_type(dest)[0])
+    backend.delete(key)
+    return StoredUpload(backend.url(dest), digest, ext, size)
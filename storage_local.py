@@ -1,6 +1,12 @@
 
-import os, uuid, mimetypes, logging, re
+import os, uuid, mimetypes, logging, re, hashlib, shutil
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+from urllib.parse import urlparse
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
 
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -42,4 +48,185 @@ def save_product_bytes(vendor_slug: str, content: bytes, filename: str) -> str:
     dest = UPLOADS_DIR / rel
     dest.parent.mkdir(parents=True, exist_ok=True)
     dest.write_bytes(content)
-    return f"/uploads/{rel.as_posix()}"
\ No newline at end of file
+    return f"/uploads/{rel.as_posix()}"
+
+# ============ Ingesta en streaming ============
+#
+# Las rutas de subida ya no hacen `await upload.read()` (archivo entero en RAM):
+# stream_upload() copia por bloques a UPLOADS_DIR/.incoming/, decide la extensión por
+# los primeros bytes (no por el nombre que manda el cliente) y recién al final hace un
+# rename atómico al destino final. El tope duro del body lo aplica antes
+# services/upload_limit.UploadLimitMiddleware mientras llega (Starlette guarda el
+# multipart entero antes de llamar a la ruta); el chequeo de acá es el del archivo en sí.
+#
+# El destino es direccionado por contenido: cas/<ab>/<sha256>.<ext>. Volver a subir
+# la misma foto no crea otra copia y la URL es estable (cache inmutable/CDN).
+# Las referencias se cuentan en la tabla upload_blobs (services/uploads.py).
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK = 256 * 1024
+INCOMING_DIR = UPLOADS_DIR / ".incoming"   # mismo filesystem -> os.replace atómico
+CAS_DIR = "cas"
+
+RASTER_TYPES = (".png", ".jpg", ".gif", ".webp")
+LOGO_TYPES = RASTER_TYPES + (".svg",)
+
+
+class UploadTooLarge(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(status_code=413, detail=f"Archivo demasiado grande (máx. {round(MAX_UPLOAD_BYTES / (1024 * 1024), 1):g} MB)")
+
+
+class UnsupportedUpload(HTTPException):
+    def __init__(self, detail: str = "Formato de imagen no soportado") -> None:
+        super().__init__(status_code=415, detail=detail)
+
+
+def sniff_ext(head: bytes) -> Optional[str]:
+    """Extensión según la firma del archivo (None si no es un formato conocido)."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return ".gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if (text.startswith(b"<svg") or text.startswith(b"<?xml")) and b"<svg" in text:
+        return ".svg"
+    return None
+
+class StoredUpload(NamedTuple):
+    url: str        # URL pública (local: /uploads/cas/<ab>/<digest><ext>)
+    digest: str     # sha256 hex
+    ext: str
+    size: int
+
+
+def cas_rel(digest: str, ext: str) -> Path:
+    return Path(CAS_DIR) / digest[:2] / f"{digest}{ext}"
+
+def _open_incoming():
+    INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = INCOMING_DIR / f"{uuid.uuid4().hex}.part"
+    return tmp, open(tmp, "wb")
+
+def _finish(tmp: Path, key: str, content_type: Optional[str]) -> str:
+    from storage import get_storage
+    backend = get_storage()
+    if backend.exists(key):
+        tmp.unlink(missing_ok=True)   # mismo contenido ya guardado: no se duplica
+    else:
+        backend.put(key, tmp, content_type, move=True)
+    return backend.url(key)
+
+async def stream_upload(upload: UploadFile, allowed: Iterable[str] = RASTER_TYPES) -> StoredUpload:
+    """
+    Guarda `upload` por bloques en <UPLOADS_DIR>/cas/<ab>/<sha256>.<ext>.
+    400 si viene vacío, 413 si supera MAX_UPLOAD_BYTES, 415 si los primeros bytes
+    no son un tipo de `allowed`. El refcount lo lleva quien la referencia (services/uploads.py).
+    """
+    head = await upload.read(UPLOAD_CHUNK)
+    if not head:
+        raise HTTPException(status_code=400, detail="Archivo vacío")
+    ext = sniff_ext(head)
+    if ext not in allowed:
+        raise UnsupportedUpload()
+
+    tmp, f = await run_in_threadpool(_open_incoming)
+    h = hashlib.sha256()
+
+    def write(chunk: bytes) -> None:
+        f.write(chunk)
+        h.update(chunk)
+
+    try:
+        size = 0
+        chunk = head
+        while chunk:
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise UploadTooLarge()
+            await run_in_threadpool(write, chunk)
+            chunk = await upload.read(UPLOAD_CHUNK)
+        await run_in_threadpool(f.close)
+        digest = h.hexdigest()
+        key = cas_rel(digest, ext).as_posix()
+        url = await run_in_threadpool(_finish, tmp, key, mimetypes.guess_type(key)[0])
+    except BaseException:
+        f.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    return StoredUpload(url, digest, ext, size)
+
+# ============ Backend local (ver storage.py) ============
+
+# prefijo de URL -> carpeta bajo UPLOADS_DIR (mount actual, mounts viejos y
+# /static/uploads, enlazado en legacy/ al arrancar: main._migrate_legacy_static_uploads)
+_URL_PREFIXES = (
+    ("/uploads/", ""),
+    ("/vendors/", "vendors/"),
+    ("/products/", "products/"),
+    ("/static/uploads/", "legacy/"),
+)
+
+
+class LocalStorage:
+    """Archivos en UPLOADS_DIR servidos por el mount /uploads. Un solo nodo."""
+
+    is_local = True
+    supports_presign = False
+
+    def path(self, key: str) -> Path:
+        path = (UPLOADS_DIR / key).resolve()
+        if not path.is_relative_to(UPLOADS_DIR):
+            raise ValueError(f"clave fuera de UPLOADS_DIR: {key}")
+        return path
+
+    def put(self, key: str, src: Path, content_type: Optional[str] = None, move: bool = False) -> None:
+        dest = self.path(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if move:
+            os.replace(src, dest)   # StaticFiles nunca ve un archivo a medio escribir
+        else:
+            tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dest)
+
+    def get(self, key: str) -> bytes:
+        return self.path(key).read_bytes()
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self.path(key).stat().st_size
+        except OSError:
+            return None
+
+    def version(self, key: str) -> Optional[str]:
+        try:
+            st = self.path(key).stat()
+        except OSError:
+            return None
+        return f"{st.st_mtime_ns}-{st.st_size}"
+
+    def url(self, key: str) -> str:
+        return f"/uploads/{key}"
+
+    def key_for_url(self, url: Optional[str]) -> Optional[str]:
+        path = urlparse(url or "").path
+        for prefix, folder in _URL_PREFIXES:
+            if path.startswith(prefix):
+                return folder + path[len(prefix):]
+        return None
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[Path]:
+        yield self.path(key)   # ya es local: sin copia
+
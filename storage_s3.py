@@ -0,0 +1,165 @@
+"""
+Backend S3-compatible (AWS S3, MinIO, R2...). Se activa con STORAGE_BACKEND=s3.
+
+Variables:
+  S3_BUCKET               bucket (obligatorio)
+  S3_ENDPOINT_URL         endpoint no-AWS (MinIO: http://minio:9000)
+  S3_REGION               región (default us-east-1)
+  S3_ACCESS_KEY_ID / S3_SECRET_ACCESS_KEY   credenciales (si faltan: las de boto3/IAM)
+  S3_PUBLIC_URL           base pública de los objetos (CDN o bucket público); por defecto
+                          <endpoint>/<bucket> o https://<bucket>.s3.<region>.amazonaws.com
+  S3_ADDRESSING_STYLE     "path" para MinIO/stand-ins locales (default: auto)
+  S3_PRESIGN_EXPIRES      validez de las subidas firmadas en segundos (default 600)
+
+Los objetos cas/ se guardan con Cache-Control immutable (el nombre es el sha256).
+El bucket debe permitir lectura pública de cas/ y CORS POST desde el dominio del admin
+para las subidas directas; incoming/ conviene expirarlo con una regla de lifecycle.
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+from urllib.parse import urlparse
+
+try:
+    import boto3  # opcional (requirements.txt: boto3)
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover
+    boto3 = None
+
+from services.assets import IMMUTABLE
+
+S3_PRESIGN_EXPIRES = int(os.getenv("S3_PRESIGN_EXPIRES", "600"))
+
+
+def _not_found(exc: "ClientError") -> bool:
+    return exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+
+class S3Storage:
+    is_local = False
+    supports_presign = True
+
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        endpoint_url: Optional[str] = None,
+        region: str = "us-east-1",
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        public_url: Optional[str] = None,
+        addressing_style: Optional[str] = None,
+    ) -> None:
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requiere el paquete boto3")
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=Config(signature_version="s3v4", s3={"addressing_style": addressing_style or "auto"}),
+        )
+        if public_url:
+            self.public_base = public_url.rstrip("/")
+        elif endpoint_url:
+            self.public_base = f"{endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            self.public_base = f"https://{bucket}.s3.{region}.amazonaws.com"
+
+    @classmethod
+    def from_env(cls) -> "S3Storage":
+        bucket = os.getenv("S3_BUCKET")
+        if not bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 requiere S3_BUCKET")
+        return cls(
+            bucket,
+            endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+            region=os.getenv("S3_REGION", "us-east-1"),
+            access_key=os.getenv("S3_ACCESS_KEY_ID") or None,
+            secret_key=os.getenv("S3_SECRET_ACCESS_KEY") or None,
+            public_url=os.getenv("S3_PUBLIC_URL") or None,
+            addressing_style=os.getenv("S3_ADDRESSING_STYLE") or None,
+        )
+
+    def put(self, key: str, src: Path, content_type: Optional[str] = None, move: bool = False) -> None:
+        extra = {"CacheControl": IMMUTABLE}
+        if content_type:
+            extra["ContentType"] = content_type
+        self.client.upload_file(str(src), self.bucket, key, ExtraArgs=extra)
+        if move:
+            Path(src).unlink(missing_ok=True)
+
+    def get(self, key: str) -> bytes:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        except ClientError as exc:
+            if _not_found(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)   # idempotente
+
+    def _head(self, key: str) -> Optional[dict]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if _not_found(exc):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def size(self, key: str) -> Optional[int]:
+        head = self._head(key)
+        return head["ContentLength"] if head is not None else None
+
+    def version(self, key: str) -> Optional[str]:
+        head = self._head(key)
+        return head["ETag"].strip('"') if head is not None else None
+
+    def url(self, key: str) -> str:
+        return f"{self.public_base}/{key}"
+
+    def key_for_url(self, url: Optional[str]) -> Optional[str]:
+        if not url:
+            return None
+        if url.startswith(self.public_base + "/"):
+            return url[len(self.public_base) + 1:]
+        path = urlparse(url).path
+        if path.startswith("/uploads/"):   # URLs guardadas antes de migrar al bucket (mismas claves)
+            return path[len("/uploads/"):]
+        return None
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[Path]:
+        """Descarga el objeto a un directorio temporal (Pillow necesita un archivo)."""
+        tmpdir = tempfile.mkdtemp(prefix="stallio-s3-")
+        try:
+            path = Path(tmpdir) / key.rsplit("/", 1)[-1]
+            try:
+                self.client.download_file(self.bucket, key, str(path))
+            except ClientError as exc:
+                if _not_found(exc):
+                    raise FileNotFoundError(key) from exc
+                raise
+            yield path
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def presign_upload(self, key: str, max_bytes: int, expires: int = S3_PRESIGN_EXPIRES) -> dict:
+        """POST firmado a `key` con tope de tamaño: {"url", "fields"} para un form multipart."""
+        return self.client.generate_presigned_post(
+            self.bucket,
+            key,
+            Conditions=[["content-length-range", 1, max_bytes]],
+            ExpiresIn=expires,
+        )
@@ -5,13 +5,24 @@ Objetivo:
 - Evitar tener múltiples `Jinja2Templates(directory="templates")` repartidos.
 - Inyectar helpers globales (como `t` para traducciones y `locale`) en TODAS las plantillas.
 - Que todos los routers usen la misma instancia: `from templates_engine import templates`.
+- Cache de bytecode en disco (compartido entre workers y reinicios) y precompilación
+  opcional al boot (JINJA_PRECOMPILE=1), para que el primer request no compile nada.
 """
 
+import logging
+import os
+import time
+from typing import List, Tuple
+
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 
 # Importamos el helper de traducciones y el locale por defecto.
 
 from utils.i18n import t, DEFAULT_LOCALE
+from services.assets import asset
+from services import images
+from storage import get_storage
 
 # ==============
 # Instancia única
@@ -22,6 +33,27 @@ from utils.i18n import t, DEFAULT_LOCALE
 #   from templates_engine import templates
 templates = Jinja2Templates(directory="templates")
 
+# ==========================
+# Cache de bytecode (disco)
+# ==========================
+
+# Jinja guarda el código compilado de cada plantilla en este directorio; otro worker
+# (o el mismo tras un reinicio) lo carga sin volver a parsear/compilar. Si la plantilla
+# cambia, la clave del cache cambia (checksum del fuente) y se recompila sola.
+# JINJA_BYTECODE_CACHE=0 lo desactiva.
+# Se carga código compilado desde ahí: sin JINJA_CACHE_DIR se usa el directorio por
+# usuario de Jinja (/tmp/_jinja2-cache-<uid>, 0700, valida el dueño), nunca una ruta
+# fija en /tmp que otro usuario pueda crear antes. Si se define, debe ser del usuario
+# de la app (se crea con 0700).
+JINJA_BYTECODE_CACHE = os.getenv("JINJA_BYTECODE_CACHE", "1").lower() in ("1", "true", "yes")
+JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR") or None
+
+if JINJA_BYTECODE_CACHE:
+    if JINJA_CACHE_DIR:
+        os.makedirs(JINJA_CACHE_DIR, mode=0o700, exist_ok=True)
+    templates.env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+    JINJA_CACHE_DIR = templates.env.bytecode_cache.directory
+
 # ============================
 # Helpers globales para Jinja2
 # ============================
@@ -36,6 +68,56 @@ templates.env.globals["t"] = t
 #   {{ locale }}  -> "en"
 templates.env.globals["locale"] = DEFAULT_LOCALE
 
+# `asset`: URL con huella de contenido para archivos de static/ (cache inmutable).
+#   <link href="{{ asset('admin/css/sb-admin-2.min.css') }}" rel="stylesheet">
+templates.env.globals["asset"] = asset
+
+# `responsive_image`: <source>/srcset de los derivados WebP/JPEG de una subida
+# (services/images.py); `grid_sizes`: atributo sizes de la grilla pública.
+#   {% set ri = responsive_image(p.image_url, p.image_variants) %}
+templates.env.globals["responsive_image"] = images.responsive
+templates.env.globals["grid_sizes"] = images.GRID_SIZES
+# `resized`: /uploads/... -> /img/{w}x{h}/... (tamaño bajo demanda, cacheado en disco)
+#   <img src="{{ resized(p.image_url, 640) }}">
+templates.env.globals["resized"] = images.resized_url
+# `direct_uploads()`: True si el backend (storage.py) acepta subidas directas al bucket;
+# los formularios incluyen entonces admin/js/direct-upload.js.
+templates.env.globals["direct_uploads"] = lambda: get_storage().supports_presign
+
+
+# ==========================
+# Precompilación al arrancar
+# ==========================
+
+log = logging.getLogger("uvicorn.error")
+
+# Opt-in: main.py llama a precompile_templates() en el lifespan si está activo
+JINJA_PRECOMPILE = os.getenv("JINJA_PRECOMPILE", "").lower() in ("1", "true", "yes")
+
+
+def precompile_templates() -> List[Tuple[str, float]]:
+    """
+    Carga (compila o lee del cache de bytecode) todas las plantillas de templates/.
+    Devuelve [(nombre, ms)] ordenado de más lenta a más rápida y loguea un resumen.
+    Una plantilla con error de sintaxis se loguea y se sigue con el resto.
+    """
+    env = templates.env
+    timings: List[Tuple[str, float]] = []
+    start = time.perf_counter()
+    for name in env.list_templates(extensions=["html", "txt", "xml", "j2"]):
+        t0 = time.perf_counter()
+        try:
+            env.get_template(name)
+        except Exception as e:
+            log.error(f"[templates] no compila {name}: {e}")
+            continue
+        timings.append((name, (time.perf_counter() - t0) * 1000))
+    total = (time.perf_counter() - start) * 1000
+    timings.sort(key=lambda x: x[1], reverse=True)
+    slowest = ", ".join(f"{n} {ms:.1f}ms" for n, ms in timings[:3])
+    log.info(f"[templates] {len(timings)} plantillas listas en {total:.1f}ms (más lentas: {slowest})")
+    return timings
+
 
 # =====================================
 # (Opcional) Hook para futura multilengua
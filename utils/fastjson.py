@@ -0,0 +1,47 @@
+"""
+utils/fastjson.py
+
+Serialización JSON con orjson, compartida por las respuestas HTTP y los mensajes WS.
+
+- dumps(obj) -> bytes / dumps_str(obj) -> str (WebSocket send_text).
+- datetime: ISO-8601 directo desde orjson; si es naïve se asume UTC (mismo formato
+  que utils.helpers.iso_dt), así que no hace falta convertir fila por fila.
+- FastJSONResponse: clase de respuesta por defecto de la app (main.py). Las rutas
+  calientes la devuelven directamente para saltarse jsonable_encoder.
+- Tipos que orjson no conoce (modelos SQLModel/pydantic, Decimal, set...) caen a
+  jsonable_encoder.
+
+Benchmark contra el camino anterior: python3 -m scripts.bench_json
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return jsonable_encoder(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=_default, option=OPTIONS)
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
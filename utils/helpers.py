@@ -40,7 +40,11 @@ def iso_dt(dt):
 # ============ Vendors / autorización ============
 
 def get_vendor_by_slug(session: Session, UserModel: SQLModel | type, slug: str):
-    """Obtiene el vendor por slug o None."""
+    """Obtiene el vendor por slug o None (vía el cache de slugs si es models.User)."""
+    from models import User as DefaultUser  # import local para evitar ciclos
+    if UserModel is DefaultUser:
+        from services import slug_cache
+        return slug_cache.get_user_by_slug(session, slug)
     return session.exec(select(UserModel).where(UserModel.slug == slug)).first()
 
 def ensure_vendor_access(request: Request, session: Session, slug: str, UserModel=None):
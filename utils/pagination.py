@@ -0,0 +1,40 @@
+"""
+utils/pagination.py
+
+Paginación por cursor (keyset) para listados de productos.
+
+- Orden: id descendente (lo más nuevo primero). El id es monótono con created_at,
+  así que sirve de clave de orden estable sin columnas extra.
+- El cursor es el id del último elemento recibido; la página siguiente pide `id < cursor`.
+  A diferencia de OFFSET, el costo no crece con la profundidad de la página:
+  siempre es un rango sobre índice + LIMIT.
+"""
+
+from typing import List, Optional, Tuple
+
+from sqlmodel import Session
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+def clamp_limit(limit: Optional[int], default: int = DEFAULT_PAGE_SIZE) -> int:
+    """Normaliza el `limit` pedido por el cliente a [1, MAX_PAGE_SIZE]."""
+    if not limit or limit < 1:
+        return default
+    return min(int(limit), MAX_PAGE_SIZE)
+
+
+def keyset_page(session: Session, stmt, id_col, *, cursor: Optional[int], limit: int) -> Tuple[List, Optional[int]]:
+    """
+    Ejecuta `stmt` (un select sin ORDER BY/LIMIT) paginado por `id_col` descendente.
+    Devuelve (filas, next_cursor); next_cursor es None en la última página.
+    Se pide limit+1 filas para saber si hay más sin un COUNT aparte.
+    """
+    if cursor is not None:
+        stmt = stmt.where(id_col < cursor)
+    rows = session.exec(stmt.order_by(id_col.desc()).limit(limit + 1)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].id
+    return rows, None
@@ -1,6 +1,8 @@
-
-from typing import Iterable
-from models import Review
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+from sqlalchemy import update, func
+from sqlmodel import Session, select
+from models import Review, VendorRatingStats, now_utc
 
 def compute_avg_rating(reviews: Iterable[Review]) -> float:
     """
@@ -12,3 +14,97 @@ def compute_avg_rating(reviews: Iterable[Review]) -> float:
         return 0.0
     return round(sum(r.rating for r in reviews) / len(reviews), 1)
 
+# ============ Agregado por vendor (vendor_rating_stats) ============
+
+@dataclass
+class RatingSummary:
+    count: int = 0
+    avg: float = 0.0
+    histogram: Dict[int, int] = field(default_factory=lambda: {i: 0 for i in range(1, 6)})
+
+def _summary_from_counts(hist: Dict[int, int]) -> RatingSummary:
+    count = sum(hist.values())
+    total = sum(stars * n for stars, n in hist.items())
+    return RatingSummary(
+        count=count,
+        avg=round(total / count, 1) if count else 0.0,
+        histogram={i: hist.get(i, 0) for i in range(1, 6)},
+    )
+
+def _approved_histograms(session: Session, vendor_id: Optional[int] = None) -> Dict[int, Dict[int, int]]:
+    """{vendor_id: {stars: n}} contando reviews aprobadas (un GROUP BY)."""
+    q = (
+        select(Review.vendor_id, Review.rating, func.count())
+        .where(Review.is_approved == True)
+        .group_by(Review.vendor_id, Review.rating)
+    )
+    if vendor_id is not None:
+        q = q.where(Review.vendor_id == vendor_id)
+    out: Dict[int, Dict[int, int]] = {}
+    for vid, rating, n in session.exec(q).all():
+        out.setdefault(vid, {})[int(rating)] = int(n)
+    return out
+
+def rating_summary(session: Session, vendor_id: int) -> RatingSummary:
+    """
+    Promedio, conteo e histograma de reviews aprobadas del vendor.
+    Lee una sola fila; si el vendor aún no tiene fila (nunca se moderó nada
+    desde que existe el agregado) lo calcula al vuelo sin persistir.
+    """
+    return summary_from_row(session, vendor_id, session.get(VendorRatingStats, vendor_id))
+
+def summary_from_row(session: Session, vendor_id: int, row: Optional[VendorRatingStats]) -> RatingSummary:
+    """Como rating_summary, con la fila ya cargada (p.ej. en el JOIN de services/storefront.py)."""
+    if row is None:
+        return _summary_from_counts(_approved_histograms(session, vendor_id).get(vendor_id, {}))
+    return _summary_from_counts({i: getattr(row, f"stars_{i}") for i in range(1, 6)})
+
+def apply_approval_change(session: Session, review: Review, was_approved: bool) -> None:
+    """
+    Actualiza el agregado cuando una review entra/sale de "aprobada".
+    Idempotente: aprobar algo ya aprobado no cambia nada. NO hace commit.
+    """
+    if bool(review.is_approved) == bool(was_approved):
+        return
+    delta = 1 if review.is_approved else -1
+    stars = int(review.rating)
+    col = getattr(VendorRatingStats, f"stars_{stars}")
+    res = session.exec(
+        update(VendorRatingStats)
+        .where(VendorRatingStats.vendor_id == review.vendor_id)
+        .values({
+            VendorRatingStats.reviews_count: VendorRatingStats.reviews_count + delta,
+            VendorRatingStats.rating_sum: VendorRatingStats.rating_sum + delta * stars,
+            col: col + delta,
+            VendorRatingStats.updated_at: now_utc(),
+        })
+    )
+    if not res.rowcount:
+        # Primera vez para este vendor: se arma desde la tabla (incluye este cambio)
+        session.flush()
+        rebuild_rating_stats(session, review.vendor_id)
+
+def rebuild_rating_stats(session: Session, vendor_id: Optional[int] = None) -> int:
+    """
+    Recalcula el agregado desde `review` (de un vendor o de todos).
+    Devuelve cuántas filas se escribieron. NO hace commit.
+    """
+    hists = _approved_histograms(session, vendor_id)
+    existing = session.exec(
+        select(VendorRatingStats) if vendor_id is None
+        else select(VendorRatingStats).where(VendorRatingStats.vendor_id == vendor_id)
+    ).all()
+    rows = {r.vendor_id: r for r in existing}
+    if vendor_id is not None:
+        hists.setdefault(vendor_id, {})
+
+    for vid in set(hists) | set(rows):
+        hist = hists.get(vid, {})
+        row = rows.get(vid) or VendorRatingStats(vendor_id=vid)
+        row.reviews_count = sum(hist.values())
+        row.rating_sum = sum(stars * n for stars, n in hist.items())
+        for i in range(1, 6):
+            setattr(row, f"stars_{i}", hist.get(i, 0))
+        row.updated_at = now_utc()
+        session.add(row)
+    return len(set(hists) | set(rows))